@@ -0,0 +1,250 @@
+"""
+Admission control for Pet Adoption API
+
+Middleware ASGI que protege as rotas caras (login com bcrypt, busca por
+ILIKE, upload de fotos) para que uma rajada nelas não derrube a latência
+do resto da API:
+
+- cada classe de rota tem um limite de requisições simultâneas e uma fila
+  curta; com a fila cheia, ou depois de ADMISSION_QUEUE_TIMEOUT_SECONDS
+  esperando, a resposta é 503 na hora
+- login e busca têm um balde de tokens por cliente (IP); sem token a
+  resposta é 429
+
+As duas recusas trazem Retry-After e não chegam a abrir sessão no banco.
+Os limites de concorrência são por worker. Os baldes ficam em memória
+(por worker) ou, com RATE_LIMIT_BACKEND=redis, num Redis compartilhado.
+"""
+
+import asyncio
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app_types.constants import (
+    ADMISSION_CONTROL, ADMISSION_ROUTE_CLASSES, ADMISSION_QUEUE_TIMEOUT_SECONDS, ADMISSION_RETRY_AFTER_SECONDS,
+    RATE_LIMITS, RATE_LIMIT_BACKEND, RATE_LIMIT_MAX_CLIENTS, REDIS_URL
+)
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_INSTALLED = True
+except ImportError:
+    REDIS_INSTALLED = False
+    redis_asyncio = None
+
+# (método, caminho) -> classe de rota
+ROUTE_CLASSES = (
+    ("POST", re.compile(r"^/api/auth/(login|register)$"), "auth"),
+    ("GET", re.compile(r"^/user/login$"), "auth"),
+    ("GET", re.compile(r"^/pets/search$"), "search"),
+    ("POST", re.compile(r"^/pets/\d+/photos$"), "upload"),
+)
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    for route_method, pattern, name in ROUTE_CLASSES:
+        if method == route_method and pattern.match(path):
+            return name
+    return None
+
+
+class ConcurrencyLimiter:
+    """Semáforo com fila limitada: quem não cabe na fila é recusado na hora"""
+
+    def __init__(self, concurrency: int, queue: int):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.active = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """None quando admitida; senão o motivo da recusa ("queue_full" ou "timeout")"""
+        if self._slots.locked():
+            if self.waiting >= self.queue:
+                return "queue_full"
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout)
+            except asyncio.TimeoutError:
+                return "timeout"
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self.active += 1
+        return None
+
+    def release(self) -> None:
+        self.active -= 1
+        self._slots.release()
+
+
+class MemoryBackend:
+    """Baldes de tokens no processo, os menos usados descartados além de max_clients"""
+
+    def __init__(self, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        """Consumir um token; retorna 0 se havia, senão os segundos até o próximo"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# Mesma conta do MemoryBackend, atômica no Redis; a chave expira quando o balde enche
+TAKE_SCRIPT = """
+local rate, capacity, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Baldes compartilhados por todos os workers e máquinas"""
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "ratelimit:"):
+        self.prefix = prefix
+        self._client = redis_asyncio.from_url(url)
+        self._take = self._client.register_script(TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        return float(await self._take(keys=[self.prefix + key], args=[rate, capacity, time.time()]))
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "redis":
+        if not REDIS_INSTALLED:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requer o pacote redis. Execute: pip install redis")
+        return RedisBackend()
+    return MemoryBackend()
+
+
+def client_key(scope) -> str:
+    """IP do cliente (atrás do nginx, o uvicorn já aplica X-Forwarded-For)"""
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """
+    Limitar concorrência por classe de rota e taxa por cliente
+    """
+
+    def __init__(
+        self,
+        app,
+        route_classes: dict = ADMISSION_ROUTE_CLASSES,
+        rate_limits: dict = RATE_LIMITS,
+        backend=None,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        enabled: bool = ADMISSION_CONTROL != "off",
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.rate_limits = rate_limits
+        self.queue_timeout = queue_timeout
+        self.limiters = {
+            name: ConcurrencyLimiter(limits["concurrency"], limits["queue"])
+            for name, limits in route_classes.items()
+        }
+        self.backend = backend if backend is not None else create_backend()
+        self.rejected = Counter()
+        stats.middleware = self
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        name = route_class(scope["method"], path)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        rule = self.rate_limits.get(path)
+        if rule is not None:
+            wait = await self.backend.take(f"{path}:{client_key(scope)}", *rule)
+            if wait > 0:
+                self.rejected[(name, "rate_limited")] += 1
+                response = reject(429, "Muitas requisições, tente novamente em instantes", wait)
+                await response(scope, receive, send)
+                return
+
+        limiter = self.limiters.get(name)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        refused = await limiter.acquire(self.queue_timeout)
+        if refused is not None:
+            self.rejected[(name, refused)] += 1
+            response = reject(503, "Servidor ocupado, tente novamente em instantes", ADMISSION_RETRY_AFTER_SECONDS)
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+class _Stats:
+    """Estado do middleware registrado no app, para /debug/admission"""
+
+    middleware: Optional[AdmissionMiddleware] = None
+
+    def snapshot(self) -> dict:
+        middleware = self.middleware
+        if middleware is None:
+            return {"enabled": False}
+        return {
+            "enabled": middleware.enabled,
+            "backend": type(middleware.backend).__name__,
+            "classes": {
+                name: {
+                    "active": limiter.active,
+                    "waiting": limiter.waiting,
+                    "concurrency": limiter.concurrency,
+                    "queue": limiter.queue,
+                    "rejected": {
+                        reason: count for (cls, reason), count in middleware.rejected.items() if cls == name
+                    },
+                }
+                for name, limiter in middleware.limiters.items()
+            },
+        }
+
+
+stats = _Stats()
@@ -5,7 +5,7 @@ This module contains all the type definitions, enums, and constants
 used throughout the application.
 """
 
-from .enums import GenderEnum, SpeciesEnum, StatusEnum, AdoptionStatusEnum
+from .enums import GenderEnum, SpeciesEnum, StatusEnum, AdoptionStatusEnum, PetViewEnum, OutboxStatusEnum
 from .constants import *
 
 __all__ = [
@@ -13,4 +13,6 @@ __all__ = [
     "SpeciesEnum", 
     "StatusEnum",
     "AdoptionStatusEnum",
+    "PetViewEnum",
+    "OutboxStatusEnum",
 ]
@@ -4,18 +4,165 @@ Constants for Pet Adoption API
 This module contains application-wide constants.
 """
 
+import os
+
 # API Configuration
 DEFAULT_PAGE_SIZE = 100
 MAX_PAGE_SIZE = 100
+PET_BATCH_MAX_IDS = 200  # GET/POST /pets/batch
 MIN_PAGE_SIZE = 1
 
+# Bulk updates
+BULK_UPDATE_MAX_IDS = 5000
+BULK_UPDATE_CHUNK_SIZE = 500  # abaixo do limite de variáveis do SQLite
+
 # File Upload
 UPLOAD_DIR = "uploads"
 ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp"]
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
 # Database
-DATABASE_URL = "sqlite:///./pet_adoption.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pet_adoption.db")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "90"))
+
+# Health checks
+HEALTH_DB_TIMEOUT_SECONDS = 2.0
+HEALTH_CACHE_SECONDS = 5.0
+HEALTH_POOL_SATURATION_THRESHOLD = 0.9
+HEALTH_LOOP_LAG_THRESHOLD_MS = 500
+
+# Response compression (níveis configuráveis por variável de ambiente)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))  # bytes
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))  # 1-9
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))  # 0-11
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))  # 1-22
+
+# Geolocalização (busca por raio)
+GEO_CELL_DEGREES = 0.1  # lado da célula da grade indexada (~11 km)
+GEO_DEFAULT_RADIUS_KM = 30.0
+GEO_INITIAL_RADIUS_KM = 2.0  # primeiro raio da busca expansiva
+GEO_MAX_RADIUS_KM = 500.0
+
+# Catálogo de pets em memória (NumPy), opt-in
+PET_CATALOG = os.getenv("PET_CATALOG", "off")  # memory | off
+PET_CATALOG_MAX_AGE_SECONDS = float(os.getenv("PET_CATALOG_MAX_AGE_SECONDS", "30"))
+CATALOG_CHUNK_SIZE = 65536  # pets por bloco de máscara
+
+# Fotos de pets (tabela pet_photos)
+PHOTO_POSITION_GAP = 1024  # intervalo entre posições; reordenar usa o meio do intervalo
+PHOTO_APPEND_ATTEMPTS = 3  # uploads simultâneos no mesmo pet: tentativas ao perder a posição
+
+# Facetas de GET /pets/facets: limites superiores (meses) das faixas de idade
+AGE_FACET_BOUNDS = (12, 36, 96)  # 0-12, 12-36, 36-96, 96+
+
+# Recomendações de pets
+RECOMMENDATION_SNAPSHOT_SECONDS = 300.0  # idade máxima do snapshot de pets disponíveis
+RECOMMENDATION_CACHE_SECONDS = 300.0
+RECOMMENDATION_CACHE_SIZE = 10000  # usuários
+RECOMMENDATION_CACHE_DEPTH = 100  # pets guardados por ranking
+RECOMMENDATION_MAX_RESULTS = 50
+RECOMMENDATION_POPULARITY_DAYS = 30
+RECOMMENDATION_DISTANCE_SCALE_KM = 50.0
+RECOMMENDATION_AGE_SCALE_MONTHS = 24.0
+RECOMMENDATION_WEIGHTS = {"distance": 3.0, "species": 2.0, "age": 1.5, "popularity": 1.0}
+
+# Pets parecidos (índice de similaridade pré-calculado)
+SIMILARITY_UPDATES = os.getenv("SIMILARITY_UPDATES", "inprocess")  # inprocess | off
+SIMILARITY_TOP_K = 20  # vizinhos guardados por pet
+SIMILARITY_HASH_DIM = 2 ** 20
+SIMILARITY_MAX_CANDIDATES = 500  # pets pontuados por consulta
+SIMILARITY_WEIGHTS = {"text": 1.0, "breed": 0.8, "age": 0.6}
+
+# Controle de admissão (admission.py): rotas caras rejeitam rápido em vez de enfileirar
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "on")  # on | off
+ADMISSION_ROUTE_CLASSES = {  # requisições simultâneas e na fila, por worker
+    "auth": {"concurrency": 2, "queue": 8},
+    "search": {"concurrency": 8, "queue": 16},
+    "upload": {"concurrency": 2, "queue": 4},
+}
+ADMISSION_QUEUE_TIMEOUT_SECONDS = 2.0
+ADMISSION_RETRY_AFTER_SECONDS = 1
+RATE_LIMITS = {  # rota -> (tokens por segundo, capacidade do balde), por cliente
+    "/api/auth/login": (0.2, 10),
+    "/user/login": (0.2, 10),
+    "/pets/search": (2.0, 20),
+}
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory | redis
+RATE_LIMIT_MAX_CLIENTS = 100_000  # baldes guardados em memória (LRU)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Prazos das requisições (deadlines.py): viram timeout das consultas no banco
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "30"))  # abaixo dos 60s do nginx
+REQUEST_DEADLINES = {  # regex do caminho -> segundos (None = sem prazo)
+    r"^/pets/search$": 5.0,
+    r"^/pets/facets$": 5.0,
+    r"^/debug/": 5.0,
+    r"^/pets/\d+/photos$": 50.0,  # uploads
+    r"^/events$": None,  # stream SSE
+}
+SQLITE_PROGRESS_OPS = 10_000  # instruções da VM do SQLite entre verificações do prazo
+
+# Feed de mudanças (events.py): GET /events (SSE) e /events/ws
+CHANGE_FEED_BUFFER_SIZE = 10_000  # eventos recentes em memória por worker
+CHANGE_FEED_POLL_INTERVAL_SECONDS = 0.5  # escritas de outros workers aparecem em até isso
+CHANGE_FEED_HEARTBEAT_SECONDS = 15.0  # abaixo do proxy_read_timeout do nginx
+CHANGE_FEED_MAX_SUBSCRIBERS = int(os.getenv("CHANGE_FEED_MAX_SUBSCRIBERS", "10000"))  # por worker
+CHANGE_FEED_REPLAY_BATCH_SIZE = 1000  # eventos lidos do banco por vez ao retomar
+CHANGE_EVENTS_RETENTION_HOURS = 24  # até onde o Last-Event-ID consegue retomar
+CHANGE_EVENTS_PRUNE_INTERVAL_SECONDS = 600
+
+# Profiling sob demanda (profiling.py); desligado sem PROFILE_TOKEN e PROFILE_SAMPLE_EVERY
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")  # header X-Profile-Token ou ?profile=<token>
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "0"))  # 1 a cada N requisições (0 = nunca)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = 200  # os mais antigos são apagados
+PROFILE_INTERVAL_SECONDS = 0.002
+
+# Watchdog do event loop (loop_watchdog.py): GET /debug/loop
+LOOP_WATCHDOG = os.getenv("LOOP_WATCHDOG", "on")  # "off" desliga
+LOOP_WATCHDOG_INTERVAL_SECONDS = 0.05  # período da medição do atraso
+LOOP_WATCHDOG_THRESHOLD_MS = float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "100"))  # acima disso: rota e pilha
+LOOP_WATCHDOG_POLL_SECONDS = 0.01  # frequência com que a thread do watchdog olha o loop
+LOOP_WATCHDOG_RECENT_BLOCKS = 50  # bloqueios guardados com a pilha
+LOOP_WATCHDOG_STACK_DEPTH = 25  # frames mais internos de cada pilha
+LOOP_LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Captura de tráfego (capture.py) para replay.py; desligada com taxa 0
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv("TRAFFIC_CAPTURE_SAMPLE_RATE", "0"))  # fração das requisições
+TRAFFIC_CAPTURE_DIR = os.getenv("TRAFFIC_CAPTURE_DIR", "captures")
+TRAFFIC_CAPTURE_FILE_BYTES = 50 * 1024 * 1024  # arquivo novo ao passar disso
+TRAFFIC_CAPTURE_MAX_FILES = 20  # os mais antigos são apagados
+TRAFFIC_CAPTURE_MAX_BODY_BYTES = 64 * 1024  # corpos maiores não são gravados (só o tamanho e o hash)
+TRAFFIC_CAPTURE_QUEUE_SIZE = 10_000  # registros esperando a gravação; além disso são descartados
+TRAFFIC_CAPTURE_EXCLUDE = r"^/(events|debug/|health|docs|openapi\.json|redoc|uploads/)"
+TRAFFIC_CAPTURE_HEADERS = ("content-type", "accept", "accept-encoding", "if-none-match", "if-match", "last-event-id")
+TRAFFIC_CAPTURE_SCRUB = r"pass|senha|token|secret|key|cookie|authorization|profile"  # nomes de campos e parâmetros
+
+# Orçamentos de desempenho (budgets.py, tests/test_budgets.py)
+BUDGET_REFERENCE_CALIBRATION_MS = 0.9  # mediana de GET /health/live na máquina em que os tetos foram medidos
+
+# Arquivamento (archive.py): pets adotados e pedidos fechados saem das tabelas quentes
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+ARCHIVE_BATCH_SIZE = 500  # linhas por transação
+
+# Outbox (notificações de adoção)
+OUTBOX_WORKER = os.getenv("OUTBOX_WORKER", "inprocess")  # inprocess | off
+OUTBOX_SENDER = os.getenv("OUTBOX_SENDER", "stub")  # stub | smtp
+OUTBOX_STUB_FILE = os.getenv("OUTBOX_STUB_FILE", "outbox_sent.jsonl")
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "4"))
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_BACKOFF_BASE_SECONDS = 5
+OUTBOX_BACKOFF_MAX_SECONDS = 3600
+OUTBOX_POLL_INTERVAL_SECONDS = 2.0
+OUTBOX_LEASE_SECONDS = 60
+SHELTER_EMAIL = os.getenv("SHELTER_EMAIL", "contato@petadoption.com")
+SHELTER_WHATSAPP = os.getenv("SHELTER_WHATSAPP")
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_FROM = os.getenv("SMTP_FROM", "nao-responda@petadoption.com")
 
 # Age limits (in months)
 MIN_AGE_MONTHS = 0
@@ -32,3 +32,18 @@ class AdoptionStatusEnum(str, enum.Enum):
     APPROVED = "approved"
     REJECTED = "rejected"
     COMPLETED = "completed"
+
+
+class PetViewEnum(str, enum.Enum):
+    """Projection used by pet listings"""
+    FULL = "full"
+    CARD = "card"
+
+
+class OutboxStatusEnum(str, enum.Enum):
+    """Status enumeration for outbox messages"""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SENT = "sent"
+    SKIPPED = "skipped"
+    FAILED = "failed"
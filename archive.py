@@ -0,0 +1,186 @@
+"""
+Hot/cold archiving for Pet Adoption API
+
+Move das tabelas quentes para as de arquivo (archived_pets e
+archived_adoption_requests):
+
+- pets adotados há mais de ARCHIVE_AFTER_DAYS, junto com todos os pedidos
+  de adoção deles, as fotos (guardadas como lista) e os vizinhos em
+  pet_similarities
+- pedidos rejeitados ou concluídos sem mudança há mais de ARCHIVE_AFTER_DAYS
+
+Cada lote de ARCHIVE_BATCH_SIZE linhas é uma transação: copiar e apagar
+acontecem juntos, então interromper o job no meio não perde nem duplica
+nada. Rodar periodicamente (ex: cron diário):
+
+    python archive.py
+
+GET /pets/{id} e GET /adoption-requests/{id} procuram no arquivo quando
+não encontram na tabela quente; relatórios aceitam include_archived.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import (
+    AdoptionRequest, ArchivedAdoptionRequest, ArchivedPet, Pet, PetPhoto, PetSimilarity, User
+)
+from app_types import AdoptionStatusEnum, StatusEnum
+from app_types.constants import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+# Colunas copiadas como estão (fotos vêm de pet_photos; archived_at é do arquivo)
+PET_COLUMNS = tuple(
+    column.name for column in ArchivedPet.__table__.columns if column.name not in ("photos", "archived_at")
+)
+REQUEST_COLUMNS = tuple(
+    column.name for column in ArchivedAdoptionRequest.__table__.columns if column.name != "archived_at"
+)
+CLOSED_STATUSES = (AdoptionStatusEnum.REJECTED, AdoptionStatusEnum.COMPLETED)
+
+
+def archive_pets_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Arquivar um lote de pets adotados antes de `cutoff`; retorna quantos"""
+    pet_ids = db.execute(
+        select(Pet.id)
+        .where(Pet.status == StatusEnum.ADOPTED, Pet.adopted_at < cutoff)
+        .order_by(Pet.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if not pet_ids:
+        return 0
+
+    now = datetime.utcnow()
+    photos = {pet_id: [] for pet_id in pet_ids}
+    for pet_id, blob_key in db.execute(
+        select(PetPhoto.pet_id, PetPhoto.blob_key)
+        .where(PetPhoto.pet_id.in_(pet_ids))
+        .order_by(PetPhoto.pet_id, PetPhoto.position)
+    ):
+        photos[pet_id].append(blob_key)
+
+    pets = db.execute(select(*(Pet.__table__.c[name] for name in PET_COLUMNS)).where(Pet.id.in_(pet_ids)))
+    db.execute(insert(ArchivedPet), [
+        {**dict(zip(PET_COLUMNS, row)), "photos": photos[row.id], "archived_at": now} for row in pets
+    ])
+    _copy_requests(db, AdoptionRequest.pet_id.in_(pet_ids), now)
+
+    db.execute(delete(PetSimilarity).where(
+        or_(PetSimilarity.pet_id.in_(pet_ids), PetSimilarity.similar_pet_id.in_(pet_ids))
+    ))
+    db.execute(delete(PetPhoto).where(PetPhoto.pet_id.in_(pet_ids)))
+    db.execute(delete(AdoptionRequest).where(AdoptionRequest.pet_id.in_(pet_ids)))
+    db.execute(delete(Pet).where(Pet.id.in_(pet_ids)).execution_options(synchronize_session=False))
+    db.commit()
+    return len(pet_ids)
+
+
+def archive_requests_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Arquivar um lote de pedidos fechados antes de `cutoff`; retorna quantos"""
+    request_ids = db.execute(
+        select(AdoptionRequest.id)
+        .where(
+            AdoptionRequest.status.in_(CLOSED_STATUSES),
+            func.coalesce(AdoptionRequest.updated_at, AdoptionRequest.created_at) < cutoff,
+        )
+        .order_by(AdoptionRequest.id)
+        .limit(batch_size)
+    ).scalars().all()
+    if not request_ids:
+        return 0
+
+    _copy_requests(db, AdoptionRequest.id.in_(request_ids), datetime.utcnow())
+    db.execute(delete(AdoptionRequest).where(AdoptionRequest.id.in_(request_ids)))
+    db.commit()
+    return len(request_ids)
+
+
+def _copy_requests(db: Session, condition, archived_at: datetime) -> None:
+    rows = db.execute(select(*(AdoptionRequest.__table__.c[name] for name in REQUEST_COLUMNS)).where(condition))
+    values = [{**dict(zip(REQUEST_COLUMNS, row)), "archived_at": archived_at} for row in rows]
+    if values:
+        db.execute(insert(ArchivedAdoptionRequest), values)
+
+
+def run(db: Session, days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> dict:
+    """Arquivar tudo o que passou do limite, lote a lote"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    totals = {"pets": 0, "adoption_requests": 0}
+    while (archived := archive_pets_batch(db, cutoff, batch_size)):
+        totals["pets"] += archived
+    while (archived := archive_requests_batch(db, cutoff, batch_size)):
+        totals["adoption_requests"] += archived
+    return totals
+
+
+# Leitura com fallback para o arquivo
+
+def archived_pet(db: Session, pet_id: int) -> Optional[dict]:
+    """Pet arquivado no formato de PetResponse, ou None"""
+    pet = db.get(ArchivedPet, pet_id)
+    if pet is None:
+        return None
+    return {**{name: getattr(pet, name) for name in PET_COLUMNS}, "photos": pet.photos or []}
+
+
+def archived_adoption_request(db: Session, adoption_id: int) -> Optional[dict]:
+    """Pedido arquivado no formato de AdoptionRequestResponse (com pet e usuário), ou None"""
+    adoption = db.get(ArchivedAdoptionRequest, adoption_id)
+    if adoption is None:
+        return None
+    return attach_pets_and_users(db, [{name: getattr(adoption, name) for name in REQUEST_COLUMNS}])[0]
+
+
+def attach_pets_and_users(db: Session, requests: List[dict]) -> List[dict]:
+    """Preencher `pet` e `user` dos pedidos; o pet pode estar na tabela quente ou no arquivo"""
+    pet_ids = {request["pet_id"] for request in requests}
+    user_ids = {request["user_id"] for request in requests}
+    pets = {}
+    for model in (Pet, ArchivedPet):
+        for row in db.execute(
+            select(model.id, model.name, model.species, model.breed).where(model.id.in_(pet_ids))
+        ):
+            pets[row.id] = row._asdict()
+    users = {
+        row.id: row._asdict()
+        for row in db.execute(select(User.id, User.full_name, User.email).where(User.id.in_(user_ids)))
+    }
+    for request in requests:
+        request["pet"] = pets.get(request["pet_id"])
+        request["user"] = users.get(request["user_id"])
+    return requests
+
+
+def select_adoption_requests(
+    db: Session, status: Optional[AdoptionStatusEnum], skip: int, limit: int
+) -> List[dict]:
+    """Página de pedidos das duas tabelas (quente e arquivo), por id"""
+    selects = []
+    for table in (AdoptionRequest.__table__, ArchivedAdoptionRequest.__table__):
+        stmt = select(*(table.c[name] for name in REQUEST_COLUMNS))
+        if status:
+            stmt = stmt.where(table.c.status == status)
+        selects.append(stmt)
+    combined = union_all(*selects).subquery()
+    rows = db.execute(select(combined).order_by(combined.c.id).offset(skip).limit(limit))
+    return attach_pets_and_users(db, [dict(zip(REQUEST_COLUMNS, row)) for row in rows])
+
+
+def count_by_status(db: Session, status_column) -> dict:
+    """Contagem por status de AdoptionRequest.status ou ArchivedAdoptionRequest.status"""
+    return dict(db.execute(select(status_column, func.count()).group_by(status_column)).all())
+
+
+if __name__ == "__main__":
+    from database import init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        totals = run(db)
+        print(f"✅ Arquivados {totals['pets']} pets e {totals['adoption_requests']} pedidos de adoção")
+    finally:
+        db.close()
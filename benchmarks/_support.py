@@ -0,0 +1,160 @@
+"""
+Utilitários compartilhados pelos benchmarks
+
+Cada benchmark usa um banco SQLite temporário próprio, nunca o
+pet_adoption.db da aplicação. Rodar a partir da raiz do repositório:
+
+    python benchmarks/bench_<nome>.py
+"""
+
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Pet, PetPhoto
+from geo import locate
+from app_types import GenderEnum, SpeciesEnum, StatusEnum
+from app_types.constants import PHOTO_POSITION_GAP
+
+CITIES = ["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Salvador", "Brasília",
+          "Fortaleza", "Manaus", "Curitiba", "Recife", "Porto Alegre"]
+BREEDS = ["Vira-lata", "Sem raça definida", "Labrador", "Poodle", "Siamês", "Persa"]
+
+
+def temp_database(prefix: str = "bench"):
+    """Criar engine e sessionmaker num arquivo SQLite temporário"""
+    fd, path = tempfile.mkstemp(prefix=f"{prefix}-", suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine), path
+
+
+def fake_pet(i: int, rng: random.Random) -> dict:
+    """Gerar dados de um pet no formato da tabela pets"""
+    species = rng.choice(list(SpeciesEnum))
+    gender = rng.choice(list(GenderEnum))
+    city = rng.choice(CITIES)
+    # Espalhar os pets em volta do centro da cidade (~20 km)
+    center_lat, center_lon, _ = locate(city)
+    latitude, longitude, cell = locate(city, center_lat + rng.gauss(0, 0.2), center_lon + rng.gauss(0, 0.2))
+    return {
+        "name": f"Pet {i}",
+        "species": species,
+        "breed": rng.choice(BREEDS),
+        "age": float(rng.randint(1, 180)),
+        "gender": gender,
+        "city": city,
+        "latitude": latitude,
+        "longitude": longitude,
+        "geo_cell": cell,
+        "description": f"Pet {i} muito carinhoso e brincalhão, vacinado e castrado.",
+        "photos": [f"https://example.com/photos/{i}-{n}.jpg" for n in range(rng.randint(1, 4))],
+        "status": rng.choice([StatusEnum.AVAILABLE] * 3 + [StatusEnum.ADOPTED, StatusEnum.PENDING]),
+        "created_at": datetime(2025, 1, 1) + timedelta(minutes=i),
+    }
+
+
+def seed_pets(engine, count: int, seed: int = 42, batch: int = 5000) -> None:
+    """Inserir pets sintéticos em lotes"""
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        for start in range(0, count, batch):
+            rows = [fake_pet(i, rng) for i in range(start, min(start + batch, count))]
+            photos = [row.pop("photos") for row in rows]
+            ids = conn.execute(insert(Pet).returning(Pet.id, sort_by_parameter_order=True), rows).scalars().all()
+            conn.execute(insert(PetPhoto), [
+                {"pet_id": pet_id, "position": (number + 1) * PHOTO_POSITION_GAP, "blob_key": key}
+                for pet_id, keys in zip(ids, photos)
+                for number, key in enumerate(keys)
+            ])
+
+
+def timeit(fn, repeat: int = 200) -> dict:
+    """Executar fn várias vezes e retornar estatísticas em milissegundos"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def report(label: str, stats: dict) -> None:
+    print(f"{label:<40} mean={stats['mean']:8.3f}ms  p50={stats['p50']:8.3f}ms  p99={stats['p99']:8.3f}ms")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_live(base_url: str, timeout: float = 60.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health/live", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("servidor não respondeu a tempo")
+
+
+@contextmanager
+def serve(workers: int = 1, **extra_env):
+    """
+    Subir a API com gunicorn (gunicorn.conf.py) num banco SQLite temporário
+
+    Retorna a URL base; o processo e o banco são removidos ao sair.
+    """
+    fd, db_path = tempfile.mkstemp(prefix="bench-server-", suffix=".db")
+    os.close(fd)
+    os.remove(db_path)
+    port = free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"127.0.0.1:{port}",
+        **{key: str(value) for key, value in extra_env.items()},
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", os.devnull, "main:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_live(base_url)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
@@ -0,0 +1,120 @@
+"""
+Benchmark: latência das rotas baratas com as rotas caras sobrecarregadas
+
+Sobe a API (1 worker) com ADMISSION_CONTROL=off e depois on. Enquanto
+FLOOD clientes martelam login, cadastro (bcrypt) e busca, um cliente
+mede GET /pets/{id}. Com o controle de admissão ligado, o excesso nas
+rotas caras vira 429/503 rápidos e a latência da rota barata fica perto
+da latência sem carga.
+
+    python benchmarks/bench_admission.py [segundos]
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+from _support import serve
+
+FLOOD = 48
+PASSWORD = "bench-password"
+
+
+async def setup(client: httpx.AsyncClient) -> int:
+    await client.post("/api/auth/register", json={
+        "full_name": "Bench User", "email": "bench@example.com", "password": PASSWORD,
+        "whatsapp": "11999999999", "city": "Recife",
+    })
+    response = await client.post("/pets", json={
+        "name": "Bench", "species": "dog", "gender": "male", "age": 10, "city": "Recife"
+    })
+    return response.json()["id"]
+
+
+def percentile(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+async def flood(base_url: str, duration: float, statuses: dict) -> None:
+    """FLOOD clientes que repetem login, cadastro e busca sem esperar (nem respeitar Retry-After)"""
+    stop_at = time.monotonic() + duration
+    emails = itertools.count()
+    counts = Counter()
+
+    async def client_loop(client: httpx.AsyncClient, worker: int):
+        while time.monotonic() < stop_at:
+            kind = worker % 3
+            if kind == 0:
+                response = await client.post("/api/auth/login", json={"username": "bench@example.com", "password": PASSWORD})
+            elif kind == 1:
+                response = await client.post("/api/auth/register", json={
+                    "full_name": "Flood", "email": f"flood{worker}-{next(emails)}@example.com", "password": PASSWORD,
+                    "whatsapp": "11999999999", "city": "Recife",
+                })
+            else:
+                response = await client.get("/pets/search", params={"q": "e"})
+            counts[response.status_code] += 1
+
+    limits = httpx.Limits(max_connections=FLOOD)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(client_loop(client, worker) for worker in range(FLOOD)))
+    statuses.update(counts)
+
+
+def run_flood(base_url: str, duration: float, statuses: dict) -> None:
+    asyncio.run(flood(base_url, duration, statuses))
+
+
+async def cheap_latencies(client: httpx.AsyncClient, pet_id: int, duration: float) -> list:
+    samples = []
+    stop_at = time.monotonic() + duration
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        await client.get(f"/pets/{pet_id}")
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+    return samples
+
+
+async def drive(base_url: str, duration: float) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        pet_id = await setup(client)
+        idle = await cheap_latencies(client, pet_id, 2)
+
+        # A carga roda em outro processo para não atrasar o cliente que mede
+        with multiprocessing.Manager() as manager:
+            statuses = manager.dict()
+            flooder = multiprocessing.Process(target=run_flood, args=(base_url, duration, statuses))
+            flooder.start()
+            await asyncio.sleep(1)
+            loaded = await cheap_latencies(client, pet_id, duration - 1)
+            await asyncio.get_running_loop().run_in_executor(None, flooder.join)
+            statuses = dict(sorted(statuses.items()))
+
+    return {
+        "idle_p99": percentile(idle, 0.99),
+        "p50": percentile(loaded, 0.5),
+        "p99": percentile(loaded, 0.99),
+        "statuses": statuses,
+    }
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 15.0
+    for mode in ("off", "on"):
+        with serve(1, ADMISSION_CONTROL=mode) as base_url:
+            result = asyncio.run(drive(base_url, duration))
+        print(
+            f"ADMISSION_CONTROL={mode:<3}  GET /pets/{{id}} sem carga p99={result['idle_p99']:7.1f}ms  "
+            f"sob carga p50={result['p50']:7.1f}ms p99={result['p99']:7.1f}ms  rotas caras: {result['statuses']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de contenção: centenas de adoções simultâneas do mesmo pet
+
+Sobe a API com vários workers e dispara todas as requisições
+POST /pets/{id}/adopt de uma vez. Exatamente uma deve retornar 200;
+as demais recebem 400 ("Pet não disponível").
+
+Em seguida cria vários pedidos para outro pet e aprova todos ao mesmo
+tempo com POST /adoption-requests/{id}/approve: só uma aprovação vence,
+o pet fica adotado e os outros pedidos terminam rejeitados.
+
+    python benchmarks/bench_adoption_contention.py [requisições] [workers]
+"""
+
+import asyncio
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+from _support import serve
+
+PET_ID = 1
+USER_ID = 1
+APPROVAL_PET_ID = 2
+
+
+async def storm(base_url: str, requests: int) -> tuple:
+    limits = httpx.Limits(max_connections=requests)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        gate = asyncio.Event()
+
+        async def adopt():
+            await gate.wait()
+            response = await client.post(f"/pets/{PET_ID}/adopt", json={"user_id": USER_ID})
+            return response.status_code
+
+        tasks = [asyncio.create_task(adopt()) for _ in range(requests)]
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        gate.set()
+        statuses = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+        pet = (await client.get(f"/pets/{PET_ID}")).json()
+    return Counter(statuses), elapsed, pet
+
+
+async def approval_storm(base_url: str, requests: int) -> tuple:
+    limits = httpx.Limits(max_connections=requests)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        ids = []
+        for n in range(requests):
+            response = await client.post("/adoption-requests", json={
+                "full_name": f"Adotante {n}", "email": f"adotante{n}@email.com",
+                "user_id": n % 3 + 1, "pet_id": APPROVAL_PET_ID,
+            })
+            ids.append(response.json()["id"])
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.post(f"/adoption-requests/{adoption_id}/approve") for adoption_id in ids
+        ))
+        elapsed = time.perf_counter() - started
+
+        final = (await client.get("/adoption-requests", params={"limit": 100})).json()
+        pet = (await client.get(f"/pets/{APPROVAL_PET_ID}")).json()
+    statuses = Counter(response.status_code for response in responses)
+    request_statuses = Counter(item["status"] for item in final if item["pet_id"] == APPROVAL_PET_ID)
+    return statuses, request_statuses, elapsed, pet
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with serve(workers) as base_url:
+        statuses, elapsed, pet = asyncio.run(storm(base_url, requests))
+        approvals = min(requests, 100)
+        approval_statuses, request_statuses, approval_elapsed, approval_pet = asyncio.run(
+            approval_storm(base_url, approvals)
+        )
+
+    print(f"{requests} adoções simultâneas em {workers} workers: {elapsed * 1000:.0f} ms")
+    print(f"Status: {dict(statuses)}")
+    print(f"Pet: status={pet['status']} adopted_by={pet['adopted_by']} version={pet['version']}")
+    assert statuses[200] == 1, f"esperado exatamente 1 vencedor, obtido {statuses[200]}"
+    assert statuses[400] == requests - 1, "todas as outras devem receber 400"
+    assert pet["status"] == "adopted" and pet["version"] == 2
+    print("✅ Exatamente um vencedor")
+
+    print(f"\n{approvals} aprovações simultâneas do mesmo pet: {approval_elapsed * 1000:.0f} ms")
+    print(f"Status: {dict(approval_statuses)}  Pedidos: {dict(request_statuses)}")
+    assert approval_statuses[200] == 1, f"esperada exatamente 1 aprovação, obtidas {approval_statuses[200]}"
+    assert request_statuses == Counter({"approved": 1, "rejected": approvals - 1})
+    assert approval_pet["status"] == "adopted"
+    print("✅ Exatamente uma aprovação; demais pedidos rejeitados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: CPU x bytes da compressão de respostas
+
+Comprime uma página de 100 pets (GET /pets) e uma página no formato card
+com cada algoritmo e nível disponível, mostrando tempo de compressão e
+tamanho final para orientar a escolha dos níveis em produção.
+"""
+
+import os
+
+from _support import temp_database, seed_pets, timeit
+
+from compression import BROTLI_INSTALLED, ZSTD_INSTALLED, compress_bytes
+from serialization import dumps, select_pet_rows, PET_CARD_FIELDS
+
+LEVELS = [("gzip", level) for level in (1, 6, 9)]
+if BROTLI_INSTALLED:
+    LEVELS += [("br", quality) for quality in (1, 4, 6, 11)]
+if ZSTD_INSTALLED:
+    LEVELS += [("zstd", level) for level in (1, 3, 9)]
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return compress_bytes(body, "br", brotli_quality=level)
+    if encoding == "zstd":
+        return compress_bytes(body, "zstd", zstd_level=level)
+    return compress_bytes(body, "gzip", gzip_level=level)
+
+
+def main():
+    engine, SessionLocal, path = temp_database("compression")
+    try:
+        seed_pets(engine, 1000)
+        db = SessionLocal()
+        payloads = {
+            "full (100 pets)": dumps(select_pet_rows(db, limit=100)),
+            "card (100 pets)": dumps(select_pet_rows(db, limit=100, fields=PET_CARD_FIELDS)),
+        }
+        db.close()
+
+        for name, body in payloads.items():
+            print(f"\n{name}: {len(body)} bytes sem compressão")
+            print(f"{'algoritmo':<10}{'nível':>6}{'bytes':>10}{'razão':>8}{'mean ms':>10}{'p99 ms':>10}")
+            for encoding, level in LEVELS:
+                size = len(compress(body, encoding, level))
+                stats = timeit(lambda: compress(body, encoding, level), repeat=100)
+                print(f"{encoding:<10}{level:>6}{size:>10}{len(body) / size:>8.1f}"
+                      f"{stats['mean']:>10.3f}{stats['p99']:>10.3f}")
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
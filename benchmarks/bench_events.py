@@ -0,0 +1,84 @@
+"""
+Benchmark: fan-out de GET /events com muitos clientes parados
+
+Abre N streams SSE num servidor de 1 worker, dispara escritas
+(POST /pets) e mede quanto tempo cada evento leva do fim do POST até
+chegar em todos os clientes, além da latência de GET /pets/{id} com os
+streams abertos.
+
+    python benchmarks/bench_events.py [clientes] [escritas]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from _support import serve
+
+
+async def subscriber(client: httpx.AsyncClient, ready: asyncio.Event, received: dict, expected: int, opened: list):
+    async with client.stream("GET", "/events", params={"types": "pet.created"}) as response:
+        opened.append(response.status_code)
+        if len(opened) == expected:
+            ready.set()
+        async for line in response.aiter_lines():
+            if line.startswith("id: "):
+                received.setdefault(int(line[4:]), []).append(time.perf_counter())
+
+
+async def drive(base_url: str, clients: int, writes: int) -> dict:
+    limits = httpx.Limits(max_connections=clients + 10, max_keepalive_connections=clients + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        ready = asyncio.Event()
+        received, opened = {}, []
+        streams = [asyncio.create_task(subscriber(client, ready, received, clients, opened)) for _ in range(clients)]
+        await asyncio.wait_for(ready.wait(), timeout=120)
+        await asyncio.sleep(1)
+        stats = (await client.get("/debug/events")).json()
+
+        fanout, cheap = [], []
+        for number in range(writes):
+            response = await client.post("/pets", json={
+                "name": f"Evento {number}", "species": "cat", "gender": "female", "age": 6, "city": "Recife"
+            })
+            committed = time.perf_counter()
+            pet_id = response.json()["id"]
+            deadline = time.monotonic() + 30
+            while time.monotonic() < deadline and not any(len(times) == clients for times in received.values()):
+                await asyncio.sleep(0.005)
+            arrivals = max(received.values(), key=len)
+            fanout.append((max(arrivals) - committed) * 1000)
+            received.clear()
+
+            started = time.perf_counter()
+            await client.get(f"/pets/{pet_id}")
+            cheap.append((time.perf_counter() - started) * 1000)
+
+        for stream in streams:
+            stream.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+
+    return {
+        "subscribers": stats["subscribers"],
+        "fanout_p50": statistics.median(fanout),
+        "fanout_max": max(fanout),
+        "cheap_p50": statistics.median(cheap),
+        "cheap_max": max(cheap),
+    }
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with serve(1) as base_url:
+        result = asyncio.run(drive(base_url, clients, writes))
+    print(f"{result['subscribers']} clientes SSE no worker")
+    print(f"evento até o último cliente   p50={result['fanout_p50']:8.1f}ms  max={result['fanout_max']:8.1f}ms")
+    print(f"GET /pets/{{id}} com os streams p50={result['cheap_p50']:8.1f}ms  max={result['cheap_max']:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
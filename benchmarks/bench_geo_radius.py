@@ -0,0 +1,75 @@
+"""
+Benchmark: busca por raio (lat/lon/radius_km) com 1M de pets
+
+Compara a busca expansiva pela grade indexada (geo_cell) com a mesma
+consulta sem a condição de células, que obriga o SQLite a varrer a tabela
+inteira e ordenar tudo o que está no raio, e confere que as duas devolvem
+os mesmos pets na mesma ordem.
+
+    python benchmarks/bench_geo_radius.py [pets]
+"""
+
+import os
+import sys
+import time
+
+from _support import temp_database, seed_pets, timeit, report
+
+from app_types import StatusEnum
+from geo import nearby, select_nearby_rows
+from models import Pet
+from serialization import PET_CARD_FIELDS, select_pet_rows
+
+PAGE_SIZE = 20
+SEARCHES = [
+    ("São Paulo", -23.5505, -46.6333, 5),
+    ("São Paulo", -23.5505, -46.6333, 30),
+    ("Campinas", -22.9099, -47.0626, 100),
+    ("Palmas", -10.1840, -48.3336, 30),
+]
+
+
+def search(db, latitude, longitude, radius_km):
+    """Caminho do GET /pets?lat=&lon=&radius_km=&view=card"""
+    return select_nearby_rows(
+        db, latitude, longitude, radius_km, [Pet.status == StatusEnum.AVAILABLE],
+        limit=PAGE_SIZE, fields=PET_CARD_FIELDS,
+    )
+
+
+def scan(db, latitude, longitude, radius_km):
+    """Mesma consulta sem a grade: varre a tabela e ordena tudo que está no raio"""
+    conditions, distance_sq = nearby(latitude, longitude, radius_km)
+    conditions = conditions[1:] + [Pet.status == StatusEnum.AVAILABLE]
+    return select_pet_rows(db, conditions, limit=PAGE_SIZE, fields=PET_CARD_FIELDS, distance_sq=distance_sq)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    engine, SessionLocal, path = temp_database("geo")
+    try:
+        started = time.perf_counter()
+        seed_pets(engine, total)
+        print(f"{total} pets inseridos em {time.perf_counter() - started:.1f}s\n")
+        db = SessionLocal()
+
+        for city, latitude, longitude, radius_km in SEARCHES:
+            indexed = search(db, latitude, longitude, radius_km)
+            scanned = scan(db, latitude, longitude, radius_km)
+            assert indexed == scanned, f"resultados diferentes para {city} {radius_km} km"
+            assert all(pet["distance_km"] <= radius_km for pet in indexed)
+
+            label = f"{city} {radius_km:>3} km ({len(indexed)} pets)"
+            grid = timeit(lambda: search(db, latitude, longitude, radius_km), repeat=20)
+            full = timeit(lambda: scan(db, latitude, longitude, radius_km), repeat=5)
+            report(f"{label} grade", grid)
+            report(f"{label} varredura", full)
+            print(f"Speedup: {full['mean'] / grid['mean']:.1f}x\n")
+        db.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
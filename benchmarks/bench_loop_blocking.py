@@ -0,0 +1,97 @@
+"""
+Benchmark: quais rotas mais travam o event loop
+
+Sobe a API (1 worker) com o watchdog num limite baixo, cadastra pets,
+faz uma mistura de requisições com alguns clientes simultâneos e imprime
+o ranking de GET /debug/loop (tempo total de bloqueio por rota). Em
+seguida compara GET /pets/{id} com LOOP_WATCHDOG=off e on para medir o
+custo do próprio watchdog.
+
+    python benchmarks/bench_loop_blocking.py [rodadas]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from _support import serve
+
+CLIENTS = 8
+THRESHOLD_MS = 10
+
+
+async def seed(client: httpx.AsyncClient, count: int) -> int:
+    pet_id = None
+    for number in range(count):
+        response = await client.post("/pets", json={
+            "name": f"Loop {number}", "species": "dog" if number % 2 else "cat", "gender": "male",
+            "age": number % 120 + 1, "city": "Recife", "description": "Muito carinhoso " * 20,
+        })
+        pet_id = response.json()["id"]
+    return pet_id
+
+
+async def mixed(base_url: str, rounds: int) -> dict:
+    limits = httpx.Limits(max_connections=CLIENTS)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        pet_id = await seed(client, 300)
+        requests = [
+            ("GET", "/pets", {"limit": 100}),
+            ("GET", "/pets/search", {"q": "Loop"}),
+            ("GET", "/pets/facets", None),
+            ("GET", "/pets/stats", None),
+            ("GET", f"/pets/{pet_id}", None),
+            ("GET", "/pets/filters/options", None),
+            ("GET", "/adoption-requests", None),
+        ]
+        queue = asyncio.Queue()
+        for _ in range(rounds):
+            for request in requests:
+                queue.put_nowait(request)
+
+        async def worker():
+            while not queue.empty():
+                method, path, params = queue.get_nowait()
+                await client.request(method, path, params=params)
+
+        await asyncio.gather(*(worker() for _ in range(CLIENTS)))
+        return (await client.get("/debug/loop")).json()
+
+
+async def cheap_latency(base_url: str, samples: int = 300) -> float:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        pet_id = await seed(client, 1)
+        latencies = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            await client.get(f"/pets/{pet_id}")
+            latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    with serve(1, LOOP_WATCHDOG_THRESHOLD_MS=THRESHOLD_MS) as base_url:
+        result = asyncio.run(mixed(base_url, rounds))
+
+    lag = result["lag"]
+    print(f"atraso do loop: {lag['count']} medições, max={lag['max_ms']}ms")
+    print(f"bloqueios acima de {THRESHOLD_MS}ms por rota (tempo total):")
+    for route, histogram in result["blocking_by_route"].items():
+        print(f"  {route:<40} {histogram['count']:5d}x  total={histogram['total_ms']:9.1f}ms  max={histogram['max_ms']:7.1f}ms")
+    if result["recent_blocks"]:
+        block = result["recent_blocks"][0]
+        print(f"pilha do último bloqueio ({block['route']}, {block['blocked_ms']}ms):")
+        for line in block["stack"][-8:]:
+            print(f"    {line}")
+
+    for mode in ("off", "on"):
+        with serve(1, LOOP_WATCHDOG=mode) as base_url:
+            print(f"LOOP_WATCHDOG={mode:<3}  GET /pets/{{id}} p50={asyncio.run(cheap_latency(base_url)):6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: GET /pets com filtros, SQL vs catálogo em memória (NumPy)
+
+Para cada combinação de filtros compara a página calculada pelo SQL
+(pet_filter_conditions + select_pet_rows) com a do catálogo (máscaras
+vetorizadas + busca da página por id) e confere que são idênticas.
+Depois aplica algumas escritas pelo refresh incremental e confere de novo.
+
+    python benchmarks/bench_pet_catalog.py [pets]
+"""
+
+import os
+import sys
+import time
+
+from _support import temp_database, seed_pets, timeit, report
+
+from sqlalchemy import update
+
+from app_types import GenderEnum, SpeciesEnum, StatusEnum
+from catalog import CatalogSnapshot, PetCatalog
+from main import pet_filter_conditions
+from models import Pet
+from serialization import PET_CARD_FIELDS, select_pet_rows
+
+PAGE_SIZE = 20
+
+QUERIES = [
+    ("sem filtros, página profunda", dict(skip=50_000)),
+    ("species + status", dict(species=SpeciesEnum.CAT, status=StatusEnum.AVAILABLE)),
+    ("species + gender + idade", dict(species=SpeciesEnum.DOG, gender=GenderEnum.FEMALE, min_age=24, max_age=36)),
+    ("cidade (substring)", dict(city="paulo", status=StatusEnum.AVAILABLE)),
+    ("tudo, página profunda", dict(species=SpeciesEnum.DOG, gender=GenderEnum.MALE, city="rio",
+                                   status=StatusEnum.AVAILABLE, min_age=12, skip=2_000)),
+    ("filtro raro", dict(species=SpeciesEnum.CAT, city="Manaus", min_age=170, max_age=171)),
+]
+
+
+def sql_page(db, skip=0, **filters):
+    conditions = pet_filter_conditions(**filters)
+    return select_pet_rows(db, conditions, skip=skip, limit=PAGE_SIZE, fields=PET_CARD_FIELDS)
+
+
+def catalog_page(db, catalog, skip=0, **filters):
+    page_ids = catalog.search(db, skip=skip, limit=PAGE_SIZE, **filters)
+    return select_pet_rows(db, [Pet.id.in_(page_ids)], fields=PET_CARD_FIELDS) if page_ids else []
+
+
+def check(db, catalog):
+    for label, query in QUERIES:
+        assert sql_page(db, **query) == catalog_page(db, catalog, **query), f"páginas diferentes: {label}"
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    engine, SessionLocal, path = temp_database("catalog")
+    try:
+        seed_pets(engine, total)
+        db = SessionLocal()
+
+        started = time.perf_counter()
+        catalog = PetCatalog(max_age_seconds=float("inf"))  # sem recarga: o SessionLocal é o do app
+        catalog.snapshot(db)
+        print(f"Snapshot de {total} pets carregado em {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+        check(db, catalog)
+        print(f"✅ Páginas idênticas em {len(QUERIES)} consultas\n")
+
+        for label, query in QUERIES:
+            sql = timeit(lambda: sql_page(db, **query), repeat=20)
+            memory = timeit(lambda: catalog_page(db, catalog, **query), repeat=20)
+            report(f"{label} SQL", sql)
+            report(f"{label} catálogo", memory)
+            print(f"Speedup: {sql['mean'] / memory['mean']:.1f}x\n")
+
+        # Escritas refletidas pelo refresh incremental, sem recarregar
+        changed = list(range(1, 2_000, 7))
+        db.execute(update(Pet).where(Pet.id.in_(changed)).values(status=StatusEnum.ADOPTED, city="Paulo Afonso"))
+        db.execute(Pet.__table__.delete().where(Pet.id.in_(range(3, 500, 11))))
+        new_pet = Pet(name="Novo", species=SpeciesEnum.CAT, gender=GenderEnum.FEMALE, age=6, city="Manaus")
+        db.add(new_pet)
+        db.commit()
+        started = time.perf_counter()
+        catalog.refresh(db, changed + list(range(3, 500, 11)) + [new_pet.id])
+        print(f"Refresh incremental de {len(changed) + 46} pets: {(time.perf_counter() - started) * 1000:.1f} ms")
+        check(db, catalog)
+        assert isinstance(catalog.snapshot(db), CatalogSnapshot)
+        print("✅ Páginas idênticas após o refresh incremental")
+        db.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: GET /pets/facets
+
+Compara uma consulta agrupada com o jeito antigo (uma contagem por valor
+de cada faceta) e com o catálogo em memória, conferindo que os três
+chegam às mesmas contagens.
+
+    python benchmarks/bench_pet_facets.py [pets]
+"""
+
+import os
+import sys
+from collections import Counter
+
+from _support import temp_database, seed_pets, timeit, report
+
+from sqlalchemy import func, select
+
+import facets
+from app_types import GenderEnum, SpeciesEnum, StatusEnum
+from catalog import PetCatalog
+from main import pet_filter_conditions
+from models import Pet
+
+QUERIES = [
+    ("sem filtros", dict()),
+    ("species + status", dict(species=SpeciesEnum.CAT, status=StatusEnum.AVAILABLE)),
+    ("cidade + idade", dict(city="paulo", min_age=24, max_age=96)),
+]
+
+
+def per_value_counts(db, **filters) -> dict:
+    """Uma contagem por valor de faceta, como a UI faria com N chamadas"""
+    conditions = pet_filter_conditions(**filters)
+
+    def count(*extra):
+        return db.execute(select(func.count()).select_from(Pet).where(*conditions, *extra)).scalar()
+
+    result = {"total": count()}
+    for name, enum, column in (("species", SpeciesEnum, Pet.species), ("gender", GenderEnum, Pet.gender),
+                               ("status", StatusEnum, Pet.status)):
+        result[name] = Counter({member.value: count(column == member) for member in enum})
+    cities = db.execute(select(Pet.city).where(*conditions).distinct()).scalars().all()
+    result["city"] = Counter({city: count(Pet.city == city) for city in cities})
+    bounds = (0, *facets.AGE_FACET_BOUNDS)
+    result["age"] = Counter({
+        label: count(Pet.age >= low, Pet.age < high) if high else count(Pet.age >= low)
+        for label, low, high in zip(facets.AGE_BUCKET_LABELS, bounds, (*facets.AGE_FACET_BOUNDS, None))
+    })
+    return {key: (+value if isinstance(value, Counter) else value) for key, value in result.items()}
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    engine, SessionLocal, path = temp_database("facets")
+    try:
+        seed_pets(engine, total)
+        db = SessionLocal()
+        catalog = PetCatalog(max_age_seconds=float("inf"))
+        catalog.snapshot(db)
+
+        for label, query in QUERIES:
+            grouped = lambda: facets.fold_facets(facets.select_facet_rows(db, pet_filter_conditions(**query)))
+            in_memory = lambda: facets.fold_facets(catalog.facet_rows(db, **query))
+            expected = per_value_counts(db, **query)
+            assert grouped() == in_memory(), f"catálogo diferente do SQL: {label}"
+            assert {key: dict(value) if isinstance(value, dict) else value for key, value in grouped().items()} == \
+                {key: dict(value) if isinstance(value, dict) else value for key, value in expected.items()}, \
+                f"GROUP BY diferente das contagens: {label}"
+
+            report(f"{label}: uma contagem por valor", timeit(lambda: per_value_counts(db, **query), repeat=3))
+            report(f"{label}: GROUP BY único", timeit(grouped, repeat=10))
+            report(f"{label}: catálogo", timeit(in_memory, repeat=10))
+            print()
+        print("✅ Mesmas contagens nos três caminhos")
+        db.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Microbenchmark: serialização de uma página de GET /pets
+
+Compara o caminho antigo (objetos ORM -> validação PetResponse -> JSON do
+Starlette) com o caminho rápido (tuplas Core -> orjson) e confere que os
+bytes gerados são idênticos.
+"""
+
+import os
+from typing import List
+
+from _support import temp_database, seed_pets, timeit, report
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from models import Pet
+from schemas import PetResponse
+from serialization import ORJSON_INSTALLED, dumps, select_pet_rows
+
+PAGE_SIZE = 100
+TOTAL_PETS = 5000
+
+adapter = TypeAdapter(List[PetResponse])
+
+
+def orm_path(db, skip: int) -> bytes:
+    pets = db.query(Pet).order_by(Pet.id).offset(skip).limit(PAGE_SIZE).all()
+    validated = adapter.validate_python(pets, from_attributes=True)
+    return JSONResponse(adapter.dump_python(validated, mode="json")).body
+
+
+def fast_path(db, skip: int) -> bytes:
+    return dumps(select_pet_rows(db, skip=skip, limit=PAGE_SIZE))
+
+
+def main():
+    engine, SessionLocal, path = temp_database("serialization")
+    try:
+        seed_pets(engine, TOTAL_PETS)
+        db = SessionLocal()
+
+        for skip in range(0, TOTAL_PETS, PAGE_SIZE):
+            db.expunge_all()
+            assert orm_path(db, skip) == fast_path(db, skip), f"saída diferente na página skip={skip}"
+        print(f"✅ Saída idêntica em {TOTAL_PETS // PAGE_SIZE} páginas (orjson={ORJSON_INSTALLED})")
+
+        def run_orm():
+            db.expunge_all()
+            orm_path(db, 1000)
+
+        def run_fast():
+            fast_path(db, 1000)
+
+        orm = timeit(run_orm)
+        fast = timeit(run_fast)
+        report(f"ORM + PetResponse ({PAGE_SIZE} pets)", orm)
+        report(f"Core + orjson ({PAGE_SIZE} pets)", fast)
+        print(f"Speedup: {orm['mean'] / fast['mean']:.1f}x")
+        db.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
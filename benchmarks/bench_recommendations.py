@@ -0,0 +1,141 @@
+"""
+Benchmark: GET /users/{id}/recommendations com 100k pets
+
+Mede a latência do endpoint (via TestClient) sem cache, com o ranking
+recalculado a cada chamada, e com cache. Também confere a pontuação
+vetorizada contra uma versão em Python puro, pet a pet.
+
+    python benchmarks/bench_recommendations.py [pets]
+"""
+
+import math
+import os
+import random
+import sys
+import tempfile
+
+# O endpoint usa o engine do app: apontá-lo para um banco temporário
+# antes de importar qualquer módulo da aplicação
+fd, DB_PATH = tempfile.mkstemp(prefix="recommendations-", suffix=".db")
+os.close(fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from _support import seed_pets, timeit, report
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+import recommendations
+from database import engine, SessionLocal
+from main import app
+from models import Base
+from app_types.constants import (
+    RECOMMENDATION_WEIGHTS, RECOMMENDATION_DISTANCE_SCALE_KM, RECOMMENDATION_AGE_SCALE_MONTHS
+)
+from geo import KM_PER_DEGREE
+from models import AdoptionRequest, User
+
+USERS = 500
+REQUESTS = 5000
+P99_BUDGET_MS = 20.0
+
+
+def seed_users_and_requests(pets: int) -> None:
+    rng = random.Random(3)
+    cities = ["São Paulo", "Recife", "Curitiba", "Cidade Desconhecida", None]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"full_name": f"Usuário {n}", "email": f"user{n}@email.com", "password": "x", "city": rng.choice(cities)}
+            for n in range(1, USERS + 1)
+        ])
+        conn.execute(insert(AdoptionRequest), [
+            {"user_id": rng.randint(1, USERS), "pet_id": rng.randint(1, pets),
+             "full_name": "Adotante", "email": "adotante@email.com"}
+            for _ in range(REQUESTS)
+        ])
+
+
+def reference_scores(features, profile) -> list:
+    """Mesma fórmula de recommendations.score, pet a pet"""
+    weights = RECOMMENDATION_WEIGHTS
+    requested = set(profile.requested_ids)
+    scores = []
+    for i in range(len(features.ids)):
+        if int(features.ids[i]) in requested:
+            scores.append(-math.inf)
+            continue
+        value = weights["species"] * profile.species_preference[features.species[i]]
+        value += weights["popularity"] * features.popularity[i]
+        if profile.preferred_age is not None and not math.isnan(features.age[i]):
+            gap = (features.age[i] - profile.preferred_age) / RECOMMENDATION_AGE_SCALE_MONTHS
+            value += weights["age"] * math.exp(-gap * gap)
+        if profile.coordinates is not None:
+            if not math.isnan(features.latitude[i]):
+                north = (features.latitude[i] - profile.coordinates[0]) * KM_PER_DEGREE
+                east = (features.longitude[i] - profile.coordinates[1]) * KM_PER_DEGREE * math.cos(math.radians(profile.coordinates[0]))
+                value += weights["distance"] * math.exp(-math.hypot(north, east) / RECOMMENDATION_DISTANCE_SCALE_KM)
+        elif profile.city:
+            value += weights["distance"] * (features.city[i] == features.city_codes.get(profile.city, -2))
+        scores.append(value)
+    return scores
+
+
+def main():
+    pets = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    try:
+        Base.metadata.create_all(bind=engine)
+        seed_pets(engine, pets)
+        seed_users_and_requests(pets)
+        db = SessionLocal()
+
+        recommender = recommendations.recommender
+        features = recommender.features(db)
+        for user_id in (1, 2, 3, 4, 5):
+            profile = recommendations.load_profile(db, user_id)
+            vectorized = recommendations.score(features, profile)
+            expected = reference_scores(features, profile)
+            assert all(
+                (a == b) if math.isinf(b) else abs(a - b) < 1e-9 for a, b in zip(vectorized.tolist(), expected)
+            ), f"pontuação diferente para o usuário {user_id}"
+        print(f"✅ Pontuação vetorizada igual à de referência ({len(features.ids)} pets disponíveis)\n")
+
+        # Snapshot novo: a verificação acima é lenta e não deve disparar a recarga durante a medição
+        recommender.reset()
+        client = TestClient(app)
+        client.get("/users/1/recommendations")
+        rng = random.Random(5)
+
+        def cold():
+            user_id = rng.randint(1, USERS)
+            recommender.invalidate(user_id)
+            assert client.get(f"/users/{user_id}/recommendations").status_code == 200
+
+        def warm():
+            assert client.get(f"/users/{rng.randint(1, 20)}/recommendations").status_code == 200
+
+        def cold_handler():
+            # O que o endpoint faz, sem o custo de thread do TestClient
+            user_id = rng.randint(1, USERS)
+            recommender.invalidate(user_id)
+            assert recommendations.recommended_pets(db, user_id, 20) is not None
+
+        cold_stats = timeit(cold, repeat=300)
+        handler_stats = timeit(cold_handler, repeat=300)
+        for user_id in range(1, 21):
+            client.get(f"/users/{user_id}/recommendations")
+        warm_stats = timeit(warm, repeat=300)
+        report(f"HTTP sem cache ({pets} pets)", cold_stats)
+        report(f"Handler sem cache ({pets} pets)", handler_stats)
+        report(f"HTTP com cache ({pets} pets)", warm_stats)
+        assert handler_stats["p99"] < P99_BUDGET_MS, f"p99 acima de {P99_BUDGET_MS} ms"
+        print(f"✅ p99 do handler abaixo de {P99_BUDGET_MS:.0f} ms")
+        db.close()
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(DB_PATH + suffix):
+                os.remove(DB_PATH + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: índice de pets parecidos
+
+Mede a reconstrução completa (python similarity.py), a atualização
+incremental de um pet e a leitura de GET /pets/{id}/similar, que é uma
+única consulta pela chave primária de pet_similarities.
+
+    python benchmarks/bench_similarity.py [pets]
+"""
+
+import os
+import random
+import sys
+import time
+
+from _support import temp_database, seed_pets, timeit, report
+
+from sqlalchemy import func, select, update
+
+import similarity
+from models import Pet, PetSimilarity
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    engine, SessionLocal, path = temp_database("similarity")
+    try:
+        seed_pets(engine, total)
+        db = SessionLocal()
+
+        started = time.perf_counter()
+        similarity.rebuild_all(db)
+        rows = db.execute(select(func.count()).select_from(PetSimilarity)).scalar()
+        print(f"Reconstrução de {total} pets: {time.perf_counter() - started:.1f} s ({rows} vizinhos gravados)\n")
+
+        rng = random.Random(7)
+        lookup = timeit(lambda: similarity.similar_pets(db, rng.randint(1, total), 10), repeat=500)
+        report("GET /pets/{id}/similar (consulta)", lookup)
+
+        updater = similarity.SimilarityUpdater()
+        updater.index = similarity.load_index(db)
+
+        def incremental():
+            pet_id = rng.randint(1, total)
+            db.execute(update(Pet).where(Pet.id == pet_id).values(description=f"Descrição nova {rng.random()}"))
+            db.commit()
+            updater.apply(db, [(pet_id, True)])
+
+        report("Atualização incremental de 1 pet", timeit(incremental, repeat=50))
+        db.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: escalabilidade de throughput de 1 a N workers
+
+Sobe o gunicorn (gunicorn.conf.py) com 1, 2, ... N workers sobre um banco
+SQLite temporário e dispara uma mistura de leituras (GET /pets?view=card)
+e escritas (POST /pets). Mostra req/s, latências e quantas respostas
+falharam (ex: "database is locked").
+
+    python benchmarks/bench_workers.py [N] [segundos]
+"""
+
+import asyncio
+import multiprocessing
+import random
+import sys
+import time
+
+import httpx
+
+from _support import serve
+
+CONCURRENCY = 32
+WRITE_RATIO = 0.1
+
+
+async def drive(base_url: str, duration: float) -> dict:
+    latencies, errors = [], {}
+    stop_at = time.monotonic() + duration
+    rng = random.Random(7)
+
+    async def client_loop(client: httpx.AsyncClient):
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            if rng.random() < WRITE_RATIO:
+                response = await client.post("/pets", json={
+                    "name": "Bench", "species": "dog", "gender": "male", "age": 10, "city": "Recife"
+                })
+            else:
+                response = await client.get("/pets", params={"view": "card", "limit": 20})
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(CONCURRENCY)))
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / duration,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "errors": errors,
+    }
+
+
+def run(workers: int, duration: float) -> dict:
+    with serve(workers) as base_url:
+        return asyncio.run(drive(base_url, duration))
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else multiprocessing.cpu_count()
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}  erros")
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        result = run(workers, duration)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>8}{result['rps']:>10.1f}{result['p50']:>10.1f}{result['p99']:>10.1f}"
+              f"  {result['errors'] or '-'}  ({result['rps'] / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Performance budgets for Pet Adoption API
+
+Cada rota importante declara o próprio orçamento logo acima do handler em
+main.py, para que ele seja revisto junto com o código:
+
+    @app.get("/pets/{pet_id}")
+    @budget(queries=2, latency_ms=15, indexed=("pets",))
+
+- queries: máximo de comandos SQL por requisição (pega relacionamentos
+  lazy e N+1)
+- latency_ms: teto da mediana na máquina de referência; na verificação ele
+  é multiplicado pela razão entre a calibração local e
+  BUDGET_REFERENCE_CALIBRATION_MS
+- indexed: tabelas que as consultas da rota não podem varrer inteiras
+  (o EXPLAIN tem que mostrar um índice)
+
+O decorator só anota o handler; quem mede é tests/test_budgets.py (um
+teste por orçamento), contra um banco SQLite semeado. Os valores de exemplo
+dos parâmetros de caminho ({pet_id}, {user_id}...) vêm do banco semeado;
+rotas de escrita recebem dados novos a cada chamada.
+"""
+
+import re
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class Budget:
+    def __init__(self, queries: int, latency_ms: float, indexed: Sequence[str] = (),
+                 params: Optional[dict] = None, json: Optional[object] = None, name: Optional[str] = None):
+        self.queries = queries
+        self.latency_ms = latency_ms
+        self.indexed = tuple(indexed)
+        self.params = params or {}
+        self.json = json
+        self.name = name
+
+
+def budget(queries: int, latency_ms: float, indexed: Sequence[str] = (),
+           params: Optional[dict] = None, json: Optional[object] = None, name: Optional[str] = None):
+    """
+    Anotar o orçamento de uma rota; repetível para medir variações (ex: com e sem filtros)
+
+    params e json são a requisição de exemplo; name distingue as variações no relatório.
+    """
+    def decorate(endpoint):
+        endpoint.__dict__.setdefault("__budgets__", []).insert(0, Budget(queries, latency_ms, indexed, params, json, name))
+        return endpoint
+    return decorate
+
+
+def route_budgets(app) -> List[tuple]:
+    """(rota, Budget) de todas as rotas do app com orçamento, na ordem de main.py"""
+    return [
+        (route, declared)
+        for route in app.routes
+        for declared in getattr(getattr(route, "endpoint", None), "__budgets__", [])
+    ]
+
+
+_in_request: ContextVar[bool] = ContextVar("budget_in_request", default=False)
+
+
+def measured(app):
+    """
+    Envolver o app ASGI marcando as requisições HTTP para o QueryRecorder
+
+    O contextvar segue para os tasks e threads (to_thread) da requisição,
+    mas não para o trabalho de fundo (feed de eventos, limpeza, pets
+    parecidos), que roda no mesmo engine e não entra na conta.
+    """
+    async def app_in_request(scope, receive, send):
+        if scope["type"] != "http":
+            await app(scope, receive, send)
+            return
+        token = _in_request.set(True)
+        try:
+            await app(scope, receive, send)
+        finally:
+            _in_request.reset(token)
+    return app_in_request
+
+
+class QueryRecorder:
+    """Guardar os comandos SQL das requisições (ver `measured`) enquanto `recording` for verdadeiro"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.recording = False
+        self.statements: List[tuple] = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording and _in_request.get():
+            self.statements.append((statement, parameters))
+
+    def start(self) -> None:
+        self.statements = []
+        self.recording = True
+
+    def stop(self) -> List[tuple]:
+        self.recording = False
+        return self.statements
+
+
+# SQLite: "SCAN pets" sem índice; Postgres: "Seq Scan on pets"
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)(?! USING (?:COVERING )?INDEX| USING INTEGER PRIMARY KEY)")
+POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def full_scans(engine: Engine, statement: str, parameters) -> Dict[str, str]:
+    """Tabelas varridas sem índice pelo plano do comando -> linha do plano"""
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return {}
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        cursor = raw.cursor()
+        try:
+            if engine.dialect.name == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                lines = [row[-1] for row in cursor.fetchall()]
+                pattern = SQLITE_FULL_SCAN
+            else:
+                cursor.execute(f"EXPLAIN {statement}", parameters)
+                lines = [row[0] for row in cursor.fetchall()]
+                pattern = POSTGRES_FULL_SCAN
+        finally:
+            cursor.close()
+    scans = {}
+    for line in lines:
+        match = pattern.search(line.strip())
+        if match:
+            scans[match.group(1)] = line.strip()
+    return scans
+
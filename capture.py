@@ -0,0 +1,226 @@
+"""
+Traffic capture for Pet Adoption API
+
+Grava uma amostra das requisições (TRAFFIC_CAPTURE_SAMPLE_RATE) em
+arquivos JSONL em TRAFFIC_CAPTURE_DIR, para serem reproduzidas contra uma
+instância local com replay.py. Cada linha tem método, caminho, rota,
+query, alguns headers, o corpo (JSON ou formulário) e a resposta original:
+status, duração, tamanho, hash do corpo e, se for JSON pequeno, o próprio
+corpo, usado pelo replay para apontar diferenças.
+
+Nada de credenciais vai para o disco: senhas, tokens e afins (campos e
+parâmetros que casam com TRAFFIC_CAPTURE_SCRUB) viram "[scrubbed]",
+Authorization e Cookie não são gravados (só `authenticated`) e o IP do
+cliente também não. Uploads multipart não têm o corpo gravado.
+
+A gravação roda numa thread, fora do event loop; cada worker escreve nos
+próprios arquivos, trocando de arquivo a cada TRAFFIC_CAPTURE_FILE_BYTES e
+mantendo só os TRAFFIC_CAPTURE_MAX_FILES mais recentes.
+"""
+
+import hashlib
+import os
+import queue
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+
+from serialization import dumps
+from app_types.constants import (
+    TRAFFIC_CAPTURE_SAMPLE_RATE, TRAFFIC_CAPTURE_DIR, TRAFFIC_CAPTURE_FILE_BYTES, TRAFFIC_CAPTURE_MAX_FILES,
+    TRAFFIC_CAPTURE_MAX_BODY_BYTES, TRAFFIC_CAPTURE_QUEUE_SIZE, TRAFFIC_CAPTURE_EXCLUDE,
+    TRAFFIC_CAPTURE_HEADERS, TRAFFIC_CAPTURE_SCRUB
+)
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    import json
+    loads = json.loads
+
+SCRUBBED = "[scrubbed]"
+CAPTURE_NAME = re.compile(r"^capture-[\w-]+\.jsonl$")
+EXCLUDED = re.compile(TRAFFIC_CAPTURE_EXCLUDE)
+SENSITIVE = re.compile(TRAFFIC_CAPTURE_SCRUB, re.IGNORECASE)
+
+
+def enabled() -> bool:
+    return TRAFFIC_CAPTURE_SAMPLE_RATE > 0
+
+
+def scrub(value):
+    """Trocar os valores de campos sensíveis (em qualquer nível) por SCRUBBED"""
+    if isinstance(value, dict):
+        return {key: SCRUBBED if SENSITIVE.search(key) else scrub(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    return value
+
+
+def scrub_query(query_string: str) -> str:
+    pairs = parse_qsl(query_string, keep_blank_values=True)
+    return urlencode([(key, SCRUBBED if SENSITIVE.search(key) else value) for key, value in pairs])
+
+
+def request_body(content_type: str, body: bytes, too_large: bool) -> dict:
+    """Campos do registro para o corpo da requisição"""
+    if not body and not too_large:
+        return {}
+    if too_large:
+        return {"body_omitted": "too_large"}
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "application/json":
+        try:
+            return {"json": scrub(loads(body))}
+        except ValueError:
+            return {"body_omitted": "invalid_json"}
+    if media_type == "application/x-www-form-urlencoded":
+        return {"form": scrub(dict(parse_qsl(body.decode("latin-1"), keep_blank_values=True)))}
+    return {"body_omitted": media_type or "unknown"}
+
+
+class CaptureWriter:
+    """Thread que grava os registros em arquivos JSONL rotativos"""
+
+    def __init__(self, directory: str = TRAFFIC_CAPTURE_DIR, file_bytes: int = TRAFFIC_CAPTURE_FILE_BYTES,
+                 max_files: int = TRAFFIC_CAPTURE_MAX_FILES, queue_size: int = TRAFFIC_CAPTURE_QUEUE_SIZE):
+        self.directory = directory
+        self.file_bytes = file_bytes
+        self.max_files = max_files
+        self.queue_size = queue_size
+        self.written = 0
+        self.dropped = 0
+        self.reset()
+
+    def reset(self) -> None:
+        # A thread de gravação não sobrevive ao fork; cada worker abre os próprios arquivos
+        self._queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def put(self, entry: dict) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        file = open(os.path.join(self.directory, f"capture-{stamp}-{os.getpid()}.jsonl"), "ab")
+        names = sorted(name for name in os.listdir(self.directory) if CAPTURE_NAME.match(name))
+        for old in names[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass  # outro worker apagou antes
+        return file
+
+    def _run(self) -> None:
+        file, size = None, 0
+        while True:
+            entry = self._queue.get()
+            try:
+                if file is None or size >= self.file_bytes:
+                    if file is not None:
+                        file.close()
+                    file, size = self._open(), 0
+                line = dumps(entry) + b"\n"
+                file.write(line)
+                size += len(line)
+                self.written += 1
+                if self._queue.empty():
+                    file.flush()
+            except Exception as e:
+                print(f"❌ Erro na captura de tráfego: {e}")
+
+
+writer = CaptureWriter()
+os.register_at_fork(after_in_child=writer.reset)
+
+
+class CaptureMiddleware:
+    """
+    Gravar uma amostra das requisições e das respostas para replay.py
+    """
+
+    def __init__(self, app, sample_rate: float = TRAFFIC_CAPTURE_SAMPLE_RATE,
+                 max_body_bytes: int = TRAFFIC_CAPTURE_MAX_BODY_BYTES):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or EXCLUDED.match(scope["path"]) or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        started_at = time.time()
+        started = time.perf_counter()
+        request_chunks, request_size = [], 0
+        response = {"status": 500, "content_type": ""}
+        response_chunks, response_size = [], 0
+        response_hash = hashlib.sha1()
+
+        async def capturing_receive():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                request_size += len(body)
+                if request_size <= self.max_body_bytes:
+                    request_chunks.append(body)
+            return message
+
+        async def capturing_send(message):
+            nonlocal response_size
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = Headers(raw=message.get("headers", [])).get("content-type", "")
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                response_hash.update(body)
+                response_size += len(body)
+                if response_size <= self.max_body_bytes:
+                    response_chunks.append(body)
+            await send(message)
+
+        try:
+            await self.app(scope, capturing_receive, capturing_send)
+        finally:
+            route = scope.get("route")
+            entry = {
+                "at": datetime.utcfromtimestamp(started_at),
+                "t": started_at,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "query": scrub_query(scope["query_string"].decode("latin-1")),
+                "headers": {name: headers[name] for name in TRAFFIC_CAPTURE_HEADERS if name in headers},
+                "authenticated": "authorization" in headers or "cookie" in headers,
+                **request_body(headers.get("content-type", ""), b"".join(request_chunks),
+                               request_size > self.max_body_bytes),
+                "status": response["status"],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "response_bytes": response_size,
+                "response_sha1": response_hash.hexdigest(),
+            }
+            if response["content_type"].startswith("application/json") and response_size <= self.max_body_bytes:
+                try:
+                    entry["response_json"] = scrub(loads(b"".join(response_chunks)))
+                except ValueError:
+                    pass
+            writer.put(entry)
@@ -0,0 +1,340 @@
+"""
+In-memory pet catalog for Pet Adoption API
+
+Snapshot colunar (NumPy) das colunas filtráveis de pets: species, gender,
+status, age e city, com enums e cidades codificados como inteiros. O
+GET /pets sem busca por raio responde filtro + paginação com máscaras
+vetorizadas e só busca no banco, por id, as linhas da página final.
+
+É opt-in (PET_CATALOG=memory) e exige numpy. Os endpoints que escrevem em
+pets chamam refresh_pets() após o commit, então o próprio processo vê as
+mudanças na hora. Com vários workers, escritas feitas em outro processo
+aparecem quando o snapshot é recarregado em segundo plano, a cada
+PET_CATALOG_MAX_AGE_SECONDS.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Pet
+from app_types import GenderEnum, SpeciesEnum, StatusEnum
+from app_types.constants import PET_CATALOG, PET_CATALOG_MAX_AGE_SECONDS, CATALOG_CHUNK_SIZE, AGE_FACET_BOUNDS
+
+try:
+    import numpy as np
+    NUMPY_INSTALLED = True
+except ImportError:
+    NUMPY_INSTALLED = False
+    np = None
+
+CATALOG_ENABLED = PET_CATALOG == "memory" and NUMPY_INSTALLED
+
+# Códigos por nome do membro, que é o que o Enum do SQLAlchemy grava no banco
+SPECIES_CODES = {member.name: code for code, member in enumerate(SpeciesEnum)}
+GENDER_CODES = {member.name: code for code, member in enumerate(GenderEnum)}
+STATUS_CODES = {member.name: code for code, member in enumerate(StatusEnum)}
+MISSING = -1
+
+# Enums lidos como texto cru: converter milhares de linhas em membros de Enum
+# custa mais que a consulta inteira
+CATALOG_COLUMNS = (
+    Pet.id,
+    type_coerce(Pet.species, String),
+    type_coerce(Pet.gender, String),
+    type_coerce(Pet.status, String),
+    Pet.age,
+    Pet.city,
+)
+
+
+def like_matcher(text: str):
+    """
+    Equivalente em Python de `ILIKE '%text%'`
+
+    `%` e `_` do texto continuam curingas, como no SQL.
+    """
+    parts = (".*" if char == "%" else "." if char == "_" else re.escape(char) for char in text)
+    pattern = re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+    return lambda value: pattern.search(value) is not None
+
+
+class CatalogSnapshot:
+    """Arrays paralelos ordenados por id, com capacidade extra para inserções"""
+
+    def __init__(self, rows: List[tuple]):
+        size = len(rows)
+        capacity = max(1024, size * 2)
+        self.size = size
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.species = np.full(capacity, MISSING, dtype=np.int8)
+        self.gender = np.full(capacity, MISSING, dtype=np.int8)
+        self.status = np.full(capacity, MISSING, dtype=np.int8)
+        self.age = np.full(capacity, np.nan, dtype=np.float64)
+        self.city = np.full(capacity, MISSING, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.cities: List[str] = []
+        self.city_codes = {}
+
+        if size:
+            ids, species, gender, status, age, city = zip(*rows)
+            self.ids[:size] = ids
+            self.species[:size] = [SPECIES_CODES.get(value, MISSING) for value in species]
+            self.gender[:size] = [GENDER_CODES.get(value, MISSING) for value in gender]
+            self.status[:size] = [STATUS_CODES.get(value, MISSING) for value in status]
+            self.age[:size] = [np.nan if value is None else value for value in age]
+            self.city[:size] = [self._city_code(value) for value in city]
+            self.alive[:size] = True
+
+    def _city_code(self, city: Optional[str]) -> int:
+        if city is None:
+            return MISSING
+        code = self.city_codes.get(city)
+        if code is None:
+            code = self.city_codes[city] = len(self.cities)
+            self.cities.append(city)
+        return code
+
+    def _grow(self) -> None:
+        for name in ("ids", "species", "gender", "status", "age", "city", "alive"):
+            array = getattr(self, name)
+            grown = np.empty(len(array) * 2, dtype=array.dtype)
+            grown[:len(array)] = array
+            grown[len(array):] = np.nan if name == "age" else (False if name == "alive" else MISSING)
+            setattr(self, name, grown)
+
+    def _position(self, pet_id: int) -> int:
+        """Posição do id, inserindo uma vaga se ele ainda não existe"""
+        position = int(np.searchsorted(self.ids[:self.size], pet_id))
+        if position < self.size and self.ids[position] == pet_id:
+            return position
+        if self.size == len(self.ids):
+            self._grow()
+        if position < self.size:
+            # Id menor que o maior já carregado (raro): abrir espaço no meio
+            for name in ("ids", "species", "gender", "status", "age", "city", "alive"):
+                array = getattr(self, name)
+                array[position + 1:self.size + 1] = array[position:self.size]
+        self.ids[position] = pet_id
+        self.size += 1
+        return position
+
+    def upsert(self, row: tuple) -> None:
+        pet_id, species, gender, status, age, city = row
+        position = self._position(pet_id)
+        self.species[position] = SPECIES_CODES.get(species, MISSING)
+        self.gender[position] = GENDER_CODES.get(gender, MISSING)
+        self.status[position] = STATUS_CODES.get(status, MISSING)
+        self.age[position] = np.nan if age is None else age
+        self.city[position] = self._city_code(city)
+        self.alive[position] = True
+
+    def remove(self, pet_id: int) -> None:
+        position = int(np.searchsorted(self.ids[:self.size], pet_id))
+        if position < self.size and self.ids[position] == pet_id:
+            self.alive[position] = False
+
+    def _filters(self, species, gender, city, status, min_age, max_age) -> tuple:
+        """Filtros convertidos para códigos; a cidade vira uma tabela de cidades aceitas"""
+        city_lookup = None
+        if city:
+            # O filtro roda no dicionário de cidades (poucas), não nos pets;
+            # a última posição (índice -1) é a das cidades nulas
+            matches = like_matcher(city)
+            city_lookup = np.zeros(len(self.cities) + 1, dtype=bool)
+            city_lookup[[code for code, name in enumerate(self.cities) if matches(name)]] = True
+        return (
+            SPECIES_CODES[species.name] if species else None,
+            GENDER_CODES[gender.name] if gender else None,
+            STATUS_CODES[status.name] if status else None,
+            min_age, max_age, city_lookup,
+        )
+
+    def _mask(self, start, end, species, gender, status, min_age, max_age, city_lookup):
+        mask = self.alive[start:end].copy()
+        if species is not None:
+            mask &= self.species[start:end] == species
+        if gender is not None:
+            mask &= self.gender[start:end] == gender
+        if status is not None:
+            mask &= self.status[start:end] == status
+        if min_age is not None:
+            mask &= self.age[start:end] >= min_age
+        if max_age is not None:
+            mask &= self.age[start:end] <= max_age
+        if city_lookup is not None:
+            mask &= city_lookup[self.city[start:end]]
+        return mask
+
+    def search(
+        self,
+        species: Optional[SpeciesEnum] = None,
+        gender: Optional[GenderEnum] = None,
+        city: Optional[str] = None,
+        status: Optional[StatusEnum] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[int]:
+        """
+        Ids da página pedida, na mesma ordem (por id) do caminho SQL
+
+        As máscaras são calculadas em blocos de CATALOG_CHUNK_SIZE pets e a
+        busca para assim que a página está completa, como o LIMIT do SQL.
+        """
+        filters = self._filters(species, gender, city, status, min_age, max_age)
+        wanted = skip + limit
+        found = []
+        found_count = 0
+        for start in range(0, self.size, CATALOG_CHUNK_SIZE):
+            end = min(start + CATALOG_CHUNK_SIZE, self.size)
+            positions = np.flatnonzero(self._mask(start, end, *filters))
+            found.append(positions[:wanted - found_count] + start)
+            found_count += len(found[-1])
+            if found_count >= wanted:
+                break
+
+        positions = np.concatenate(found)[skip:] if found else []
+        return self.ids[positions].tolist()
+
+    def facet_rows(
+        self,
+        species: Optional[SpeciesEnum] = None,
+        gender: Optional[GenderEnum] = None,
+        city: Optional[str] = None,
+        status: Optional[StatusEnum] = None,
+        min_age: Optional[float] = None,
+        max_age: Optional[float] = None,
+    ) -> List[tuple]:
+        """
+        Mesmas linhas do GROUP BY de facets.select_facet_rows, numa passada só
+
+        Cada pet vira um inteiro que combina (espécie, gênero, status,
+        cidade, faixa de idade) e np.bincount conta as combinações.
+        """
+        mask = self._mask(0, self.size, *self._filters(species, gender, city, status, min_age, max_age))
+        age = self.age[:self.size][mask]
+        bucket = np.digitize(age, AGE_FACET_BOUNDS)
+        bucket[np.isnan(age)] = MISSING
+        # +1 em cada coluna para os códigos MISSING (-1) virarem 0
+        columns = (
+            (self.species[:self.size][mask], len(SPECIES_CODES) + 1),
+            (self.gender[:self.size][mask], len(GENDER_CODES) + 1),
+            (self.status[:self.size][mask], len(STATUS_CODES) + 1),
+            (self.city[:self.size][mask], len(self.cities) + 1),
+            (bucket, len(AGE_FACET_BOUNDS) + 2),
+        )
+        keys = np.zeros(len(age), dtype=np.int64)
+        for values, size in columns:
+            keys = keys * size + values.astype(np.int64) + 1
+        counts = np.bincount(keys)
+        combinations = np.flatnonzero(counts)
+
+        species_names, gender_names, status_names = ([None, *codes] for codes in (SPECIES_CODES, GENDER_CODES, STATUS_CODES))
+        city_names = [None, *self.cities]
+        rows = []
+        for key, count in zip(combinations.tolist(), counts[combinations].tolist()):
+            key, b = divmod(key, len(AGE_FACET_BOUNDS) + 2)
+            key, c = divmod(key, len(self.cities) + 1)
+            key, st = divmod(key, len(STATUS_CODES) + 1)
+            s, g = divmod(key, len(GENDER_CODES) + 1)
+            rows.append((species_names[s], gender_names[g], status_names[st], city_names[c], None if b == 0 else b - 1, count))
+        return rows
+
+
+class PetCatalog:
+    """Snapshot carregado sob demanda e recarregado em segundo plano quando envelhece"""
+
+    def __init__(self, max_age_seconds: float = PET_CATALOG_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = 0.0
+        self._reloading = False
+        self._dirty = set()
+
+    @staticmethod
+    def _load(db: Session) -> CatalogSnapshot:
+        rows = db.execute(select(*CATALOG_COLUMNS).order_by(Pet.id)).all()
+        return CatalogSnapshot(rows)
+
+    def _reload_in_background(self) -> None:
+        db = SessionLocal()
+        try:
+            snapshot = self._load(db)
+            with self._lock:
+                self._snapshot, self._loaded_at = snapshot, time.monotonic()
+                dirty, self._dirty = self._dirty, set()
+                self._reloading = False
+            # Pets escritos durante a carga podem ter ficado com a versão antiga
+            if dirty:
+                self.refresh(db, dirty)
+        except Exception as e:
+            print(f"❌ Erro ao recarregar catálogo de pets: {e}")
+        finally:
+            db.close()
+            self._reloading = False
+
+    def snapshot(self, db: Session) -> CatalogSnapshot:
+        if self._snapshot is None:
+            snapshot = self._load(db)
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot, self._loaded_at = snapshot, time.monotonic()
+        elif time.monotonic() - self._loaded_at > self.max_age_seconds and not self._reloading:
+            self._reloading = True
+            threading.Thread(target=self._reload_in_background, daemon=True).start()
+        return self._snapshot
+
+    def search(self, db: Session, **filters) -> List[int]:
+        snapshot = self.snapshot(db)
+        with self._lock:
+            return snapshot.search(**filters)
+
+    def facet_rows(self, db: Session, **filters) -> List[tuple]:
+        snapshot = self.snapshot(db)
+        with self._lock:
+            return snapshot.facet_rows(**filters)
+
+    def refresh(self, db: Session, pet_ids: Iterable[int]) -> None:
+        """Reler do banco os pets alterados; ids que não existem mais saem do snapshot"""
+        if self._snapshot is None:
+            return
+        pet_ids = set(pet_ids)
+        if self._reloading:
+            with self._lock:
+                self._dirty |= pet_ids
+        rows = db.execute(select(*CATALOG_COLUMNS).where(Pet.id.in_(pet_ids))).all()
+        with self._lock:
+            snapshot = self._snapshot
+            for row in rows:
+                snapshot.upsert(tuple(row))
+            for pet_id in pet_ids - {row.id for row in rows}:
+                snapshot.remove(pet_id)
+
+    def reset(self) -> None:
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._reloading = False
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+
+catalog = PetCatalog()
+
+
+def refresh_pets(db: Session, pet_ids: Iterable[int]) -> None:
+    """Chamado pelos endpoints de escrita após o commit; não faz nada se o catálogo está desligado"""
+    if CATALOG_ENABLED:
+        catalog.refresh(db, pet_ids)
+
+
+# Cada worker carrega o próprio snapshot depois do fork
+os.register_at_fork(after_in_child=catalog.reset)
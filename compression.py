@@ -0,0 +1,235 @@
+"""
+Response compression for Pet Adoption API
+
+Middleware ASGI que negocia gzip, Brotli ou zstd pelo Accept-Encoding.
+Respostas pequenas, já comprimidas (Content-Encoding presente) ou de tipos
+binários como as imagens de /uploads passam sem alteração. Respostas em
+streaming são comprimidas pedaço a pedaço, com flush a cada chunk.
+"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app_types.constants import (
+    COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY, COMPRESSION_ZSTD_LEVEL
+)
+
+try:
+    import brotli
+    BROTLI_INSTALLED = True
+except ImportError:
+    BROTLI_INSTALLED = False
+    brotli = None
+
+try:
+    import zstandard
+    ZSTD_INSTALLED = True
+except ImportError:
+    ZSTD_INSTALLED = False
+    zstandard = None
+
+# Tipos que já vêm comprimidos ou não ganham nada com compressão
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+INCOMPRESSIBLE_TYPES = {
+    "application/zip", "application/gzip", "application/x-gzip",
+    "application/zstd", "application/x-brotli", "application/pdf",
+    "application/octet-stream",
+}
+
+
+def available_encodings() -> list:
+    """Codificações suportadas, na ordem de preferência do servidor"""
+    encodings = []
+    if BROTLI_INSTALLED:
+        encodings.append("br")
+    if ZSTD_INSTALLED:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, supported: Optional[list] = None) -> Optional[str]:
+    """
+    Escolher a codificação pelo Accept-Encoding (respeitando q-values)
+
+    Entre codificações com o mesmo q, vale a ordem de preferência do servidor.
+    """
+    supported = supported if supported is not None else available_encodings()
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if not media_type:
+        return False
+    if media_type in INCOMPRESSIBLE_TYPES:
+        return False
+    return not media_type.startswith(INCOMPRESSIBLE_PREFIXES)
+
+
+class _Compressor:
+    """Interface única sobre gzip, Brotli e zstd em modo incremental"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int, zstd_level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=brotli_quality)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+        else:
+            # wbits 16+MAX_WBITS gera o cabeçalho gzip
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Emitir o que estiver em buffer sem encerrar o stream"""
+        if self.encoding == "br":
+            return self._obj.flush()
+        if self.encoding == "zstd":
+            return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress_bytes(data: bytes, encoding: str, gzip_level: int = COMPRESSION_GZIP_LEVEL,
+                   brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+                   zstd_level: int = COMPRESSION_ZSTD_LEVEL) -> bytes:
+    """Comprimir um corpo completo"""
+    compressor = _Compressor(encoding, gzip_level, brotli_quality, zstd_level)
+    return compressor.compress(data) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Comprimir respostas conforme o Accept-Encoding do cliente
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        zstd_level: int = COMPRESSION_ZSTD_LEVEL,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Segurar o start até ver o primeiro pedaço do corpo
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+            )
+            return
+
+        if message_type != "http.response.body":
+            # Extensões como http.response.pathsend seguem direto
+            if self.start_message is not None:
+                await self._send(self.start_message)
+                self.start_message = None
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and not self.passthrough:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+            else:
+                self.compressor = _Compressor(
+                    self.encoding, self.middleware.gzip_level,
+                    self.middleware.brotli_quality, self.middleware.zstd_level
+                )
+                headers = MutableHeaders(raw=list(self.start_message["headers"]))
+                self.start_message["headers"] = headers.raw
+                headers["Content-Encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = self.compressor.compress(body) + self.compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await self._send(self.start_message)
+                    self.start_message = None
+                    await self._send({"type": "http.response.body", "body": body})
+                    return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self._send(self.start_message)
+                self.start_message = None
+            await self._send(message)
+            return
+
+        if self.start_message is not None:
+            await self._send(self.start_message)
+            self.start_message = None
+
+        chunk = self.compressor.compress(body)
+        chunk += self.compressor.flush() if more_body else self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
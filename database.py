@@ -1,13 +1,71 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker
 import os
 
-from app_types.constants import DATABASE_URL
+from app_types.constants import DATABASE_URL, SQLITE_BUSY_TIMEOUT_MS, SQLITE_PROGRESS_OPS, DB_POOL_SIZE, DB_MAX_OVERFLOW
 from auth import get_password_hash
+import deadlines
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and ":memory:" in DATABASE_URL
+
+# Os handlers são async e usam a sessão no thread do event loop: se o pool
+# esgotar, o checkout bloqueia o loop e as sessões que devolveriam conexões
+# não conseguem fechar. O pool precisa cobrir as requisições em andamento.
+pool_options = {} if IS_SQLITE_MEMORY else {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000} if IS_SQLITE else {},
+    **pool_options
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """
+        WAL permite leitores concorrentes com um escritor entre processos;
+        busy_timeout faz escritores esperarem o lock em vez de falhar com
+        "database is locked".
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        if not IS_SQLITE_MEMORY:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+        # Interromper a consulta quando o prazo da requisição acaba (deadlines.py)
+        dbapi_connection.set_progress_handler(deadlines.sqlite_progress_handler, SQLITE_PROGRESS_OPS)
+else:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _apply_statement_timeout(conn, cursor, statement, parameters, context, executemany):
+        """
+        Timeout das consultas = o que resta do prazo da requisição, uma vez
+        por transação (SET LOCAL vale até o commit/rollback)
+        """
+        deadline = deadlines.current()
+        if deadline is None or conn.info.get("deadline") is deadline:
+            return
+        deadlines.check()
+        remaining = deadline.remaining()
+        if remaining is not None:
+            cursor.execute(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
+        conn.info["deadline"] = deadline
+
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def _clear_statement_timeout(conn):
+        conn.info.pop("deadline", None)
+
+
+def _reset_after_fork():
+    # Conexões herdadas do processo pai não podem ser usadas pelo worker
+    engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -15,14 +73,55 @@ def get_db():
     finally:
         db.close()
 
+def run_migrations():
+    """
+    Atualizar bancos existentes para o schema atual
+    
+    create_all só cria tabelas novas; aqui são adicionadas colunas e
+    índices que surgiram depois em tabelas que já existem.
+    """
+    from models import Base
+    
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+            
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
 def init_db():
     from models import Base, Pet, User
+    import geo
+    import photos
+    import similarity
     from app_types import GenderEnum, SpeciesEnum, StatusEnum
     
     Base.metadata.create_all(bind=engine)
+    run_migrations()
     
     db = SessionLocal()
     try:
+        # Coordenadas de pets cadastrados antes da busca por raio
+        geo.backfill_pet_locations(db)
+        # Fotos da antiga coluna JSON pets.photos para pet_photos
+        photos.backfill_pet_photos(db)
+        # Pets parecidos de bancos anteriores ao índice
+        similarity.build_if_empty(db)
+        
         # Verificar se já existem dados (pets ou usuários)
         if db.query(Pet).count() > 0 and db.query(User).count() > 0:
             return
@@ -127,6 +226,7 @@ def init_db():
             db.add(pet)
         
         db.commit()
+        similarity.build_if_empty(db)
         print("✅ Dados criados com sucesso!")
         
     except Exception as e:
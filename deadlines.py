@@ -0,0 +1,204 @@
+"""
+Request deadlines for Pet Adoption API
+
+Cada requisição HTTP ganha um prazo (REQUEST_DEADLINES por caminho, ou
+REQUEST_DEADLINE_SECONDS), guardado num contextvar e levado até o banco:
+
+- SQLite: um progress handler em cada conexão interrompe a consulta
+  quando o prazo da requisição que a executa acaba
+- Postgres: cada transação recebe SET LOCAL statement_timeout com o
+  tempo que ainda resta
+
+Se o cliente desconecta, o prazo acaba na hora, então a consulta em
+andamento também é interrompida. Estourado o prazo, a resposta é 504;
+com o cliente desconectado não há resposta. As contagens ficam em
+GET /debug/deadlines.
+"""
+
+import asyncio
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from app_types.constants import REQUEST_DEADLINE_SECONDS, REQUEST_DEADLINES
+
+ROUTE_DEADLINES = tuple((pattern, re.compile(pattern), seconds) for pattern, seconds in REQUEST_DEADLINES.items())
+
+
+class DeadlineExceeded(Exception):
+    """O prazo da requisição acabou (ou o cliente desconectou)"""
+
+
+class Deadline:
+    def __init__(self, seconds: Optional[float]):
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self.disconnected = False
+
+    def remaining(self) -> Optional[float]:
+        if self.disconnected:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.disconnected or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def check() -> None:
+    """Levantar DeadlineExceeded se o prazo da requisição atual acabou"""
+    deadline = _current.get()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded()
+
+
+def sqlite_progress_handler() -> int:
+    """Chamado pelo SQLite a cada SQLITE_PROGRESS_OPS instruções; != 0 interrompe a consulta"""
+    deadline = _current.get()
+    return 1 if deadline is not None and deadline.expired() else 0
+
+
+def route_deadline(path: str) -> tuple:
+    """(padrão, segundos) do primeiro REQUEST_DEADLINES que casa com o caminho"""
+    for pattern, regex, seconds in ROUTE_DEADLINES:
+        if regex.match(path):
+            return pattern, seconds
+    return "default", REQUEST_DEADLINE_SECONDS
+
+
+class _DisconnectWatcher:
+    """
+    Ler o receive do servidor num task próprio para notar o http.disconnect
+    enquanto o handler ainda trabalha; o app lê as mensagens por `receive`
+    """
+
+    def __init__(self, receive, on_disconnect):
+        self._receive = receive
+        self._on_disconnect = on_disconnect
+        self._messages = asyncio.Queue(maxsize=1)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            message = await self._receive()
+            if message["type"] == "http.disconnect":
+                self._on_disconnect()
+                await self._messages.put(message)
+                return
+            await self._messages.put(message)
+
+    async def receive(self):
+        message = await self._messages.get()
+        if message["type"] == "http.disconnect":
+            # Quem chamar de novo (ex: StreamingResponse) também vê o disconnect
+            self._messages.put_nowait(message)
+        return message
+
+    def stop(self):
+        self._task.cancel()
+
+
+class DeadlineMiddleware:
+    """
+    Aplicar o prazo da rota a cada requisição
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.timed_out = Counter()
+        self.disconnected = Counter()
+        stats.middleware = self
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        pattern, seconds = route_deadline(scope["path"])
+        deadline = Deadline(seconds)
+        token = _current.set(deadline)
+        response_started = False
+        response_complete = False
+
+        async def tracked_send(message):
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        cancelled = False
+
+        def cancel():
+            # Sem asyncio.timeout (só no 3.11+): cancelar o task da requisição, uma vez
+            nonlocal cancelled
+            if not cancelled and not response_complete:
+                cancelled = True
+                task.cancel()
+
+        def on_disconnect():
+            # Depois da resposta completa o servidor também manda http.disconnect
+            if not response_complete:
+                deadline.disconnected = True
+                cancel()
+
+        timer = None if seconds is None else loop.call_later(seconds, cancel)
+        watcher = _DisconnectWatcher(receive, on_disconnect)
+        try:
+            await self.app(scope, watcher.receive, tracked_send)
+        except (Exception, asyncio.CancelledError) as error:
+            if isinstance(error, asyncio.CancelledError):
+                if not cancelled:
+                    raise  # cancelamento de fora (ex: shutdown), não do prazo
+                if hasattr(task, "uncancel"):
+                    task.uncancel()
+                error = asyncio.TimeoutError()
+            elif not (cancelled or deadline.expired()):
+                raise
+            if deadline.disconnected:
+                # Streams sem prazo (ex: /events) sempre terminam com o cliente desconectando
+                if seconds is not None:
+                    self.disconnected[pattern] += 1
+                return
+            self.timed_out[pattern] += 1
+            if response_started:
+                raise error
+            response = JSONResponse({"detail": "Tempo limite da requisição excedido"}, status_code=504)
+            await response(scope, receive, send)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            watcher.stop()
+            _current.reset(token)
+
+
+class _Stats:
+    """Estado do middleware registrado no app, para /debug/deadlines"""
+
+    middleware: Optional[DeadlineMiddleware] = None
+
+    def snapshot(self) -> dict:
+        middleware = self.middleware
+        return {
+            "default_seconds": REQUEST_DEADLINE_SECONDS,
+            "routes": REQUEST_DEADLINES,
+            "timed_out": dict(middleware.timed_out) if middleware else {},
+            "client_disconnected": dict(middleware.disconnected) if middleware else {},
+        }
+
+
+stats = _Stats()
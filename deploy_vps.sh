@@ -46,7 +46,7 @@ Type=exec
 User=$USER
 WorkingDirectory=/var/www/pet-api
 Environment=PATH=/var/www/pet-api/venv/bin
-ExecStart=/var/www/pet-api/venv/bin/uvicorn main:app --host 0.0.0.0 --port 8000
+ExecStart=/var/www/pet-api/venv/bin/gunicorn -c gunicorn.conf.py main:app
 Restart=always
 
 [Install]
@@ -60,6 +60,15 @@ server {
     listen 80;
     server_name _;
 
+    location /events/ws {
+        proxy_pass http://127.0.0.1:8000;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade \$http_upgrade;
+        proxy_set_header Connection "upgrade";
+        proxy_set_header Host \$host;
+        proxy_set_header X-Forwarded-For \$proxy_add_x_forwarded_for;
+    }
+
     location / {
         proxy_pass http://127.0.0.1:8000;
         proxy_set_header Host \$host;
@@ -0,0 +1,339 @@
+"""
+Change feed for Pet Adoption API
+
+Os endpoints que mudam pets e pedidos de adoção gravam um evento compacto
+em change_events na mesma transação da mudança (record / record_many, sem
+commit). Cada worker lê os eventos novos a cada
+CHANGE_FEED_POLL_INTERVAL_SECONDS, ou logo após um commit local
+(feed.notify()), e os distribui aos clientes de GET /events (SSE) e
+/events/ws (WebSocket).
+
+A distribuição não tem fila por cliente: os eventos recentes ficam num
+único buffer circular (CHANGE_FEED_BUFFER_SIZE) e cada cliente guarda só
+o id do último evento que recebeu, esperando numa future compartilhada.
+Milhares de clientes parados custam uma corrotina cada. Quem fica para
+trás do buffer (ou retoma com um Last-Event-ID antigo) lê do banco; se o
+evento já foi apagado pela retenção (CHANGE_EVENTS_RETENTION_HOURS), o
+cliente recebe um evento `reset` e deve recarregar as listas.
+
+Os ids vêm da tabela: no SQLite as escritas são serializadas, então a
+ordem dos ids é a ordem dos commits.
+"""
+
+import asyncio
+import bisect
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, List, Optional, Union
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketDisconnect
+
+from database import SessionLocal
+from models import ChangeEvent
+from serialization import dumps
+from app_types.constants import (
+    CHANGE_FEED_BUFFER_SIZE, CHANGE_FEED_POLL_INTERVAL_SECONDS, CHANGE_FEED_HEARTBEAT_SECONDS,
+    CHANGE_FEED_MAX_SUBSCRIBERS, CHANGE_FEED_REPLAY_BATCH_SIZE,
+    CHANGE_EVENTS_RETENTION_HOURS, CHANGE_EVENTS_PRUNE_INTERVAL_SECONDS
+)
+
+EVENT_FIELDS = ("id", "type", "pet_id", "adoption_request_id", "user_id", "status", "created_at")
+
+# Marcadores de follow() além dos eventos
+HEARTBEAT = "heartbeat"
+RESET = "reset"
+
+
+def _status_value(status) -> Optional[str]:
+    return getattr(status, "value", status)
+
+
+def record(
+    db: Session,
+    type: str,
+    pet_id: Optional[int] = None,
+    adoption_request_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    status=None,
+) -> None:
+    """Gravar um evento na transação do endpoint (sem commit), na ordem das chamadas"""
+    db.execute(insert(ChangeEvent).values(
+        type=type, pet_id=pet_id, adoption_request_id=adoption_request_id,
+        user_id=user_id, status=_status_value(status),
+    ))
+
+
+def record_many(db: Session, type: str, rows: Iterable[dict], status=None) -> None:
+    """Vários eventos do mesmo tipo num único INSERT (rows com pet_id, adoption_request_id, user_id)"""
+    values = [{"type": type, "status": _status_value(status), **row} for row in rows]
+    if values:
+        db.execute(insert(ChangeEvent), values)
+
+
+def select_events_after(db: Session, after_id: int, limit: int = CHANGE_FEED_REPLAY_BATCH_SIZE) -> List[dict]:
+    rows = db.execute(
+        select(*(ChangeEvent.__table__.c[field] for field in EVENT_FIELDS))
+        .where(ChangeEvent.id > after_id)
+        .order_by(ChangeEvent.id)
+        .limit(limit)
+    )
+    return [dict(zip(EVENT_FIELDS, row)) for row in rows]
+
+
+def prune(db: Session, hours: int = CHANGE_EVENTS_RETENTION_HOURS) -> int:
+    """
+    Apagar eventos mais antigos que a retenção, menos o último
+
+    Sem AUTOINCREMENT o SQLite dá ao próximo evento max(id) + 1: com a
+    tabela vazia os ids recomeçariam em 1 e os clientes esperariam, sem
+    receber nada, até eles passarem do Last-Event-ID que já têm.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    deleted = db.execute(
+        delete(ChangeEvent)
+        .where(ChangeEvent.created_at < cutoff, ChangeEvent.id < select(func.max(ChangeEvent.id)).scalar_subquery())
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def _replay(after_id: int) -> tuple:
+    """(eventos depois de after_id, se after_id ainda está no banco)"""
+    def query(db: Session):
+        present = after_id == 0 or db.execute(
+            select(ChangeEvent.id).where(ChangeEvent.id == after_id)
+        ).first() is not None
+        return select_events_after(db, after_id), present
+    return _with_session(query)
+
+
+def _last_id(db: Session) -> int:
+    return db.execute(select(func.max(ChangeEvent.id))).scalar() or 0
+
+
+class FeedUnavailable(Exception):
+    """Feed parado ou com CHANGE_FEED_MAX_SUBSCRIBERS clientes neste worker"""
+
+
+class ChangeFeed:
+    """
+    Leitura periódica de change_events e distribuição aos clientes do worker
+    """
+
+    def __init__(self, buffer_size: int = CHANGE_FEED_BUFFER_SIZE,
+                 poll_interval: float = CHANGE_FEED_POLL_INTERVAL_SECONDS,
+                 max_subscribers: int = CHANGE_FEED_MAX_SUBSCRIBERS):
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers
+        self.subscribers = 0
+        self.last_id = 0
+        # Todos os eventos com id > _floor estão no buffer, em ordem de id
+        self._floor = 0
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._ids: deque = deque(maxlen=buffer_size)
+        self._changed: Optional[asyncio.Future] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Ler os eventos logo após um commit local, sem esperar o intervalo"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _append(self, events: List[dict]) -> None:
+        for event in events:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._floor = self._ids[0]
+            self._buffer.append(event)
+            self._ids.append(event["id"])
+        self.last_id = events[-1]["id"]
+        changed, self._changed = self._changed, asyncio.get_running_loop().create_future()
+        changed.set_result(None)
+
+    async def poll(self) -> int:
+        events = await asyncio.to_thread(_with_session, select_events_after, self.last_id)
+        if events:
+            self._append(events)
+        return len(events)
+
+    async def run_forever(self) -> None:
+        self.last_id = self._floor = await asyncio.to_thread(_with_session, _last_id)
+        self._ready.set()
+        next_prune = 0.0
+        while True:
+            try:
+                if await self.poll() == CHANGE_FEED_REPLAY_BATCH_SIZE:
+                    continue
+                loop_time = asyncio.get_running_loop().time()
+                if loop_time >= next_prune:
+                    next_prune = loop_time + CHANGE_EVENTS_PRUNE_INTERVAL_SECONDS
+                    await asyncio.to_thread(_with_session, prune)
+            except Exception as e:
+                print(f"❌ Erro no feed de eventos: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._ready = asyncio.Event()
+        self._changed = loop.create_future()
+        self._task = loop.create_task(self.run_forever())
+
+    async def wait_ready(self) -> None:
+        """Esperar a leitura do último id no startup"""
+        await self._ready.wait()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def has_room(self) -> bool:
+        return self._task is not None and self.subscribers < self.max_subscribers
+
+    @contextmanager
+    def subscription(self):
+        if not self.has_room():
+            raise FeedUnavailable()
+        self.subscribers += 1
+        try:
+            yield
+        finally:
+            self.subscribers -= 1
+
+    async def events_after(self, cursor: int, timeout: float) -> Union[List[dict], str]:
+        """Eventos com id > cursor; HEARTBEAT se nada chegou em `timeout`, RESET se o cursor expirou"""
+        if cursor < self._floor:
+            # Atrás do buffer: ler do banco
+            events, present = await asyncio.to_thread(_replay, cursor)
+            if not present:
+                return RESET
+            if events:
+                return events
+            # Nada no banco entre o cursor e o buffer: o buffer tem o resto
+        if cursor < self.last_id:
+            start = bisect.bisect_right(self._ids, cursor)
+            return [self._buffer[index] for index in range(start, len(self._buffer))]
+        done, _ = await asyncio.wait({self._changed}, timeout=timeout)
+        if not done:
+            return HEARTBEAT
+        return await self.events_after(cursor, timeout)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self.subscribers,
+            "max_subscribers": self.max_subscribers,
+            "last_id": self.last_id,
+            "buffered": len(self._buffer),
+        }
+
+
+def matcher(pet_id: Optional[int] = None, user_id: Optional[int] = None,
+            status: Optional[str] = None, types: Optional[str] = None):
+    """Filtro dos eventos pelos parâmetros de GET /events"""
+    prefixes = tuple(part.strip() for part in types.split(",") if part.strip()) if types else None
+
+    def matches(event: dict) -> bool:
+        return (
+            (pet_id is None or event["pet_id"] == pet_id)
+            and (user_id is None or event["user_id"] == user_id)
+            and (status is None or event["status"] == status)
+            and (prefixes is None or event["type"].startswith(prefixes))
+        )
+    return matches
+
+
+async def follow(cursor: Optional[int], matches,
+                 heartbeat: float = CHANGE_FEED_HEARTBEAT_SECONDS) -> AsyncIterator[Union[dict, str]]:
+    """
+    Eventos que passam no filtro, a partir de `cursor` (None = só os novos)
+
+    Entre eles vêm HEARTBEAT (nada em `heartbeat` segundos) e RESET (o
+    cursor já saiu da retenção; o feed continua a partir dos eventos atuais).
+    """
+    loop = asyncio.get_running_loop()
+    with feed.subscription():
+        await feed.wait_ready()
+        if cursor is None:
+            cursor = feed.last_id
+        last_sent = loop.time()
+        while True:
+            # O heartbeat conta desde o último envio: eventos que não passam no filtro não mantêm a conexão viva
+            result = await feed.events_after(cursor, max(0.0, last_sent + heartbeat - loop.time()))
+            if result == RESET:
+                cursor = feed.last_id
+                yield RESET
+                last_sent = loop.time()
+                continue
+            if result != HEARTBEAT:
+                for event in result:
+                    cursor = event["id"]
+                    if matches(event):
+                        yield event
+                        last_sent = loop.time()
+            if loop.time() - last_sent >= heartbeat:
+                yield HEARTBEAT
+                last_sent = loop.time()
+
+
+async def sse_stream(cursor: Optional[int], matches) -> AsyncIterator[bytes]:
+    """follow() no formato text/event-stream"""
+    yield b"retry: 3000\n\n"
+    async for item in follow(cursor, matches):
+        if item == HEARTBEAT:
+            yield b": ping\n\n"
+        elif item == RESET:
+            yield f"id: {feed.last_id}\nevent: reset\ndata: {{}}\n\n".encode()
+        else:
+            yield b"id: %d\nevent: %s\ndata: %s\n\n" % (item["id"], item["type"].encode(), dumps(item))
+
+
+async def websocket_stream(websocket, cursor: Optional[int], matches) -> None:
+    """follow() como mensagens JSON num WebSocket já aceito, até o cliente fechar"""
+    async def send_all():
+        async for item in follow(cursor, matches):
+            if item == HEARTBEAT:
+                await websocket.send_text('{"type":"ping"}')
+            elif item == RESET:
+                await websocket.send_text(dumps({"id": feed.last_id, "type": "reset"}).decode())
+            else:
+                await websocket.send_text(dumps(item).decode())
+
+    async def until_closed():
+        # O cliente não manda nada; ler o socket só serve para notar o fechamento
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = {asyncio.ensure_future(send_all()), asyncio.ensure_future(until_closed())}
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+    for task in done:
+        error = task.exception()
+        if error is not None and not isinstance(error, WebSocketDisconnect):
+            raise error
+
+
+feed = ChangeFeed()
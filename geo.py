@@ -0,0 +1,253 @@
+"""
+Geolocation for Pet Adoption API
+
+Os pets guardam latitude/longitude, informadas no cadastro ou resolvidas
+a partir da cidade por um gazetteer offline embutido aqui. Cada pet também
+recebe geo_cell, o número da célula de uma grade fixa de GEO_CELL_DEGREES
+graus, com índice no banco.
+
+Uma busca por raio vira um punhado de intervalos de geo_cell (um por linha
+da grade dentro do retângulo envolvente), resolvidos pelo índice; a
+distância é calculada no próprio SQL com a aproximação equiretangular, que
+só usa aritmética e funciona igual no SQLite e no PostgreSQL. Listagens
+paginadas usam uma busca expansiva (select_nearby_rows) para não ordenar
+todos os pets de uma região densa.
+"""
+
+import math
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, inspect, or_, update
+from sqlalchemy.orm import Session
+
+from models import Pet
+from serialization import PET_RESPONSE_FIELDS, select_pet_rows
+from app_types.constants import GEO_CELL_DEGREES, GEO_INITIAL_RADIUS_KM
+
+KM_PER_DEGREE = 111.32
+GRID_COLUMNS = int(round(360 / GEO_CELL_DEGREES))
+GRID_ROWS = int(round(180 / GEO_CELL_DEGREES))
+
+# Capitais e principais cidades do Brasil (latitude, longitude)
+CITY_COORDINATES = {
+    "Aracaju": (-10.9472, -37.0731),
+    "Belém": (-1.4558, -48.4902),
+    "Belo Horizonte": (-19.9167, -43.9345),
+    "Boa Vista": (2.8235, -60.6758),
+    "Brasília": (-15.7939, -47.8828),
+    "Campo Grande": (-20.4697, -54.6201),
+    "Cuiabá": (-15.6014, -56.0979),
+    "Curitiba": (-25.4284, -49.2733),
+    "Florianópolis": (-27.5954, -48.5480),
+    "Fortaleza": (-3.7319, -38.5267),
+    "Goiânia": (-16.6869, -49.2648),
+    "João Pessoa": (-7.1195, -34.8450),
+    "Macapá": (0.0349, -51.0694),
+    "Maceió": (-9.6498, -35.7089),
+    "Manaus": (-3.1190, -60.0217),
+    "Natal": (-5.7945, -35.2110),
+    "Palmas": (-10.1840, -48.3336),
+    "Porto Alegre": (-30.0346, -51.2177),
+    "Porto Velho": (-8.7612, -63.9004),
+    "Recife": (-8.0476, -34.8770),
+    "Rio Branco": (-9.9747, -67.8243),
+    "Rio de Janeiro": (-22.9068, -43.1729),
+    "Salvador": (-12.9714, -38.5014),
+    "São Luís": (-2.5307, -44.3068),
+    "São Paulo": (-23.5505, -46.6333),
+    "Teresina": (-5.0892, -42.8019),
+    "Vitória": (-20.3155, -40.3128),
+    "Anápolis": (-16.3281, -48.9530),
+    "Aparecida de Goiânia": (-16.8198, -49.2469),
+    "Bauru": (-22.3246, -49.0871),
+    "Betim": (-19.9678, -44.1977),
+    "Blumenau": (-26.9194, -49.0661),
+    "Campina Grande": (-7.2307, -35.8817),
+    "Campinas": (-22.9099, -47.0626),
+    "Canoas": (-29.9178, -51.1839),
+    "Caruaru": (-8.2842, -35.9699),
+    "Cascavel": (-24.9578, -53.4596),
+    "Caxias do Sul": (-29.1678, -51.1794),
+    "Contagem": (-19.9321, -44.0539),
+    "Duque de Caxias": (-22.7856, -43.3117),
+    "Feira de Santana": (-12.2664, -38.9663),
+    "Foz do Iguaçu": (-25.5469, -54.5882),
+    "Guarulhos": (-23.4538, -46.5333),
+    "Imperatriz": (-5.5264, -47.4919),
+    "Jaboatão dos Guararapes": (-8.1130, -35.0154),
+    "Joinville": (-26.3045, -48.8487),
+    "Juiz de Fora": (-21.7642, -43.3503),
+    "Londrina": (-23.3045, -51.1696),
+    "Maringá": (-23.4205, -51.9333),
+    "Montes Claros": (-16.7350, -43.8617),
+    "Mossoró": (-5.1878, -37.3442),
+    "Niterói": (-22.8832, -43.1034),
+    "Nova Iguaçu": (-22.7556, -43.4603),
+    "Olinda": (-8.0089, -34.8553),
+    "Osasco": (-23.5325, -46.7917),
+    "Pelotas": (-31.7654, -52.3376),
+    "Petrolina": (-9.3891, -40.5030),
+    "Petrópolis": (-22.5050, -43.1786),
+    "Piracicaba": (-22.7253, -47.6492),
+    "Ponta Grossa": (-25.0950, -50.1619),
+    "Ribeirão Preto": (-21.1704, -47.8103),
+    "Santarém": (-2.4385, -54.6996),
+    "Santo André": (-23.6639, -46.5383),
+    "Santos": (-23.9608, -46.3336),
+    "São Bernardo do Campo": (-23.6914, -46.5646),
+    "São Gonçalo": (-22.8268, -43.0634),
+    "São José dos Campos": (-23.1791, -45.8872),
+    "Serra": (-20.1209, -40.3074),
+    "Sorocaba": (-23.5015, -47.4526),
+    "Uberlândia": (-18.9186, -48.2772),
+    "Vila Velha": (-20.3297, -40.2925),
+    "Vitória da Conquista": (-14.8615, -40.8442),
+}
+
+# "Recife - PE", "Recife/PE", "Recife, PE"
+STATE_SUFFIX = re.compile(r"\s*[-/,]\s*[a-z]{2}$")
+
+
+def normalize_city(city: str) -> str:
+    """Nome da cidade sem acentos, em minúsculas e sem a sigla do estado"""
+    text = unicodedata.normalize("NFKD", city)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = " ".join(text.lower().split())
+    return STATE_SUFFIX.sub("", text)
+
+
+_GAZETTEER = {normalize_city(name): coordinates for name, coordinates in CITY_COORDINATES.items()}
+
+
+def city_coordinates(city: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Coordenadas de uma cidade conhecida, ou None"""
+    if not city:
+        return None
+    return _GAZETTEER.get(normalize_city(city))
+
+
+def grid_cell(latitude: float, longitude: float) -> int:
+    """Número da célula da grade que contém o ponto"""
+    row = min(int((latitude + 90) / GEO_CELL_DEGREES), GRID_ROWS - 1)
+    column = min(int((longitude + 180) / GEO_CELL_DEGREES), GRID_COLUMNS - 1)
+    return row * GRID_COLUMNS + column
+
+
+def locate(city: Optional[str], latitude: Optional[float] = None, longitude: Optional[float] = None) -> tuple:
+    """
+    Resolver (latitude, longitude, geo_cell) de um pet
+
+    Coordenadas explícitas têm prioridade; sem elas, usa o gazetteer.
+    """
+    if latitude is None or longitude is None:
+        coordinates = city_coordinates(city)
+        if coordinates is None:
+            return None, None, None
+        latitude, longitude = coordinates
+    return latitude, longitude, grid_cell(latitude, longitude)
+
+
+def nearby(latitude: float, longitude: float, radius_km: float) -> tuple:
+    """
+    Condições SQL e expressão de distância de uma busca por raio
+
+    Retorna (conditions, distance_sq): as condições limitam as células da
+    grade e o retângulo envolvente e descartam o que está fora do raio;
+    distance_sq é a distância ao quadrado em km², usada para ordenar.
+    """
+    cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+    delta_lat = radius_km / KM_PER_DEGREE
+    delta_lon = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+
+    min_lat, max_lat = max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0)
+    min_lon, max_lon = max(longitude - delta_lon, -180.0), min(longitude + delta_lon, 180.0)
+
+    first_column = grid_cell(0, min_lon) % GRID_COLUMNS
+    last_column = grid_cell(0, max_lon) % GRID_COLUMNS
+    cell_ranges = [
+        Pet.geo_cell.between(row * GRID_COLUMNS + first_column, row * GRID_COLUMNS + last_column)
+        for row in range(grid_cell(min_lat, 0) // GRID_COLUMNS, grid_cell(max_lat, 0) // GRID_COLUMNS + 1)
+    ]
+
+    north_km = (Pet.latitude - latitude) * KM_PER_DEGREE
+    east_km = (Pet.longitude - longitude) * (KM_PER_DEGREE * cos_lat)
+    distance_sq = north_km * north_km + east_km * east_km
+
+    conditions = [
+        or_(*cell_ranges),
+        Pet.latitude.between(min_lat, max_lat),
+        Pet.longitude.between(min_lon, max_lon),
+        distance_sq <= radius_km * radius_km,
+    ]
+    return conditions, distance_sq
+
+
+def select_nearby_rows(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    conditions: Iterable = (),
+    skip: int = 0,
+    limit: int = 100,
+    fields: Sequence[str] = PET_RESPONSE_FIELDS,
+) -> List[dict]:
+    """
+    Página de pets dentro do raio, do mais próximo ao mais distante
+
+    Busca expansiva: começa com GEO_INITIAL_RADIUS_KM e quadruplica o raio
+    até preencher a página ou chegar a radius_km. Se um raio menor já tem
+    skip + limit pets, eles são os mais próximos de todos, então numa
+    cidade densa não é preciso ordenar todos os pets dos 30 km.
+    """
+    conditions = list(conditions)
+    radius = min(GEO_INITIAL_RADIUS_KM, radius_km)
+    while True:
+        near_conditions, distance_sq = nearby(latitude, longitude, radius)
+        rows = select_pet_rows(
+            db, conditions + near_conditions, skip=skip, limit=limit, fields=fields, distance_sq=distance_sq
+        )
+        if len(rows) == limit or radius >= radius_km:
+            return rows
+        radius = min(radius * 4, radius_km)
+
+
+@event.listens_for(Pet, "before_insert")
+def _locate_new_pet(mapper, connection, pet):
+    pet.latitude, pet.longitude, pet.geo_cell = locate(pet.city, pet.latitude, pet.longitude)
+
+
+@event.listens_for(Pet, "before_update")
+def _locate_updated_pet(mapper, connection, pet):
+    state = inspect(pet)
+    moved = state.attrs.latitude.history.has_changes() or state.attrs.longitude.history.has_changes()
+    if moved:
+        pet.latitude, pet.longitude, pet.geo_cell = locate(pet.city, pet.latitude, pet.longitude)
+    elif state.attrs.city.history.has_changes():
+        # Mudou a cidade sem coordenadas novas: geocodificar de novo
+        pet.latitude, pet.longitude, pet.geo_cell = locate(pet.city)
+
+
+def backfill_pet_locations(db: Session) -> int:
+    """
+    Preencher coordenadas de pets antigos a partir da cidade
+
+    Um UPDATE por cidade distinta, não por pet. Retorna quantos pets foram atualizados.
+    """
+    cities = db.query(Pet.city).filter(Pet.latitude.is_(None), Pet.city.isnot(None)).distinct().all()
+    updated = 0
+    for (city,) in cities:
+        latitude, longitude, cell = locate(city)
+        if cell is None:
+            continue
+        result = db.execute(
+            update(Pet)
+            .where(Pet.city == city, Pet.latitude.is_(None))
+            .values(latitude=latitude, longitude=longitude, geo_cell=cell)
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+    db.commit()
+    return updated
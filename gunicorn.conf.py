@@ -0,0 +1,40 @@
+"""
+Configuração de produção multi-processo (gunicorn + workers uvicorn)
+
+    gunicorn -c gunicorn.conf.py main:app
+
+A aplicação é carregada uma vez no master (preload_app) e o banco é
+inicializado antes do fork. Cada worker descarta as conexões herdadas e
+recria caches próprios via os.register_at_fork (ver database.py e health.py).
+O SQLite roda em WAL com busy_timeout, então escritas concorrentes entre
+workers esperam o lock em vez de falhar.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers periodicamente limita vazamentos de memória
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = 1000
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    # Criar tabelas e dados iniciais uma única vez, antes dos workers
+    from main import ensure_db_initialized
+    ensure_db_initialized()
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s iniciado", worker.pid)
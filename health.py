@@ -0,0 +1,134 @@
+"""
+Health checks for Pet Adoption API
+
+Liveness não faz nenhum I/O. Readiness verifica banco, pool de conexões,
+atraso do event loop e diretório de uploads, com resultado em cache por
+alguns segundos para que probes frequentes não gerem carga no banco.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+
+from database import engine
+from app_types.constants import (
+    UPLOAD_DIR, HEALTH_DB_TIMEOUT_SECONDS, HEALTH_CACHE_SECONDS,
+    HEALTH_POOL_SATURATION_THRESHOLD, HEALTH_LOOP_LAG_THRESHOLD_MS
+)
+
+_ready_cache: Optional[dict] = None
+_ready_cached_at = 0.0
+_ready_lock: Optional[asyncio.Lock] = None
+
+
+def liveness() -> dict:
+    """Processo vivo e respondendo (sem I/O)"""
+    return {"status": "alive", "timestamp": datetime.utcnow()}
+
+
+def _ping_database() -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def check_database() -> dict:
+    """Executar SELECT 1 com timeout limitado"""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(asyncio.to_thread(_ping_database), timeout=HEALTH_DB_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"timeout após {HEALTH_DB_TIMEOUT_SECONDS}s"}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+def check_pool() -> dict:
+    """Saturação do pool de conexões do SQLAlchemy"""
+    pool = engine.pool
+    if not all(hasattr(pool, attr) for attr in ("size", "checkedout", "overflow")):
+        # Pools sem limite (ex: SingletonThreadPool do SQLite em memória)
+        return {"ok": True, "pool": type(pool).__name__}
+
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    checked_out = pool.checkedout()
+    saturation = checked_out / capacity if capacity > 0 else 0.0
+    return {
+        "ok": saturation < HEALTH_POOL_SATURATION_THRESHOLD,
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "saturation": round(saturation, 3),
+    }
+
+
+async def check_event_loop() -> dict:
+    """Medir quanto tempo um callback espera na fila do event loop"""
+    loop = asyncio.get_running_loop()
+    scheduled = loop.time()
+    waiter = loop.create_future()
+    loop.call_soon(lambda: waiter.done() or waiter.set_result(loop.time()))
+    lag_ms = (await waiter - scheduled) * 1000
+    return {"ok": lag_ms < HEALTH_LOOP_LAG_THRESHOLD_MS, "lag_ms": round(lag_ms, 3)}
+
+
+def check_upload_dir() -> dict:
+    """Verificar se o diretório de uploads aceita escrita"""
+    try:
+        with tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix=".health-"):
+            pass
+    except OSError as e:
+        return {"ok": False, "path": UPLOAD_DIR, "error": str(e)}
+    return {"ok": True, "path": os.path.abspath(UPLOAD_DIR)}
+
+
+async def readiness() -> dict:
+    """
+    Executar todas as verificações de prontidão
+
+    O resultado fica em cache por HEALTH_CACHE_SECONDS e probes simultâneos
+    aguardam a mesma verificação em vez de abrir novas conexões.
+    """
+    global _ready_cache, _ready_cached_at, _ready_lock
+
+    if _ready_cache is not None and time.monotonic() - _ready_cached_at < HEALTH_CACHE_SECONDS:
+        return _ready_cache
+
+    if _ready_lock is None:
+        _ready_lock = asyncio.Lock()
+
+    async with _ready_lock:
+        if _ready_cache is not None and time.monotonic() - _ready_cached_at < HEALTH_CACHE_SECONDS:
+            return _ready_cache
+
+        checks = {
+            "event_loop": await check_event_loop(),
+            "database": await check_database(),
+            "pool": check_pool(),
+            "uploads": check_upload_dir(),
+        }
+        ready = all(check["ok"] for check in checks.values())
+        _ready_cache = {
+            "status": "ready" if ready else "not_ready",
+            "timestamp": datetime.utcnow(),
+            "checks": checks,
+        }
+        _ready_cached_at = time.monotonic()
+        return _ready_cache
+
+
+def reset_cache() -> None:
+    """Descartar o resultado em cache (e o lock ligado ao event loop)"""
+    global _ready_cache, _ready_cached_at, _ready_lock
+    _ready_cache = None
+    _ready_cached_at = 0.0
+    _ready_lock = None
+
+
+os.register_at_fork(after_in_child=reset_cache)
@@ -0,0 +1,234 @@
+"""
+Event loop watchdog for Pet Adoption API
+
+Os handlers são async mas chamam o ORM, o bcrypt e o disco de forma
+síncrona; enquanto um deles roda, o event loop inteiro do worker para.
+O watchdog mede isso continuamente:
+
+- um task acorda a cada LOOP_WATCHDOG_INTERVAL_SECONDS e registra o
+  atraso (lag) com que acordou num histograma
+- uma thread confere a cada LOOP_WATCHDOG_POLL_SECONDS se o task já
+  deveria ter acordado; passado LOOP_WATCHDOG_THRESHOLD_MS, ela anota qual
+  task está rodando no loop (e assim a rota da requisição) e a pilha do
+  thread do loop, via sys._current_frames
+
+Quando o loop volta, o atraso medido vai para o histograma da rota
+capturada. Se várias requisições bloquearam em sequência no mesmo atraso,
+ele conta para a que estava rodando quando o limite foi passado.
+GET /debug/loop mostra os histogramas, as rotas ordenadas pelo tempo total
+de bloqueio e os bloqueios recentes com a pilha.
+
+No Python 3.11 um task não expõe o próprio contextvars.Context para outra
+thread, então o middleware guarda o scope de cada requisição pelo task
+que a atende. Trabalho em tasks filhos (ex: o corpo de um
+StreamingResponse) aparece pelo nome da corrotina. "(fora de um task)" é
+atraso sem task rodando: o GIL preso por uma thread do threadpool, ou a
+CPU ocupada por outro processo.
+"""
+
+import asyncio
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app_types.constants import (
+    LOOP_WATCHDOG, LOOP_WATCHDOG_INTERVAL_SECONDS, LOOP_WATCHDOG_THRESHOLD_MS, LOOP_WATCHDOG_POLL_SECONDS,
+    LOOP_WATCHDOG_RECENT_BLOCKS, LOOP_WATCHDOG_STACK_DEPTH, LOOP_LAG_BUCKETS_MS
+)
+
+UNCAPTURED = "(não capturado)"
+
+
+def enabled() -> bool:
+    return LOOP_WATCHDOG != "off"
+
+
+class Histogram:
+    """Contagens por faixa (limites superiores em ms), como os buckets "le" do Prometheus"""
+
+    def __init__(self, bounds=LOOP_LAG_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def snapshot(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(list(self.bounds) + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "buckets_ms": buckets,
+        }
+
+
+def stack_lines(frame, depth: int = LOOP_WATCHDOG_STACK_DEPTH) -> List[str]:
+    """Os `depth` frames mais internos, do mais externo ao mais interno (como num traceback)"""
+    lines = []
+    while frame is not None and len(lines) < depth:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)  # co_qualname: Python 3.11+
+        lines.append(f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return list(reversed(lines))
+
+
+class LoopWatchdog:
+    def __init__(self, interval: float = LOOP_WATCHDOG_INTERVAL_SECONDS,
+                 threshold_ms: float = LOOP_WATCHDOG_THRESHOLD_MS,
+                 poll: float = LOOP_WATCHDOG_POLL_SECONDS,
+                 recent: int = LOOP_WATCHDOG_RECENT_BLOCKS):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        # A thread precisa olhar algumas vezes dentro do limite para pegar bloqueios curtos
+        self.poll = min(poll, threshold_ms / 1000 / 4)
+        self.lag = Histogram()
+        self.routes: Dict[str, Histogram] = {}
+        self.recent: deque = deque(maxlen=recent)
+        # task que atende cada requisição -> scope (lido pela thread do watchdog)
+        self.requests: dict = {}
+        # Instante (time.monotonic) em que o task de medição deveria acordar
+        self._due: Optional[float] = None
+        self._capture: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._task = self._loop.create_task(self._measure())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    async def _measure(self) -> None:
+        while True:
+            due = time.monotonic() + self.interval
+            self._due = due
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, time.monotonic() - due) * 1000
+            with self._lock:
+                self._due = None
+                capture, self._capture = self._capture, None
+            self.lag.observe(lag_ms)
+            if capture is not None or lag_ms >= self.threshold_ms:
+                self._record_block(lag_ms, capture)
+
+    def _record_block(self, lag_ms: float, capture: Optional[dict]) -> None:
+        route = capture["route"] if capture else UNCAPTURED
+        histogram = self.routes.get(route)
+        if histogram is None:
+            histogram = self.routes[route] = Histogram()
+        histogram.observe(lag_ms)
+        self.recent.append({
+            "at": capture["at"] if capture else datetime.utcnow(),
+            "route": route,
+            "blocked_ms": round(lag_ms, 1),
+            "stack": capture["stack"] if capture else [],
+        })
+
+    def _monitor(self) -> None:
+        while not self._stopping.wait(self.poll):
+            due = self._due
+            if due is None or self._capture is not None:
+                continue
+            if (time.monotonic() - due) * 1000 < self.threshold_ms:
+                continue
+            capture = self.capture()
+            with self._lock:
+                # O loop pode ter voltado enquanto a pilha era lida
+                if self._due == due:
+                    self._capture = capture
+
+    def capture(self) -> dict:
+        """Rota e pilha do que está rodando agora no thread do loop (chamado pela thread do watchdog)"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        return {
+            "at": datetime.utcnow(),
+            "route": self.route_label(task),
+            "stack": stack_lines(frame) if frame is not None else [],
+        }
+
+    def route_label(self, task: Optional[asyncio.Task]) -> str:
+        if task is None:
+            # Código do próprio loop ou de protocolos, o GIL preso por outra thread, ou CPU ocupada por outro processo
+            return "(fora de um task)"
+        scope = self.requests.get(task)
+        if scope is None:
+            coro = task.get_coro()
+            return f"task {getattr(coro, '__qualname__', task.get_name())}"
+        route = scope.get("route")
+        # Sem rota casada (ainda nos middlewares, ou 404) o caminho cru teria cardinalidade ilimitada
+        path = getattr(route, "path", None) or "(sem rota)"
+        return f"{scope.get('method', 'WS')} {path}"
+
+    def snapshot(self) -> dict:
+        routes = sorted(self.routes.items(), key=lambda item: item[1].total_ms, reverse=True)
+        return {
+            "running": self._task is not None,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold_ms,
+            "lag": self.lag.snapshot(),
+            "blocking_by_route": {route: histogram.snapshot() for route, histogram in routes},
+            "recent_blocks": list(reversed(self.recent)),
+        }
+
+
+class WatchdogMiddleware:
+    """
+    Associar o task de cada requisição ao scope dela, para o watchdog achar a rota
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        watchdog.requests[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            watchdog.requests.pop(task, None)
+
+
+watchdog = LoopWatchdog()
@@ -1,25 +1,74 @@
-from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File, Request, WebSocket, Header
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import or_, func, update, exists, select
+from typing import List, Optional, Union
 import os
 import uuid
+from collections import Counter
 import shutil
 from datetime import datetime
 
 from database import get_db, init_db
-from models import Pet, User, Base, AdoptionRequest
+from models import Pet, PetPhoto, User, Base, AdoptionRequest, ArchivedPet, ArchivedAdoptionRequest
 from schemas import (
-    PetCreate, PetUpdate, UserCreate, UserUpdate, AdoptRequest, PetResponse, PetFilter, PetListResponse,
+    PetCreate, PetUpdate, UserCreate, UserUpdate, AdoptRequest, PetResponse, PetCardResponse, PetNearbyResponse, PetRecommendationResponse, PetSimilarResponse, PetFacetsResponse, PetPhotoResponse, PetPhotoMove, PetFilter, PetListResponse, PetBatchRequest,
     AdoptionRequestCreate, AdoptionRequestUpdate, AdoptionRequestResponse, AdoptionRequestListResponse,
+    AdoptionApprovalResponse, AdoptionRequestBulkUpdate, AdoptionRequestBulkResult,
     UserLogin, UserRegister, Token, UserProfile
 )
 from auth import verify_password, get_password_hash, create_access_token, check_dependencies
 from auth_deps import get_current_user, get_current_user_optional
+from serialization import FastJSONResponse, select_pet_rows, resolve_pet_fields, pet_columns, attach_photos, PET_RESPONSE_FIELDS
+import geo
+import catalog
+import facets
+import photos
+import archive
+import recommendations
+import similarity
+import events
 from utils import get_species_label, get_gender_label, get_status_label
-from app_types import GenderEnum, SpeciesEnum, StatusEnum, AdoptionStatusEnum
-from app_types.constants import UPLOAD_DIR, MAX_PAGE_SIZE, MIN_PAGE_SIZE
+from app_types import GenderEnum, SpeciesEnum, StatusEnum, AdoptionStatusEnum, PetViewEnum
+from app_types.constants import (
+    UPLOAD_DIR, MAX_PAGE_SIZE, MIN_PAGE_SIZE, BULK_UPDATE_MAX_IDS, BULK_UPDATE_CHUNK_SIZE, GEO_DEFAULT_RADIUS_KM, GEO_MAX_RADIUS_KM,
+    RECOMMENDATION_MAX_RESULTS, SIMILARITY_TOP_K, PHOTO_APPEND_ATTEMPTS, OUTBOX_WORKER
+)
+import health
+from compression import CompressionMiddleware
+import batch
+import capture
+from budgets import budget
+import profiling
+import loop_watchdog
+from profiling import ProfilingMiddleware
+import admission
+from admission import AdmissionMiddleware
+import deadlines
+from deadlines import DeadlineMiddleware
+import outbox
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Inicializar banco no startup, e não no health check
+    ensure_db_initialized()
+    if OUTBOX_WORKER == "inprocess":
+        outbox.worker.start()
+    events.feed.start()
+    if loop_watchdog.enabled():
+        loop_watchdog.watchdog.start()
+    yield
+    await loop_watchdog.watchdog.stop()
+    await events.feed.stop()
+    await outbox.worker.stop()
+
 
 app = FastAPI(
     title="Pet Adoption API",
@@ -46,8 +95,13 @@ app = FastAPI(
     license_info={
         "name": "MIT",
     },
+    lifespan=lifespan,
 )
 
+# Adicionados antes do CORS para que as recusas (429/503) e os 504 também levem os headers de CORS
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -56,6 +110,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if capture.enabled():
+    # Por dentro da compressão, para gravar os corpos das respostas sem compressão
+    app.add_middleware(capture.CaptureMiddleware)
+
+app.add_middleware(CompressionMiddleware)
+
+if profiling.enabled():
+    # Por fora dos outros middlewares, para o perfil incluir compressão e CORS
+    app.add_middleware(ProfilingMiddleware)
+
+if loop_watchdog.enabled():
+    app.add_middleware(loop_watchdog.WatchdogMiddleware)
+
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 _db_initialized = False
@@ -93,13 +160,30 @@ async def root():
 @app.get("/health", tags=["Sistema"])
 async def health_check():
     """
-    Verificar se a API está funcionando
+    Verificar se a API está funcionando (compatível com clientes antigos, sem I/O)
     """
-    # Inicializar banco na primeira requisição
-    ensure_db_initialized()
-    
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+@app.get("/health/live", tags=["Sistema"])
+async def health_live():
+    """
+    Liveness probe: o processo responde, sem acessar banco ou disco
+    """
+    return health.liveness()
+
+@app.get("/health/ready", tags=["Sistema"])
+async def health_ready():
+    """
+    Readiness probe: ping no banco com timeout, saturação do pool,
+    atraso do event loop e escrita no diretório de uploads.
+    
+    Resultado em cache por alguns segundos; retorna 503 se alguma verificação falhar.
+    """
+    result = await health.readiness()
+    if result["status"] != "ready":
+        return JSONResponse(status_code=503, content=jsonable_encoder(result))
+    return result
+
 @app.post("/init-db", tags=["Sistema"])
 async def initialize_database():
     """
@@ -111,6 +195,64 @@ async def initialize_database():
     except Exception as e:
         return {"error": f"Erro ao inicializar banco: {str(e)}"}
 
+@app.get("/debug/admission", tags=["Sistema"])
+async def debug_admission():
+    """
+    Debug: requisições ativas, na fila e recusadas por classe de rota (neste worker)
+    """
+    return admission.stats.snapshot()
+
+@app.get("/debug/deadlines", tags=["Sistema"])
+async def debug_deadlines():
+    """
+    Debug: prazos por rota e requisições que estouraram o prazo ou perderam o cliente (neste worker)
+    """
+    return deadlines.stats.snapshot()
+
+@app.get("/debug/events", tags=["Sistema"])
+async def debug_events():
+    """
+    Debug: clientes conectados ao feed de eventos e estado do buffer (neste worker)
+    """
+    return events.feed.stats()
+
+@app.get("/debug/loop", tags=["Sistema"])
+async def debug_loop():
+    """
+    Debug: atraso do event loop e bloqueios por rota, com as pilhas dos mais recentes (neste worker)
+    
+    `blocking_by_route` vem ordenado pelo tempo total em que cada rota travou o loop:
+    as primeiras são as que mais precisam sair do loop (threadpool).
+    """
+    return loop_watchdog.watchdog.snapshot()
+
+def require_profile_token(x_profile_token: Optional[str] = Header(None)):
+    """Os perfis só podem ser lidos com o PROFILE_TOKEN"""
+    if not profiling.PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling desligado (defina PROFILE_TOKEN)")
+    if not profiling.token_matches(x_profile_token):
+        raise HTTPException(status_code=403, detail="X-Profile-Token inválido")
+
+@app.get("/debug/profiles", tags=["Sistema"], dependencies=[Depends(require_profile_token)])
+async def list_profiles():
+    """
+    Debug: perfis gravados (mais recentes primeiro), de todos os workers
+    
+    Uma requisição é perfilada com o header `X-Profile-Token` (ou
+    `?profile=<token>`); a resposta dela traz o nome do perfil em `X-Profile-Id`.
+    """
+    return {"profiles": profiling.list_profiles()}
+
+@app.get("/debug/profiles/{name}", tags=["Sistema"], dependencies=[Depends(require_profile_token)])
+async def download_profile(name: str):
+    """
+    Debug: baixar um perfil no formato folded (flamegraph.pl, speedscope)
+    """
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return FileResponse(path, media_type="text/plain", filename=name)
+
 @app.get("/debug/db-status", tags=["Sistema"])
 async def debug_database_status():
     """
@@ -140,9 +282,54 @@ async def debug_database_status():
             "users": users_data
         }
     except Exception as e:
+        deadlines.check()  # consulta interrompida pelo prazo: responder 504, não "erro"
         return {"error": f"Erro ao verificar banco: {str(e)}"}
 
-@app.get("/pets", response_model=List[PetResponse], tags=["Pets"])
+def pet_filter_conditions(
+    species: Optional[SpeciesEnum] = None,
+    gender: Optional[GenderEnum] = None,
+    city: Optional[str] = None,
+    status: Optional[StatusEnum] = None,
+    min_age: Optional[float] = None,
+    max_age: Optional[float] = None,
+) -> list:
+    """
+    Montar as condições SQL dos filtros de pets
+    """
+    conditions = []
+    
+    if species:
+        conditions.append(Pet.species == species)
+    
+    if gender:
+        conditions.append(Pet.gender == gender)
+    
+    if city:
+        conditions.append(Pet.city.ilike(f"%{city}%"))
+    
+    if status:
+        conditions.append(Pet.status == status)
+    
+    if min_age is not None:
+        conditions.append(Pet.age >= min_age)
+    
+    if max_age is not None:
+        conditions.append(Pet.age <= max_age)
+    
+    return conditions
+
+def resolve_fields_or_400(fields: Optional[str], view: Optional[PetViewEnum]) -> tuple:
+    """Converter erro de projeção em 400"""
+    try:
+        return resolve_pet_fields(fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/pets", response_model=Union[List[PetResponse], List[PetCardResponse], List[PetNearbyResponse]], tags=["Pets"])
+@budget(queries=2, latency_ms=25)
+@budget(queries=1, latency_ms=20, params={"view": "card"}, name="card")
+@budget(queries=2, latency_ms=35, params={"species": "dog", "city": "Recife", "status": "available"}, name="filtros")
+@budget(queries=6, latency_ms=40, indexed=("pets",), params={"lat": -8.05, "lon": -34.9, "radius_km": 10}, name="raio")
 async def list_pets(
     species: Optional[SpeciesEnum] = Query(None, description="Filtrar por espécie"),
     gender: Optional[GenderEnum] = Query(None, description="Filtrar por gênero"),
@@ -152,6 +339,11 @@ async def list_pets(
     max_age: Optional[float] = Query(None, description="Idade máxima em meses"),
     skip: int = Query(0, ge=0),
     limit: int = Query(MAX_PAGE_SIZE, ge=MIN_PAGE_SIZE, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Campos separados por vírgula (ex: id,name,city)"),
+    view: Optional[PetViewEnum] = Query(None, description="Projeção predefinida: full ou card"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude do ponto de busca"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitude do ponto de busca"),
+    radius_km: float = Query(GEO_DEFAULT_RADIUS_KM, gt=0, le=GEO_MAX_RADIUS_KM, description="Raio da busca em km"),
     db: Session = Depends(get_db)
 ):
     """
@@ -165,43 +357,81 @@ async def list_pets(
     - **max_age**: idade máxima em meses
     - **skip**: número de registros para pular
     - **limit**: máximo 100 itens por página
-    """
-    query = db.query(Pet)
-    
-    if species:
-        query = query.filter(Pet.species == species)
-    
-    if gender:
-        query = query.filter(Pet.gender == gender)
+    - **fields**: retornar apenas esses campos (o `id` sempre vem)
+    - **view**: `card` retorna id, name, species, gender, age, city e a primeira foto
+    - **lat**, **lon**, **radius_km**: só pets dentro do raio, do mais próximo ao
+      mais distante, cada um com `distance_km`
     
-    if city:
-        query = query.filter(Pet.city.ilike(f"%{city}%"))
-    
-    if status:
-        query = query.filter(Pet.status == status)
-    
-    if min_age is not None:
-        query = query.filter(Pet.age >= min_age)
+    As linhas são lidas com SQLAlchemy Core e serializadas com orjson,
+    sem passar por objetos ORM nem revalidar o response_model. Só as
+    colunas da projeção pedida são selecionadas no banco. Com
+    PET_CATALOG=memory os filtros rodam no catálogo em memória (catalog.py).
+    """
+    selected = resolve_fields_or_400(fields, view)
+    conditions = pet_filter_conditions(species, gender, city, status, min_age, max_age)
     
-    if max_age is not None:
-        query = query.filter(Pet.age <= max_age)
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="Informe lat e lon juntos")
+    if lat is not None:
+        pets = geo.select_nearby_rows(db, lat, lon, radius_km, conditions, skip=skip, limit=limit, fields=selected)
+    elif catalog.CATALOG_ENABLED:
+        # Filtro e paginação no snapshot em memória; o banco só entrega a página
+        page_ids = catalog.catalog.search(
+            db, species=species, gender=gender, city=city, status=status,
+            min_age=min_age, max_age=max_age, skip=skip, limit=limit
+        )
+        pets = select_pet_rows(db, [Pet.id.in_(page_ids)], fields=selected) if page_ids else []
+    else:
+        pets = select_pet_rows(db, conditions, skip=skip, limit=limit, fields=selected)
+    return FastJSONResponse(pets)
+
+@app.get("/pets/facets", response_model=PetFacetsResponse, tags=["Pets"])
+@budget(queries=1, latency_ms=60)
+async def get_pet_facets(
+    species: Optional[SpeciesEnum] = Query(None, description="Filtrar por espécie"),
+    gender: Optional[GenderEnum] = Query(None, description="Filtrar por gênero"),
+    city: Optional[str] = Query(None, description="Filtrar por cidade"),
+    status: Optional[StatusEnum] = Query(None, description="Filtrar por status"),
+    min_age: Optional[float] = Query(None, description="Idade mínima em meses"),
+    max_age: Optional[float] = Query(None, description="Idade máxima em meses"),
+    db: Session = Depends(get_db)
+):
+    """
+    Contagens por espécie, gênero, status, cidade e faixa de idade
     
-    pets = query.offset(skip).limit(limit).all()
-    return pets
+    Aceita os mesmos filtros de `GET /pets` e conta só os pets que passam
+    por eles. Todas as facetas saem de uma única consulta agrupada (ou do
+    catálogo em memória com PET_CATALOG=memory).
+    """
+    if catalog.CATALOG_ENABLED:
+        rows = catalog.catalog.facet_rows(
+            db, species=species, gender=gender, city=city, status=status, min_age=min_age, max_age=max_age
+        )
+    else:
+        rows = facets.select_facet_rows(db, pet_filter_conditions(species, gender, city, status, min_age, max_age))
+    return FastJSONResponse(facets.fold_facets(rows))
 
 @app.get("/pets/stats", tags=["Estatísticas"])
-async def get_stats(db: Session = Depends(get_db)):
+@budget(queries=3, latency_ms=25)
+async def get_stats(
+    include_archived: bool = Query(False, description="Somar os pets arquivados (relatórios)"),
+    db: Session = Depends(get_db)
+):
     """
     Obter estatísticas dos pets
     
     Retorna:
     - Total de pets
     - Pets disponíveis
-    - Pets adotados
+    - Pets adotados (com `include_archived=true`, também os já arquivados)
     """
     total = db.query(Pet).count()
     available = db.query(Pet).filter(Pet.status == "available").count()
     adopted = db.query(Pet).filter(Pet.status == "adopted").count()
+    if include_archived:
+        archived = db.query(ArchivedPet).count()
+        total += archived
+        adopted += archived
     
     return {
         "total_pets": total,
@@ -210,28 +440,140 @@ async def get_stats(db: Session = Depends(get_db)):
     }
 
 @app.get("/pets/search", tags=["Pets"])
-async def search_pets(q: str, db: Session = Depends(get_db)):
-   
-    pets = db.query(Pet).filter(
+@budget(queries=2, latency_ms=35, params={"q": "Labrador"})
+async def search_pets(
+    q: str,
+    fields: Optional[str] = Query(None, description="Campos separados por vírgula (ex: id,name,city)"),
+    view: Optional[PetViewEnum] = Query(None, description="Projeção predefinida: full ou card"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=MIN_PAGE_SIZE, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar pets por nome, raça ou cidade
+    
+    Aceita as mesmas projeções `fields` e `view` de `GET /pets`. Paginada
+    com `skip` e `limit` (no máximo MAX_PAGE_SIZE pets por resposta).
+    """
+    selected = resolve_fields_or_400(fields, view)
+    conditions = [
         or_(
             Pet.name.ilike(f"%{q}%"),
             Pet.breed.ilike(f"%{q}%"),
             Pet.city.ilike(f"%{q}%")
         )
-    ).all()
-    return {"pets": pets, "query": q}
+    ]
+    # ILIKE varre a tabela: fora do event loop, a desconexão do cliente é notada e interrompe a consulta
+    pets = await run_in_threadpool(select_pet_rows, db, conditions, skip=skip, limit=limit, fields=selected)
+    return FastJSONResponse({"pets": pets, "query": q})
+
+def pet_batch_response(
+    db: Session,
+    ids: List[int],
+    fields: Optional[str],
+    view: Optional[PetViewEnum],
+    if_none_match: Optional[str],
+) -> Response:
+    """
+    Resposta de GET/POST /pets/batch, com ETag
+    
+    O ETag sai das linhas do corpo: a version de cada pet vem na mesma
+    consulta das colunas e as fotos são as que vão na resposta. No SQLite
+    cada SELECT vê o banco do momento em que roda, então uma foto trocada
+    entre as duas consultas muda o corpo e o ETag juntos, sem descasá-los.
+    Se o cliente já tem essa versão (If-None-Match), a resposta é 304.
+    """
+    selected = resolve_fields_or_400(fields, view)
+    try:
+        ids = batch.unique_ids(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    pets, versions = batch.select_pets(db, ids, selected)
+    attach_photos(db, pets)
+    etag = batch.compute_etag(ids, pets, versions, selected)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if batch.etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    missing = [pet_id for pet_id in ids if pet_id not in versions]
+    return FastJSONResponse({"pets": pets, "missing": missing}, headers=headers)
+
+@app.get("/pets/batch", tags=["Pets"])
+@budget(queries=2, latency_ms=30, indexed=("pets", "pet_photos"), params={"ids": ",".join(map(str, range(100, 0, -1)))})
+async def get_pets_batch(
+    ids: str = Query(..., description="Ids separados por vírgula (ex: 12,5,40), no máximo PET_BATCH_MAX_IDS"),
+    fields: Optional[str] = Query(None, description="Campos separados por vírgula (ex: id,name,city)"),
+    view: Optional[PetViewEnum] = Query(None, description="Projeção predefinida: full ou card"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar vários pets de uma vez (favoritos, painéis de adoção)
+    
+    Os pets vêm na ordem dos `ids` (repetidos aparecem uma vez) e os ids
+    que não existem (ou já foram arquivados) vêm em `missing`. Aceita as
+    projeções `fields` e `view` de `GET /pets`.
+    
+    A resposta traz `ETag`: reenvie em `If-None-Match` para receber `304 Not
+    Modified` quando nenhum dos pets (nem as fotos) mudou.
+    
+    Formato: `{"pets": [...], "missing": [...]}`, cada pet só com os campos
+    da projeção. Como em `GET /pets`, as linhas são lidas com SQLAlchemy
+    Core e serializadas com orjson, sem revalidar um response_model.
+    """
+    try:
+        pet_ids = batch.parse_ids(ids)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids deve ser uma lista de inteiros separados por vírgula")
+    return pet_batch_response(db, pet_ids, fields, view, if_none_match)
+
+@app.post("/pets/batch", tags=["Pets"])
+@budget(queries=2, latency_ms=50, indexed=("pets", "pet_photos"), json={"ids": list(range(200, 0, -1))}, name="200 ids")
+async def post_pets_batch(
+    request: PetBatchRequest,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Igual a `GET /pets/batch`, com os ids no corpo (listas longas demais para a URL)
+    
+    Só leitura: `If-None-Match` funciona como no GET e devolve 304.
+    """
+    return pet_batch_response(db, request.ids, request.fields, request.view, if_none_match)
 
 @app.get("/pets/{pet_id}", response_model=PetResponse, tags=["Pets"])
+@budget(queries=2, latency_ms=15, indexed=("pets", "pet_photos"))
 async def get_pet(pet_id: int, db: Session = Depends(get_db)):
     """
-    Buscar pet por ID
+    Buscar pet por ID (pets arquivados também são encontrados)
     """
     pet = db.query(Pet).filter(Pet.id == pet_id).first()
+    if not pet:
+        # Pets adotados há muito tempo ficam no arquivo (archive.py)
+        pet = archive.archived_pet(db, pet_id)
     if not pet:
         raise HTTPException(status_code=404, detail="Pet não encontrado")
     return pet
 
+@app.get("/pets/{pet_id}/similar", response_model=List[PetSimilarResponse], tags=["Pets"])
+@budget(queries=2, latency_ms=15, indexed=("pets", "pet_similarities"))
+async def get_similar_pets(
+    pet_id: int,
+    limit: int = Query(10, ge=1, le=SIMILARITY_TOP_K),
+    db: Session = Depends(get_db)
+):
+    """
+    Pets disponíveis parecidos com este (mesma espécie; descrição, raça e idade)
+    
+    A lista vem do índice pré-calculado em pet_similarities (ver similarity.py).
+    """
+    if not db.query(exists().where(Pet.id == pet_id)).scalar():
+        raise HTTPException(status_code=404, detail="Pet não encontrado")
+    return FastJSONResponse(similarity.similar_pets(db, pet_id, limit))
+
 @app.post("/pets", response_model=PetResponse, status_code=201, tags=["Pets"])
+@budget(queries=4, latency_ms=40, json={"name": "Orçamento", "species": "dog", "gender": "male", "age": 24, "city": "Recife"})
 async def create_pet(pet_data: PetCreate, db: Session = Depends(get_db)):
     """
     Criar novo pet
@@ -251,28 +593,57 @@ async def create_pet(pet_data: PetCreate, db: Session = Depends(get_db)):
     """
     pet = Pet(**pet_data.model_dump())
     db.add(pet)
+    db.flush()
+    events.record(db, "pet.created", pet_id=pet.id, status=pet.status)
     db.commit()
+    events.feed.notify()
     db.refresh(pet)
+    catalog.refresh_pets(db, [pet.id])
+    similarity.updater.changed(pet.id)
     return pet
 
 @app.put("/pets/{pet_id}", response_model=PetResponse, tags=["Pets"])
+@budget(queries=9, latency_ms=45, indexed=("pets", "pet_photos"), json={"description": "Muito carinhoso", "photos": ["a.jpg", "b.jpg"]})
 async def update_pet(pet_id: int, pet_data: PetUpdate, db: Session = Depends(get_db)):
     """
     Atualizar pet existente
+    
+    Envie `version` (do último GET) para concorrência otimista: se o pet
+    mudou desde então, a resposta é 409.
     """
     pet = db.query(Pet).filter(Pet.id == pet_id).first()
     if not pet:
         raise HTTPException(status_code=404, detail="Pet não encontrado")
     
     update_data = pet_data.model_dump(exclude_unset=True)
+    expected_version = update_data.pop("version", None)
+    if expected_version is not None and expected_version != pet.version:
+        raise HTTPException(status_code=409, detail="Pet foi alterado por outra requisição; recarregue e tente novamente")
+    
+    replace_photos = "photos" in update_data
+    new_photos = update_data.pop("photos", None) or []
     for field, value in update_data.items():
         setattr(pet, field, value)
+    # Fotos são linhas de pet_photos: as que continuam ficam, as novas entram depois das saídas
+    removed_photos = photos.replace_photos(db, pet_id, new_photos) if replace_photos else []
+    events.record(db, "pet.updated", pet_id=pet_id, status=pet.status)
     
-    db.commit()
+    try:
+        # O UPDATE inclui "WHERE version = ?" (version_id_col do modelo)
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Pet foi alterado por outra requisição; recarregue e tente novamente")
+    events.feed.notify()
+    for photo in removed_photos:
+        photos.remove_files(photo)
     db.refresh(pet)
+    catalog.refresh_pets(db, [pet_id])
+    similarity.updater.changed(pet_id)
     return pet
 
 @app.delete("/pets/{pet_id}", tags=["Pets"])
+@budget(queries=6, latency_ms=20, indexed=("pets", "pet_photos", "pet_similarities"))
 async def delete_pet(pet_id: int, db: Session = Depends(get_db)):
     """
     Deletar pet
@@ -281,16 +652,25 @@ async def delete_pet(pet_id: int, db: Session = Depends(get_db)):
     if not pet:
         raise HTTPException(status_code=404, detail="Pet não encontrado")
     
+    listed_by = similarity.remove_pet_rows(db, pet_id)
     db.delete(pet)
+    events.record(db, "pet.deleted", pet_id=pet_id)
     db.commit()
+    events.feed.notify()
+    catalog.refresh_pets(db, [pet_id])
+    similarity.updater.changed(pet_id)
+    similarity.updater.recompute(listed_by)
     return {"message": "Pet deletado com sucesso"}
 
 
-@app.post("/pets/{pet_id}/adopt", tags=["Adoção"])
+@app.post("/pets/{pet_id}/adopt", response_model=PetResponse, tags=["Adoção"])
+@budget(queries=6, latency_ms=15, indexed=("pets", "pet_photos"), json={"user_id": 1})
 async def adopt_pet(pet_id: int, adopt_data: AdoptRequest, db: Session = Depends(get_db)):
     """
     Adotar um pet
     
+    A adoção é um único UPDATE condicional (status = available), então entre
+    pedidos simultâneos para o mesmo pet exatamente um tem sucesso.
     
     Exemplo de dados:
     ```json
@@ -299,23 +679,47 @@ async def adopt_pet(pet_id: int, adopt_data: AdoptRequest, db: Session = Depends
     }
     ```
     """
-    pet = db.query(Pet).filter(Pet.id == pet_id).first()
-    if not pet:
-        raise HTTPException(status_code=404, detail="Pet não encontrado")
+    now = datetime.utcnow()
+    # Checagem e escrita num único UPDATE condicional: com adoções
+    # simultâneas, só uma encontra o pet ainda disponível
+    stmt = (
+        update(Pet)
+        .where(
+            Pet.id == pet_id,
+            Pet.status == StatusEnum.AVAILABLE,
+            exists().where(User.id == adopt_data.user_id)
+        )
+        .values(
+            status=StatusEnum.ADOPTED,
+            adopted_by=adopt_data.user_id,
+            adopted_at=now,
+            updated_at=now,
+            version=Pet.version + 1
+        )
+        .returning(*pet_columns())
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).first()
     
-    if pet.status != "available":
+    if row is None:
+        db.rollback()
+        # Só no caminho de falha: descobrir o motivo para a mensagem de erro
+        if db.query(Pet.id).filter(Pet.id == pet_id).first() is None:
+            raise HTTPException(status_code=404, detail="Pet não encontrado")
+        if db.query(User.id).filter(User.id == adopt_data.user_id).first() is None:
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
         raise HTTPException(status_code=400, detail="Pet não disponível")
     
-    user = db.query(User).filter(User.id == adopt_data.user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-    
-    pet.status = "adopted"
-    pet.adopted_by = adopt_data.user_id
-    pet.adopted_at = datetime.utcnow()
-    
+    pet = attach_photos(db, [dict(zip(PET_RESPONSE_FIELDS, row))])[0]
+    # Notificações gravadas na mesma transação; o envio fica com o worker
+    outbox.enqueue_pet_adopted(db, pet["id"], pet["name"], adopt_data.user_id, pet["version"])
+    events.record(db, "pet.adopted", pet_id=pet_id, user_id=adopt_data.user_id, status=StatusEnum.ADOPTED)
     db.commit()
-    db.refresh(pet)
+    outbox.worker.notify()
+    events.feed.notify()
+    catalog.refresh_pets(db, [pet_id])
+    # Pelo response_model, como GET /pets/{id}: o RETURNING do SQLite traz os
+    # valores antes da afinidade da coluna (age 36, não 36.0)
     return pet
 
 @app.get("/users", tags=["Usuários"])
@@ -354,6 +758,7 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
     return user
 
 @app.get("/users/{user_id}", tags=["Usuários"])
+@budget(queries=1, latency_ms=10, indexed=("users",))
 async def get_user(user_id: int, db: Session = Depends(get_db)):
    
     user = db.query(User).filter(User.id == user_id).first()
@@ -371,7 +776,30 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
     }
     return user_dict
 
+@app.get("/users/{user_id}/recommendations", response_model=List[PetRecommendationResponse], tags=["Usuários"])
+@budget(queries=1, latency_ms=20)
+async def get_user_recommendations(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=RECOMMENDATION_MAX_RESULTS),
+    db: Session = Depends(get_db)
+):
+    """
+    Pets disponíveis recomendados para o usuário, do mais para o menos indicado
+    
+    Considera a distância até a cidade do usuário, as espécies e idades dos
+    pets que ele já pediu e a popularidade recente de cada pet. Pets já
+    pedidos pelo usuário não aparecem.
+    """
+    if not recommendations.NUMPY_INSTALLED:
+        raise HTTPException(status_code=503, detail="Recomendações indisponíveis: numpy não instalado")
+    
+    pets = recommendations.recommended_pets(db, user_id, limit)
+    if pets is None:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    return FastJSONResponse(pets)
+
 @app.post("/pets/{pet_id}/photos", tags=["Pets"])
+@budget(queries=4, latency_ms=20, indexed=("pets", "pet_photos"))
 async def upload_pet_photos(
     pet_id: int,
     files: List[UploadFile] = File(...),
@@ -399,26 +827,73 @@ async def upload_pet_photos(
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
-        uploaded_files.append(unique_filename)
-    
-    # Atualizar lista de fotos do pet
-    if pet.photos is None:
-        pet.photos = []
+        uploaded_files.append((unique_filename, os.path.getsize(file_path)))
     
-    pet.photos.extend(uploaded_files)
-    pet.updated_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(pet)
+    # Uma linha nova por foto, depois da última; o registro do pet não muda.
+    # Se outro upload simultâneo ficou com a mesma posição, refazer com a nova última
+    for attempt in range(PHOTO_APPEND_ATTEMPTS):
+        try:
+            photo_ids = photos.append_photos(db, pet_id, uploaded_files)
+            events.record(db, "pet.photos_updated", pet_id=pet_id)
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt == PHOTO_APPEND_ATTEMPTS - 1:
+                for filename, _ in uploaded_files:
+                    os.remove(os.path.join(UPLOAD_DIR, filename))
+                raise HTTPException(status_code=409, detail="Fotos enviadas ao mesmo tempo para este pet; tente novamente")
+    events.feed.notify()
+    total_photos = db.query(func.count(PetPhoto.id)).filter(PetPhoto.pet_id == pet_id).scalar()
     
     return {
         "message": f"{len(uploaded_files)} foto(s) enviada(s) com sucesso",
         "pet_id": pet_id,
-        "uploaded_files": uploaded_files,
-        "total_photos": len(pet.photos)
+        "uploaded_files": [filename for filename, _ in uploaded_files],
+        "photo_ids": photo_ids,
+        "total_photos": total_photos
     }
 
+@app.get("/pets/{pet_id}/photos", response_model=List[PetPhotoResponse], tags=["Pets"])
+@budget(queries=2, latency_ms=15, indexed=("pet_photos",))
+async def list_pet_photos(pet_id: int, db: Session = Depends(get_db)):
+    """
+    Fotos do pet na ordem de exibição (a primeira é a capa), com ids para reordenar ou apagar
+    """
+    if not db.query(exists().where(Pet.id == pet_id)).scalar():
+        raise HTTPException(status_code=404, detail="Pet não encontrado")
+    return FastJSONResponse(photos.list_photos(db, pet_id))
+
+@app.patch("/pets/{pet_id}/photos/{photo_id}", response_model=List[PetPhotoResponse], tags=["Pets"])
+async def move_pet_photo(pet_id: int, photo_id: int, move: PetPhotoMove, db: Session = Depends(get_db)):
+    """
+    Mover uma foto para outra posição (`index` 0 = capa)
+    
+    Só a linha da foto movida é atualizada. Retorna a nova ordem.
+    """
+    if not photos.move_photo(db, pet_id, photo_id, move.index):
+        raise HTTPException(status_code=404, detail="Foto não encontrada")
+    events.record(db, "pet.photos_updated", pet_id=pet_id)
+    db.commit()
+    events.feed.notify()
+    return FastJSONResponse(photos.list_photos(db, pet_id))
+
+@app.delete("/pets/{pet_id}/photos/{photo_id}", tags=["Pets"])
+async def delete_pet_photo(pet_id: int, photo_id: int, db: Session = Depends(get_db)):
+    """
+    Apagar uma foto do pet (e o arquivo, se foi enviado para esta API)
+    """
+    photo = photos.delete_photo(db, pet_id, photo_id)
+    if photo is None:
+        raise HTTPException(status_code=404, detail="Foto não encontrada")
+    events.record(db, "pet.photos_updated", pet_id=pet_id)
+    db.commit()
+    events.feed.notify()
+    photos.remove_files(photo)
+    return {"message": "Foto deletada com sucesso"}
+
 @app.get("/pets/filters/options", tags=["Pets"])
+@budget(queries=1, latency_ms=20)
 async def get_filter_options(db: Session = Depends(get_db)):
     """
     Obter opções disponíveis para filtros
@@ -469,7 +944,8 @@ async def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
         )
     
     # Criar hash da senha
-    hashed_password = get_password_hash(user_data.password)
+    # bcrypt é caro: rodar fora do event loop para não travar as outras rotas
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     
     # Criar usuário
     user = User(
@@ -512,7 +988,7 @@ async def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Verificar senha
-    if not verify_password(login_data.password, user.password):
+    if not await run_in_threadpool(verify_password, login_data.password, user.password):
         raise HTTPException(
             status_code=401, 
             detail="Usuário ou senha incorretos"
@@ -554,7 +1030,7 @@ async def login_user_legacy(username: str, password: str, db: Session = Depends(
         )
     
     # Verificar senha
-    if not verify_password(password, user.password):
+    if not await run_in_threadpool(verify_password, password, user.password):
         raise HTTPException(
             status_code=401, 
             detail="Usuário ou senha incorretos"
@@ -597,7 +1073,50 @@ async def logout_user():
 # ENDPOINTS DE ADOÇÃO
 # ============================================================================
 
+def adoption_requests_page(
+    db: Session,
+    owner_column,
+    owner_id: int,
+    status: Optional[AdoptionStatusEnum],
+    page: int,
+    limit: int,
+) -> dict:
+    """
+    Página de pedidos de um pet ou usuário, do mais recente ao mais antigo
+    
+    `owner_column` é AdoptionRequest.pet_id ou AdoptionRequest.user_id; os
+    índices (pet_id, status, created_at) e (user_id, created_at) entregam
+    as linhas já ordenadas. As contagens por status saem de um GROUP BY
+    no mesmo índice e também dão o total.
+    """
+    counts = {
+        status_value.value: count
+        for status_value, count in db.query(AdoptionRequest.status, func.count())
+        .filter(owner_column == owner_id)
+        .group_by(AdoptionRequest.status)
+    }
+    total = counts.get(status.value, 0) if status else sum(counts.values())
+    
+    query = db.query(AdoptionRequest).filter(owner_column == owner_id)
+    if status:
+        query = query.filter(AdoptionRequest.status == status)
+    adoption_requests = (
+        query.options(joinedload(AdoptionRequest.pet), joinedload(AdoptionRequest.user))
+        .order_by(AdoptionRequest.created_at.desc(), AdoptionRequest.id.desc())
+        .offset((page - 1) * limit)
+        .limit(limit)
+        .all()
+    )
+    return {
+        "adoption_requests": adoption_requests,
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "counts": counts,
+    }
+
 @app.post("/adoption-requests", response_model=AdoptionRequestResponse, tags=["Adoções"])
+@budget(queries=7, latency_ms=15)
 async def create_adoption_request(
     adoption_request: AdoptionRequestCreate,
     db: Session = Depends(get_db)
@@ -609,8 +1128,18 @@ async def create_adoption_request(
         # Criar o pedido de adoção
         db_adoption = AdoptionRequest(**adoption_request.dict())
         db.add(db_adoption)
+        db.flush()
+        outbox.enqueue_adoption_request_created(db, db_adoption)
+        events.record(
+            db, "adoption_request.created", pet_id=db_adoption.pet_id,
+            adoption_request_id=db_adoption.id, user_id=db_adoption.user_id, status=db_adoption.status
+        )
         db.commit()
         db.refresh(db_adoption)
+        outbox.worker.notify()
+        events.feed.notify()
+        # O novo pedido muda o perfil do usuário
+        recommendations.recommender.invalidate(db_adoption.user_id)
         
         return db_adoption
     except Exception as e:
@@ -618,31 +1147,227 @@ async def create_adoption_request(
         raise HTTPException(status_code=500, detail=f"Erro ao criar pedido de adoção: {str(e)}")
 
 @app.get("/adoption-requests", response_model=List[AdoptionRequestResponse], tags=["Adoções"])
+@budget(queries=1, latency_ms=40)
 async def get_adoption_requests(
     skip: int = Query(0, ge=0, description="Número de registros para pular"),
     limit: int = Query(100, ge=1, le=100, description="Número máximo de registros"),
     status: Optional[AdoptionStatusEnum] = Query(None, description="Filtrar por status"),
+    include_archived: bool = Query(False, description="Incluir pedidos arquivados (relatórios)"),
     db: Session = Depends(get_db)
 ):
     """
     Listar todos os pedidos de adoção
+    
+    Com `include_archived=true` a lista junta os pedidos arquivados, por id.
     """
-    query = db.query(AdoptionRequest)
+    if include_archived:
+        return archive.select_adoption_requests(db, status, skip, limit)
+    
+    # pet e user vêm no mesmo SELECT; sem isso cada pedido custava mais duas consultas
+    query = db.query(AdoptionRequest).options(joinedload(AdoptionRequest.pet), joinedload(AdoptionRequest.user))
     
     if status:
         query = query.filter(AdoptionRequest.status == status)
     
     return query.offset(skip).limit(limit).all()
 
+@app.get("/pets/{pet_id}/adoption-requests", response_model=AdoptionRequestListResponse, tags=["Adoções"])
+@budget(queries=3, latency_ms=20, indexed=("pets", "adoption_requests"))
+async def get_pet_adoption_requests(
+    pet_id: int,
+    status: Optional[AdoptionStatusEnum] = Query(None, description="Filtrar por status"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Pedidos de adoção de um pet, do mais recente ao mais antigo
+    
+    Inclui o total e as contagens por status do pet.
+    """
+    if not db.query(exists().where(Pet.id == pet_id)).scalar():
+        raise HTTPException(status_code=404, detail="Pet não encontrado")
+    return adoption_requests_page(db, AdoptionRequest.pet_id, pet_id, status, page, limit)
+
+@app.get("/users/{user_id}/adoption-requests", response_model=AdoptionRequestListResponse, tags=["Adoções"])
+@budget(queries=3, latency_ms=30, indexed=("users", "adoption_requests"))
+async def get_user_adoption_requests(
+    user_id: int,
+    status: Optional[AdoptionStatusEnum] = Query(None, description="Filtrar por status"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Pedidos de adoção feitos por um usuário, do mais recente ao mais antigo
+    
+    Inclui o total e as contagens por status do usuário.
+    """
+    if not db.query(exists().where(User.id == user_id)).scalar():
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    return adoption_requests_page(db, AdoptionRequest.user_id, user_id, status, page, limit)
+
+@app.get("/adoption-requests/count", tags=["Adoções"])
+@budget(queries=1, latency_ms=15)
+async def get_adoption_requests_count(
+    status: Optional[AdoptionStatusEnum] = Query(None, description="Filtrar por status"),
+    include_archived: bool = Query(False, description="Somar os pedidos arquivados (relatórios)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Contar pedidos de adoção
+    
+    Sem filtro, todos os contadores saem de um único GROUP BY por status
+    (mais um no arquivo, com `include_archived=true`).
+    """
+    counts = Counter(archive.count_by_status(db, AdoptionRequest.status))
+    if include_archived:
+        counts.update(archive.count_by_status(db, ArchivedAdoptionRequest.status))
+    if status:
+        return {"count": counts.get(status, 0)}
+    
+    return {
+        "total": sum(counts.values()),
+        "pending": counts.get(AdoptionStatusEnum.PENDING, 0),
+        "approved": counts.get(AdoptionStatusEnum.APPROVED, 0),
+        "rejected": counts.get(AdoptionStatusEnum.REJECTED, 0),
+        "completed": counts.get(AdoptionStatusEnum.COMPLETED, 0)
+    }
+
+@app.patch("/adoption-requests/bulk", response_model=AdoptionRequestBulkResult, tags=["Adoções"])
+@budget(queries=2, latency_ms=25, indexed=("adoption_requests",), name="100 ids")
+async def bulk_update_adoption_requests(
+    bulk: AdoptionRequestBulkUpdate,
+    db: Session = Depends(get_db)
+):
+    """
+    Alterar o status de vários pedidos de adoção de uma vez
+    
+    Informe `ids` **ou** `filter` (ao menos um de status, pet_id, user_id,
+    created_before), até 5000 pedidos por requisição. É feito um único
+    `UPDATE ... WHERE id IN (...)` por lote de 500; o resultado traz o
+    desfecho de cada id: `updated`, `unchanged` (já estava no status),
+    `conflict` (pedido aprovado) ou `not_found`.
+    
+    Aprovações não são aceitas aqui: use `POST /adoption-requests/{id}/approve`,
+    que também adota o pet e rejeita os pedidos concorrentes. Pelo mesmo
+    motivo pedidos já aprovados não mudam de status em lote.
+    
+    Exemplo de dados:
+    ```json
+    {
+        "ids": [10, 11, 12],
+        "status": "rejected"
+    }
+    ```
+    """
+    if (bulk.ids is None) == (bulk.filter is None):
+        raise HTTPException(status_code=400, detail="Informe ids ou filter (apenas um)")
+    if bulk.status == AdoptionStatusEnum.APPROVED:
+        raise HTTPException(
+            status_code=400,
+            detail="Use POST /adoption-requests/{id}/approve para aprovar pedidos"
+        )
+    
+    if bulk.ids is not None:
+        # Ids repetidos contam uma vez, na ordem da primeira ocorrência
+        ids = list(dict.fromkeys(bulk.ids))
+    else:
+        conditions = []
+        if bulk.filter.status:
+            conditions.append(AdoptionRequest.status == bulk.filter.status)
+        if bulk.filter.pet_id is not None:
+            conditions.append(AdoptionRequest.pet_id == bulk.filter.pet_id)
+        if bulk.filter.user_id is not None:
+            conditions.append(AdoptionRequest.user_id == bulk.filter.user_id)
+        if bulk.filter.created_before is not None:
+            conditions.append(AdoptionRequest.created_at < bulk.filter.created_before)
+        if not conditions:
+            raise HTTPException(
+                status_code=400,
+                detail="filter precisa de ao menos um critério: status, pet_id, user_id ou created_before"
+            )
+        # O filtro vira uma lista de ids, com o mesmo limite de `ids`
+        ids = db.execute(
+            select(AdoptionRequest.id)
+            .where(AdoptionRequest.status != bulk.status, *conditions)
+            .order_by(AdoptionRequest.id)
+            .limit(BULK_UPDATE_MAX_IDS + 1)
+        ).scalars().all()
+        if len(ids) > BULK_UPDATE_MAX_IDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"O filtro atinge mais de {BULK_UPDATE_MAX_IDS} pedidos; restrinja o filtro"
+            )
+    
+    now = datetime.utcnow()
+    results = []
+    changed = []  # (id, pet_id, user_id) dos pedidos atualizados, para o feed de eventos
+    for start in range(0, len(ids), BULK_UPDATE_CHUNK_SIZE):
+        chunk = ids[start:start + BULK_UPDATE_CHUNK_SIZE]
+        rows = db.execute(
+            update(AdoptionRequest)
+            .where(
+                AdoptionRequest.id.in_(chunk),
+                AdoptionRequest.status != bulk.status,
+                # Aprovar já adotou o pet e rejeitou os concorrentes; desfazer isso não é uma troca de status
+                AdoptionRequest.status != AdoptionStatusEnum.APPROVED
+            )
+            .values(status=bulk.status, updated_at=now)
+            .returning(AdoptionRequest.id, AdoptionRequest.pet_id, AdoptionRequest.user_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        changed.extend(rows)
+        updated = {row.id for row in rows}
+        
+        statuses = {}
+        if len(updated) < len(chunk):
+            # Só quando algo não foi atualizado: separar "já estava", "aprovado" e "não existe"
+            remaining = [adoption_id for adoption_id in chunk if adoption_id not in updated]
+            statuses = dict(db.execute(
+                select(AdoptionRequest.id, AdoptionRequest.status).where(AdoptionRequest.id.in_(remaining))
+            ).all())
+        
+        for adoption_id in chunk:
+            if adoption_id in updated:
+                outcome = "updated"
+            elif adoption_id not in statuses:
+                outcome = "not_found"
+            elif statuses[adoption_id] == AdoptionStatusEnum.APPROVED:
+                outcome = "conflict"
+            else:
+                outcome = "unchanged"
+            results.append({"id": adoption_id, "outcome": outcome})
+    
+    events.record_many(db, "adoption_request.updated", (
+        {"adoption_request_id": row.id, "pet_id": row.pet_id, "user_id": row.user_id} for row in changed
+    ), status=bulk.status)
+    db.commit()
+    events.feed.notify()
+    
+    outcomes = [result["outcome"] for result in results]
+    return {
+        "status": bulk.status,
+        "updated": outcomes.count("updated"),
+        "unchanged": outcomes.count("unchanged"),
+        "conflict": outcomes.count("conflict"),
+        "not_found": outcomes.count("not_found"),
+        "results": results
+    }
+
 @app.get("/adoption-requests/{adoption_id}", response_model=AdoptionRequestResponse, tags=["Adoções"])
+@budget(queries=3, latency_ms=15, indexed=("adoption_requests",))
 async def get_adoption_request(
     adoption_id: int,
     db: Session = Depends(get_db)
 ):
     """
-    Buscar pedido de adoção específico
+    Buscar pedido de adoção específico (inclusive arquivado)
     """
     adoption = db.query(AdoptionRequest).filter(AdoptionRequest.id == adoption_id).first()
+    if not adoption:
+        # Pedidos fechados há muito tempo ficam no arquivo (archive.py)
+        adoption = archive.archived_adoption_request(db, adoption_id)
     if not adoption:
         raise HTTPException(status_code=404, detail="Pedido de adoção não encontrado")
     return adoption
@@ -664,11 +1389,104 @@ async def update_adoption_request(
     update_data = adoption_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(adoption, key, value)
+    events.record(
+        db, "adoption_request.updated", pet_id=adoption.pet_id,
+        adoption_request_id=adoption_id, user_id=adoption.user_id, status=adoption.status
+    )
     
     db.commit()
+    events.feed.notify()
     db.refresh(adoption)
     return adoption
 
+@app.post("/adoption-requests/{adoption_id}/approve", response_model=AdoptionApprovalResponse, tags=["Adoções"])
+@budget(queries=18, latency_ms=30, indexed=("pets", "adoption_requests"))
+async def approve_adoption_request(
+    adoption_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Aprovar um pedido de adoção
+    
+    Numa única transação: marca o pet como adotado pelo autor do pedido,
+    aprova este pedido e rejeita todos os outros pedidos pendentes do mesmo pet.
+    
+    O pet é atualizado primeiro com um UPDATE condicional, então aprovações
+    simultâneas de pedidos do mesmo pet se serializam nele: só a primeira
+    vence e as demais recebem 409.
+    """
+    adoption = db.query(AdoptionRequest.pet_id, AdoptionRequest.user_id, AdoptionRequest.status).filter(
+        AdoptionRequest.id == adoption_id
+    ).first()
+    if not adoption:
+        raise HTTPException(status_code=404, detail="Pedido de adoção não encontrado")
+    if adoption.status != AdoptionStatusEnum.PENDING:
+        raise HTTPException(status_code=409, detail="Pedido de adoção não está pendente")
+    
+    now = datetime.utcnow()
+    adopted = db.execute(
+        update(Pet)
+        .where(Pet.id == adoption.pet_id, Pet.status.in_([StatusEnum.AVAILABLE, StatusEnum.PENDING]))
+        .values(
+            status=StatusEnum.ADOPTED,
+            adopted_by=adoption.user_id,
+            adopted_at=now,
+            updated_at=now,
+            version=Pet.version + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if adopted.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Pet não disponível")
+    
+    approved = db.execute(
+        update(AdoptionRequest)
+        .where(AdoptionRequest.id == adoption_id, AdoptionRequest.status == AdoptionStatusEnum.PENDING)
+        .values(status=AdoptionStatusEnum.APPROVED, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if approved.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Pedido de adoção não está pendente")
+    
+    rejected_requests = db.execute(
+        update(AdoptionRequest)
+        .where(
+            AdoptionRequest.pet_id == adoption.pet_id,
+            AdoptionRequest.status == AdoptionStatusEnum.PENDING,
+            AdoptionRequest.id != adoption_id
+        )
+        .values(status=AdoptionStatusEnum.REJECTED, updated_at=now)
+        .returning(AdoptionRequest.id, AdoptionRequest.user_id, AdoptionRequest.email, AdoptionRequest.whatsapp)
+        .execution_options(synchronize_session=False)
+    ).all()
+    
+    approved_request = db.query(AdoptionRequest).filter(AdoptionRequest.id == adoption_id).first()
+    pet = approved_request.pet
+    outbox.enqueue_pet_adopted(db, pet.id, pet.name, adoption.user_id, pet.version)
+    for rejected in rejected_requests:
+        outbox.enqueue_adoption_request_rejected(db, rejected.id, adoption.pet_id, rejected.email, rejected.whatsapp)
+    events.record(db, "pet.adopted", pet_id=adoption.pet_id, user_id=adoption.user_id, status=StatusEnum.ADOPTED)
+    events.record(
+        db, "adoption_request.updated", pet_id=adoption.pet_id,
+        adoption_request_id=adoption_id, user_id=adoption.user_id, status=AdoptionStatusEnum.APPROVED
+    )
+    events.record_many(db, "adoption_request.updated", (
+        {"adoption_request_id": rejected.id, "pet_id": adoption.pet_id, "user_id": rejected.user_id}
+        for rejected in rejected_requests
+    ), status=AdoptionStatusEnum.REJECTED)
+    db.commit()
+    outbox.worker.notify()
+    events.feed.notify()
+    catalog.refresh_pets(db, [adoption.pet_id])
+    
+    return {
+        "adoption_request": approved_request,
+        "pet": pet,
+        "rejected_request_ids": sorted(rejected.id for rejected in rejected_requests)
+    }
+
 @app.delete("/adoption-requests/{adoption_id}", tags=["Adoções"])
 async def delete_adoption_request(
     adoption_id: int,
@@ -682,36 +1500,67 @@ async def delete_adoption_request(
         raise HTTPException(status_code=404, detail="Pedido de adoção não encontrado")
     
     db.delete(adoption)
+    events.record(
+        db, "adoption_request.deleted", pet_id=adoption.pet_id,
+        adoption_request_id=adoption_id, user_id=adoption.user_id
+    )
     db.commit()
+    events.feed.notify()
     return {"message": "Pedido de adoção deletado com sucesso"}
 
-@app.get("/adoption-requests/count", tags=["Adoções"])
-async def get_adoption_requests_count(
-    status: Optional[AdoptionStatusEnum] = Query(None, description="Filtrar por status"),
-    db: Session = Depends(get_db)
+@app.get("/events", tags=["Eventos"])
+async def stream_events(
+    request: Request,
+    pet_id: Optional[int] = Query(None, description="Só eventos deste pet"),
+    user_id: Optional[int] = Query(None, description="Só eventos deste usuário"),
+    status: Optional[str] = Query(None, description="Status depois da mudança (ex: adopted, pending)"),
+    types: Optional[str] = Query(None, description="Tipos separados por vírgula; prefixos valem (ex: pet,adoption_request.created)"),
+    last_event_id: Optional[int] = Query(None, description="Retomar depois deste evento (o header Last-Event-ID tem precedência)"),
 ):
     """
-    Contar pedidos de adoção
-    """
-    query = db.query(AdoptionRequest)
+    Feed de mudanças de pets e pedidos de adoção (Server-Sent Events)
     
-    if status:
-        total = query.filter(AdoptionRequest.status == status).count()
-        return {"count": total}
-    else:
-        total = query.count()
-        pending = query.filter(AdoptionRequest.status == AdoptionStatusEnum.PENDING).count()
-        approved = query.filter(AdoptionRequest.status == AdoptionStatusEnum.APPROVED).count()
-        rejected = query.filter(AdoptionRequest.status == AdoptionStatusEnum.REJECTED).count()
-        completed = query.filter(AdoptionRequest.status == AdoptionStatusEnum.COMPLETED).count()
-        
-        return {
-            "total": total,
-            "pending": pending,
-            "approved": approved,
-            "rejected": rejected,
-            "completed": completed
-        }
+    Substitui o polling de `GET /pets` e `GET /adoption-requests`. Cada
+    evento traz `id`, `type` (pet.created, pet.updated, pet.deleted,
+    pet.adopted, pet.photos_updated, adoption_request.created,
+    adoption_request.updated, adoption_request.deleted), `pet_id`,
+    `adoption_request_id`, `user_id`, `status` e `created_at`. O EventSource
+    do navegador reconecta sozinho com `Last-Event-ID`; um evento `reset`
+    indica que o histórico expirou e as listas devem ser recarregadas.
+    """
+    header = request.headers.get("last-event-id")
+    if header:
+        try:
+            last_event_id = int(header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID inválido")
+    if not events.feed.has_room():
+        raise HTTPException(status_code=503, detail="Feed de eventos indisponível", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        events.sse_stream(last_event_id, events.matcher(pet_id, user_id, status, types)),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: o nginx repassa cada evento sem esperar encher o buffer
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/events/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    pet_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    types: Optional[str] = None,
+    last_event_id: Optional[int] = None,
+):
+    """
+    O mesmo feed de `GET /events` por WebSocket: uma mensagem JSON por evento
+    (`{"type": "ping"}` a cada 15 segundos sem eventos)
+    """
+    if not events.feed.has_room():
+        await websocket.close(code=1013)  # Try Again Later
+        return
+    await websocket.accept()
+    await events.websocket_stream(websocket, last_event_id, events.matcher(pet_id, user_id, status, types))
 
 @app.delete("/users/{user_id}", tags=["Usuários"])
 async def delete_user(user_id: int, db: Session = Depends(get_db)):
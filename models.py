@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, Text, JSON, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Text, JSON, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
-from app_types import GenderEnum, SpeciesEnum, StatusEnum, AdoptionStatusEnum
+from datetime import datetime
+
+from app_types import GenderEnum, SpeciesEnum, StatusEnum, AdoptionStatusEnum, OutboxStatusEnum
+from app_types.constants import PHOTO_POSITION_GAP
 
 Base = declarative_base()
 
@@ -17,16 +20,69 @@ class Pet(Base):
     age = Column(Float)  # em meses
     gender = Column(Enum(GenderEnum), nullable=False)
     city = Column(String(100))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geo_cell = Column(Integer)  # célula da grade (ver geo.py)
     description = Column(Text)
-    photos = Column(JSON)  # Lista de URLs das fotos
+    # Legado: fotos agora ficam em pet_photos; a coluna só é lida pela
+    # migração (photos.backfill_pet_photos), que a esvazia
+    legacy_photos = Column("photos", JSON)
     status = Column(Enum(StatusEnum), default=StatusEnum.AVAILABLE)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     adopted_at = Column(DateTime, nullable=True)
     adopted_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # concorrência otimista
     
     adopter = relationship("User", back_populates="adopted_pets")
     adoption_requests = relationship("AdoptionRequest", back_populates="pet")
+    photo_rows = relationship(
+        "PetPhoto", order_by="PetPhoto.position", cascade="all, delete-orphan", back_populates="pet"
+    )
+
+    __table_args__ = (
+        # Cobre a busca por raio: células e coordenadas saem do índice
+        Index("ix_pets_geo", "geo_cell", "latitude", "longitude"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+    @property
+    def photos(self) -> list:
+        """Chaves das fotos na ordem de exibição (a primeira é a capa)"""
+        return [photo.blob_key for photo in self.photo_rows]
+
+    @photos.setter
+    def photos(self, keys) -> None:
+        # Só para pets novos: num pet que já tem fotos o flush inseriria as
+        # linhas novas antes de apagar as antigas e violaria o índice único
+        # de (pet_id, position); para substituir, ver photos.replace_photos
+        self.photo_rows = [
+            PetPhoto(position=(number + 1) * PHOTO_POSITION_GAP, blob_key=key)
+            for number, key in enumerate(keys or [])
+        ]
+
+class PetPhoto(Base):
+    """
+    Uma foto de um pet
+
+    `position` tem intervalos (múltiplos de PHOTO_POSITION_GAP) para que
+    reordenar mude só a linha movida; a menor posição é a capa.
+    """
+    __tablename__ = "pet_photos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    blob_key = Column(String(500), nullable=False)  # nome em UPLOAD_DIR ou URL externa
+    derivatives = Column(JSON)  # ex: {"thumb": "<chave>"}
+    size_bytes = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    pet = relationship("Pet", back_populates="photo_rows")
+
+    __table_args__ = (
+        Index("ix_pet_photos_pet_position", "pet_id", "position", unique=True),
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -58,3 +114,107 @@ class AdoptionRequest(Base):
 
     user = relationship("User", back_populates="adoption_requests")
     pet = relationship("Pet", back_populates="adoption_requests")
+
+    # Listagens por pet e por usuário: filtro e ordenação saem do índice
+    # (id no fim desempata pedidos criados no mesmo instante)
+    __table_args__ = (
+        Index("ix_adoption_requests_pet_status_created", "pet_id", "status", "created_at", "id"),
+        Index("ix_adoption_requests_user_created", "user_id", "created_at", "id"),
+    )
+
+
+class OutboxMessage(Base):
+    """Notificação pendente, gravada na mesma transação da mudança de estado"""
+    __tablename__ = "outbox_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event = Column(String(50), nullable=False)  # ex: adoption_request.created, pet.adopted
+    channel = Column(String(20), nullable=False)  # email, whatsapp
+    recipient_role = Column(String(20), nullable=False)  # shelter, adopter
+    recipient = Column(String(255))  # resolvido no envio quando vazio
+    payload = Column(JSON, nullable=False)
+    idempotency_key = Column(String(200), unique=True, nullable=False)
+    status = Column(Enum(OutboxStatusEnum), default=OutboxStatusEnum.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_outbox_messages_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+
+class ChangeEvent(Base):
+    """Mudança de pet ou pedido de adoção, gravada junto com ela, para GET /events (ver events.py)"""
+    __tablename__ = "change_events"
+
+    # Sem FKs: o evento de um pet apagado continua no feed
+    id = Column(Integer, primary_key=True)  # events.prune mantém o maior, para os ids não recomeçarem
+    type = Column(String(50), nullable=False)  # ex: pet.adopted, adoption_request.created
+    pet_id = Column(Integer)
+    adoption_request_id = Column(Integer)
+    user_id = Column(Integer)
+    status = Column(String(20))  # valor do status do pet ou do pedido depois da mudança
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class PetSimilarity(Base):
+    """Vizinhos mais parecidos de cada pet, pré-calculados (ver similarity.py)"""
+    __tablename__ = "pet_similarities"
+
+    pet_id = Column(Integer, ForeignKey("pets.id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # 0 = mais parecido
+    similar_pet_id = Column(Integer, ForeignKey("pets.id"), nullable=False, index=True)
+    score = Column(Float, nullable=False)
+
+
+class ArchivedPet(Base):
+    """
+    Pet adotado há mais de ARCHIVE_AFTER_DAYS, movido de pets (ver archive.py)
+
+    Somente leitura: sem chaves estrangeiras, fotos guardadas como lista.
+    """
+    __tablename__ = "archived_pets"
+
+    id = Column(Integer, primary_key=True)  # mesmo id de pets
+    name = Column(String(100), nullable=False)
+    species = Column(Enum(SpeciesEnum), nullable=False)
+    breed = Column(String(100))
+    age = Column(Float)
+    gender = Column(Enum(GenderEnum), nullable=False)
+    city = Column(String(100))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    description = Column(Text)
+    photos = Column(JSON)
+    status = Column(Enum(StatusEnum))
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    adopted_at = Column(DateTime)
+    adopted_by = Column(Integer, index=True)
+    version = Column(Integer, nullable=False, default=1)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ArchivedAdoptionRequest(Base):
+    """Pedido de adoção fechado (ou de um pet arquivado), movido de adoption_requests"""
+    __tablename__ = "archived_adoption_requests"
+
+    id = Column(Integer, primary_key=True)  # mesmo id de adoption_requests
+    user_id = Column(Integer, nullable=False)
+    pet_id = Column(Integer, nullable=False)
+    full_name = Column(String(200), nullable=False)
+    email = Column(String(255), nullable=False)
+    whatsapp = Column(String(20))
+    status = Column(Enum(AdoptionStatusEnum))
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_archived_adoption_requests_pet_created", "pet_id", "created_at"),
+        Index("ix_archived_adoption_requests_user_created", "user_id", "created_at"),
+    )
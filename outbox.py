@@ -0,0 +1,409 @@
+"""
+Transactional outbox for Pet Adoption API
+
+Os endpoints de adoção gravam as notificações (email/WhatsApp para o
+abrigo e para o adotante) na tabela outbox_messages, na mesma transação
+da mudança de estado, sem nenhuma chamada externa no caminho da
+requisição. Um worker assíncrono drena a tabela em lotes, com retries,
+backoff exponencial e chave de idempotência por mensagem.
+
+O worker roda dentro da API (OUTBOX_WORKER=inprocess) ou como processo
+separado:
+
+    python outbox.py
+"""
+
+import asyncio
+import json
+import os
+import random
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import OutboxMessage, User
+from app_types import OutboxStatusEnum
+from app_types.constants import (
+    OUTBOX_SENDER, OUTBOX_STUB_FILE, OUTBOX_BATCH_SIZE, OUTBOX_CONCURRENCY,
+    OUTBOX_MAX_ATTEMPTS, OUTBOX_BACKOFF_BASE_SECONDS, OUTBOX_BACKOFF_MAX_SECONDS,
+    OUTBOX_POLL_INTERVAL_SECONDS, OUTBOX_LEASE_SECONDS,
+    SHELTER_EMAIL, SHELTER_WHATSAPP, SMTP_HOST, SMTP_PORT, SMTP_FROM
+)
+
+# ============================================================================
+# ENFILEIRAMENTO (chamado dentro da transação do endpoint, sem commit)
+# ============================================================================
+
+def enqueue(
+    db: Session,
+    event: str,
+    channel: str,
+    recipient_role: str,
+    payload: dict,
+    key: str,
+    recipient: Optional[str] = None
+) -> None:
+    """Adicionar uma mensagem à sessão; o commit do endpoint a persiste"""
+    db.add(OutboxMessage(
+        event=event,
+        channel=channel,
+        recipient_role=recipient_role,
+        recipient=recipient,
+        payload=payload,
+        idempotency_key=key,
+    ))
+
+
+def enqueue_adoption_request_created(db: Session, adoption) -> None:
+    """Avisar o abrigo do novo pedido e confirmar o recebimento ao adotante"""
+    payload = {
+        "adoption_request_id": adoption.id,
+        "pet_id": adoption.pet_id,
+        "user_id": adoption.user_id,
+        "full_name": adoption.full_name,
+    }
+    event = "adoption_request.created"
+    prefix = f"{event}:{adoption.id}"
+    enqueue(db, event, "email", "shelter", payload, f"{prefix}:shelter:email")
+    enqueue(db, event, "email", "adopter", payload, f"{prefix}:adopter:email", recipient=adoption.email)
+    if adoption.whatsapp:
+        enqueue(db, event, "whatsapp", "adopter", payload, f"{prefix}:adopter:whatsapp", recipient=adoption.whatsapp)
+
+
+def enqueue_pet_adopted(db: Session, pet_id: int, pet_name: str, user_id: int, version: int) -> None:
+    """
+    Avisar abrigo e adotante de uma adoção
+
+    O contato do adotante é resolvido no envio a partir do user_id, para não
+    acrescentar uma consulta ao caminho da adoção. A versão do pet entra na
+    chave: se o pet voltar a ficar disponível e for adotado de novo, é outro evento.
+    """
+    payload = {"pet_id": pet_id, "pet_name": pet_name, "user_id": user_id}
+    event = "pet.adopted"
+    prefix = f"{event}:{pet_id}:v{version}"
+    enqueue(db, event, "email", "shelter", payload, f"{prefix}:shelter:email")
+    enqueue(db, event, "email", "adopter", payload, f"{prefix}:adopter:email")
+    enqueue(db, event, "whatsapp", "adopter", payload, f"{prefix}:adopter:whatsapp")
+
+
+def enqueue_adoption_request_rejected(db: Session, adoption_id: int, pet_id: int, email: str, whatsapp: Optional[str]) -> None:
+    """Avisar o adotante de que o pedido foi recusado"""
+    payload = {"adoption_request_id": adoption_id, "pet_id": pet_id}
+    event = "adoption_request.rejected"
+    prefix = f"{event}:{adoption_id}"
+    enqueue(db, event, "email", "adopter", payload, f"{prefix}:adopter:email", recipient=email)
+    if whatsapp:
+        enqueue(db, event, "whatsapp", "adopter", payload, f"{prefix}:adopter:whatsapp", recipient=whatsapp)
+
+
+# ============================================================================
+# MENSAGENS
+# ============================================================================
+
+TEMPLATES = {
+    ("adoption_request.created", "shelter"): (
+        "Novo pedido de adoção #{adoption_request_id}",
+        "{full_name} enviou um pedido de adoção para o pet #{pet_id}."
+    ),
+    ("adoption_request.created", "adopter"): (
+        "Recebemos seu pedido de adoção",
+        "Olá, {full_name}! Recebemos seu pedido de adoção para o pet #{pet_id}. Entraremos em contato em breve."
+    ),
+    ("pet.adopted", "shelter"): (
+        "Pet adotado: {pet_name}",
+        "{pet_name} (#{pet_id}) foi adotado pelo usuário #{user_id}."
+    ),
+    ("pet.adopted", "adopter"): (
+        "Parabéns pela adoção!",
+        "A adoção de {pet_name} foi confirmada. Obrigado por adotar!"
+    ),
+    ("adoption_request.rejected", "adopter"): (
+        "Atualização do seu pedido de adoção",
+        "O pet #{pet_id} foi adotado por outra pessoa e seu pedido #{adoption_request_id} foi encerrado."
+    ),
+}
+
+
+def render(message: OutboxMessage, recipient: str) -> dict:
+    subject, body = TEMPLATES[(message.event, message.recipient_role)]
+    return {
+        "key": message.idempotency_key,
+        "channel": message.channel,
+        "recipient": recipient,
+        "subject": subject.format(**message.payload),
+        "body": body.format(**message.payload),
+    }
+
+
+# ============================================================================
+# SENDERS
+# ============================================================================
+
+class StubSender:
+    """
+    Sender local para desenvolvimento e testes: grava cada mensagem em um
+    arquivo JSONL em vez de enviar. Chaves já gravadas não são repetidas.
+    """
+
+    def __init__(self, path: str = OUTBOX_STUB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sent_keys = None
+
+    def _load_keys(self) -> set:
+        keys = set()
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        keys.add(json.loads(line)["key"])
+        return keys
+
+    def send(self, envelope: dict) -> None:
+        with self._lock:
+            if self._sent_keys is None:
+                self._sent_keys = self._load_keys()
+            if envelope["key"] in self._sent_keys:
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({**envelope, "sent_at": datetime.utcnow().isoformat()}, ensure_ascii=False) + "\n")
+            self._sent_keys.add(envelope["key"])
+
+
+class SmtpSender:
+    """
+    Envio de emails por SMTP; o Message-ID vem da chave de idempotência,
+    então reenvios após falha são reconhecidos como duplicados pelo destino.
+    WhatsApp não tem provedor configurado e cai no StubSender.
+    """
+
+    def __init__(self):
+        self.fallback = StubSender()
+
+    def send(self, envelope: dict) -> None:
+        if envelope["channel"] != "email":
+            self.fallback.send(envelope)
+            return
+
+        message = EmailMessage()
+        message["From"] = SMTP_FROM
+        message["To"] = envelope["recipient"]
+        message["Subject"] = envelope["subject"]
+        message["Message-ID"] = f"<{envelope['key']}@petadoption>"
+        message.set_content(envelope["body"])
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as smtp:
+            smtp.send_message(message)
+
+
+def get_sender():
+    if OUTBOX_SENDER == "smtp":
+        return SmtpSender()
+    return StubSender()
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def backoff_seconds(attempts: int) -> float:
+    """Backoff exponencial com jitter, limitado a OUTBOX_BACKOFF_MAX_SECONDS"""
+    delay = min(OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(db: Session, limit: int = OUTBOX_BATCH_SIZE) -> List[OutboxMessage]:
+    """
+    Reservar um lote de mensagens prontas para envio
+
+    O UPDATE condicional garante que dois workers (ou processos) não
+    peguem a mesma mensagem; mensagens presas em "processing" por um
+    worker que morreu voltam quando a reserva expira.
+    """
+    now = datetime.utcnow()
+    ready = or_(
+        (OutboxMessage.status == OutboxStatusEnum.PENDING) & (OutboxMessage.next_attempt_at <= now),
+        (OutboxMessage.status == OutboxStatusEnum.PROCESSING) & (OutboxMessage.locked_until < now),
+    )
+    candidate_ids = db.execute(
+        select(OutboxMessage.id).where(ready).order_by(OutboxMessage.id).limit(limit)
+    ).scalars().all()
+    if not candidate_ids:
+        return []
+
+    claimed_ids = db.execute(
+        update(OutboxMessage)
+        .where(OutboxMessage.id.in_(candidate_ids), ready)
+        .values(
+            status=OutboxStatusEnum.PROCESSING,
+            locked_until=now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+            attempts=OutboxMessage.attempts + 1,
+        )
+        .returning(OutboxMessage.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    if not claimed_ids:
+        return []
+
+    messages = db.query(OutboxMessage).filter(OutboxMessage.id.in_(claimed_ids)).order_by(OutboxMessage.id).all()
+    db.expunge_all()
+    return messages
+
+
+def resolve_recipients(db: Session, messages: List[OutboxMessage]) -> dict:
+    """Endereço de cada mensagem; adotantes sem contato explícito são buscados em lote"""
+    user_ids = {
+        message.payload.get("user_id") for message in messages
+        if message.recipient is None and message.recipient_role == "adopter"
+    }
+    users = {}
+    if user_ids:
+        users = {
+            user.id: user for user in
+            db.query(User.id, User.email, User.whatsapp).filter(User.id.in_(user_ids)).all()
+        }
+
+    recipients = {}
+    for message in messages:
+        if message.recipient:
+            recipients[message.id] = message.recipient
+        elif message.recipient_role == "shelter":
+            recipients[message.id] = SHELTER_EMAIL if message.channel == "email" else SHELTER_WHATSAPP
+        else:
+            user = users.get(message.payload.get("user_id"))
+            if user is not None:
+                recipients[message.id] = user.email if message.channel == "email" else user.whatsapp
+    return recipients
+
+
+def finish_batch(db: Session, sent: List[int], skipped: List[int], failed: dict, attempts: dict) -> None:
+    """Gravar o resultado do lote: enviadas e ignoradas num UPDATE cada, falhas com backoff"""
+    now = datetime.utcnow()
+    if sent:
+        db.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(sent))
+            .values(status=OutboxStatusEnum.SENT, sent_at=now, locked_until=None, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+    if skipped:
+        db.execute(
+            update(OutboxMessage).where(OutboxMessage.id.in_(skipped))
+            .values(status=OutboxStatusEnum.SKIPPED, locked_until=None, last_error="Destinatário sem contato para o canal")
+            .execution_options(synchronize_session=False)
+        )
+    for message_id, error in failed.items():
+        exhausted = attempts[message_id] >= OUTBOX_MAX_ATTEMPTS
+        db.execute(
+            update(OutboxMessage).where(OutboxMessage.id == message_id)
+            .values(
+                status=OutboxStatusEnum.FAILED if exhausted else OutboxStatusEnum.PENDING,
+                next_attempt_at=now + timedelta(seconds=backoff_seconds(attempts[message_id])),
+                locked_until=None,
+                last_error=error[:1000],
+            )
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+
+class OutboxWorker:
+    """
+    Pool de envio assíncrono: reserva lotes no banco (em thread, pois o ORM
+    é síncrono) e envia até OUTBOX_CONCURRENCY mensagens ao mesmo tempo.
+    """
+
+    def __init__(self, sender=None, concurrency: int = OUTBOX_CONCURRENCY,
+                 batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = OUTBOX_POLL_INTERVAL_SECONDS):
+        self.sender = sender or get_sender()
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Acordar o worker logo após um commit com mensagens novas"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _claim(self):
+        db = SessionLocal()
+        try:
+            messages = claim_batch(db, self.batch_size)
+            return messages, resolve_recipients(db, messages) if messages else {}
+        finally:
+            db.close()
+
+    def _finish(self, sent, skipped, failed, attempts) -> None:
+        db = SessionLocal()
+        try:
+            finish_batch(db, sent, skipped, failed, attempts)
+        finally:
+            db.close()
+
+    async def process_batch(self) -> int:
+        """Processar um lote; retorna quantas mensagens foram reservadas"""
+        messages, recipients = await asyncio.to_thread(self._claim)
+        if not messages:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        sent, skipped, failed = [], [], {}
+
+        async def deliver(message: OutboxMessage):
+            recipient = recipients.get(message.id)
+            if not recipient:
+                skipped.append(message.id)
+                return
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(self.sender.send, render(message, recipient))
+                    sent.append(message.id)
+                except Exception as e:
+                    failed[message.id] = f"{type(e).__name__}: {e}"
+
+        await asyncio.gather(*(deliver(message) for message in messages))
+        attempts = {message.id: message.attempts for message in messages}
+        await asyncio.to_thread(self._finish, sent, skipped, failed, attempts)
+        return len(messages)
+
+    async def run_forever(self) -> None:
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                processed = await self.process_batch()
+            except Exception as e:
+                print(f"❌ Erro no worker do outbox: {e}")
+                processed = 0
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+worker = OutboxWorker()
+
+
+if __name__ == "__main__":
+    print("📬 Worker do outbox iniciado")
+    asyncio.run(worker.run_forever())
@@ -0,0 +1,188 @@
+"""
+Pet photos for Pet Adoption API
+
+Cada foto é uma linha de pet_photos (pet_id, position, blob_key,
+derivatives, size_bytes). As posições têm intervalos de
+PHOTO_POSITION_GAP, então:
+
+- adicionar fotos insere linhas depois da última posição
+- substituir a lista inteira (PUT /pets/{id}) mantém as linhas das fotos
+  que continuam e só insere as novas
+- mover uma foto atualiza só a posição dela (o meio entre as vizinhas);
+  só quando o intervalo acaba as fotos do pet são renumeradas
+- apagar remove uma linha
+
+A capa é a foto de menor posição (ver serialization.pet_column).
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Integer, String, delete, func, insert, literal, null, select, update
+from sqlalchemy.orm import Session
+
+from models import Pet, PetPhoto
+from app_types.constants import PHOTO_POSITION_GAP, UPLOAD_DIR
+
+PHOTO_FIELDS = ("id", "position", "blob_key", "derivatives", "size_bytes")
+
+
+def list_photos(db: Session, pet_id: int) -> List[dict]:
+    rows = db.execute(
+        select(*(PetPhoto.__table__.c[field] for field in PHOTO_FIELDS))
+        .where(PetPhoto.pet_id == pet_id)
+        .order_by(PetPhoto.position)
+    )
+    return [dict(zip(PHOTO_FIELDS, row)) for row in rows]
+
+
+def append_photos(db: Session, pet_id: int, files: List[Tuple[str, Optional[int]]]) -> List[int]:
+    """
+    Inserir fotos (blob_key, size_bytes) depois da última; retorna os ids (sem commit)
+
+    A posição sai do próprio INSERT (última + PHOTO_POSITION_GAP), não de
+    um SELECT anterior: no SQLite o comando já roda com o lock de escrita.
+    No Postgres dois uploads simultâneos ainda podem calcular a mesma
+    posição; o perdedor recebe IntegrityError e refaz a transação.
+    """
+    ids = []
+    for key, size in files:
+        next_row = select(
+            literal(pet_id, Integer),
+            func.coalesce(func.max(PetPhoto.position), 0) + PHOTO_POSITION_GAP,
+            literal(key, String),
+            literal(size, Integer),
+        ).where(PetPhoto.pet_id == pet_id)
+        ids.append(db.execute(
+            insert(PetPhoto)
+            .from_select(["pet_id", "position", "blob_key", "size_bytes"], next_row)
+            .returning(PetPhoto.id)
+        ).scalar_one())
+    return ids
+
+
+def replace_photos(db: Session, pet_id: int, keys: List[str]) -> List[dict]:
+    """
+    Deixar o pet com exatamente estas fotos, nesta ordem; retorna as linhas removidas (sem commit)
+
+    Fotos que continuam mantêm a linha (derivados, tamanho); as que saíram
+    são apagadas antes das novas serem inseridas, e as que ficam passam por
+    posições negativas, para nenhum comando violar o índice único.
+    """
+    current = db.execute(
+        select(PetPhoto.id, PetPhoto.blob_key, PetPhoto.derivatives)
+        .where(PetPhoto.pet_id == pet_id)
+        .order_by(PetPhoto.position)
+    ).all()
+    available = {}
+    for row in current:
+        available.setdefault(row.blob_key, []).append(row)
+
+    order = []  # (id da linha mantida ou None, blob_key)
+    for key in keys:
+        rows = available.get(key)
+        order.append((rows.pop(0).id if rows else None, key))
+    removed = [row for rows in available.values() for row in rows]
+
+    if removed:
+        db.execute(delete(PetPhoto).where(PetPhoto.id.in_([row.id for row in removed])))
+    for number, (photo_id, _) in enumerate(order):
+        if photo_id is not None:
+            db.execute(update(PetPhoto).where(PetPhoto.id == photo_id).values(position=-(number + 1)))
+    new_rows = []
+    for number, (photo_id, key) in enumerate(order):
+        position = (number + 1) * PHOTO_POSITION_GAP
+        if photo_id is None:
+            new_rows.append({"pet_id": pet_id, "position": position, "blob_key": key})
+        else:
+            db.execute(update(PetPhoto).where(PetPhoto.id == photo_id).values(position=position))
+    if new_rows:
+        db.execute(insert(PetPhoto), new_rows)
+    return [{"blob_key": row.blob_key, "derivatives": row.derivatives or {}} for row in removed]
+
+
+def renumber(db: Session, pet_id: int, order: List[int]) -> None:
+    """Regravar as posições na ordem dada, com intervalos de novo"""
+    # Em duas etapas (negativas, depois as finais) para não violar o índice único
+    for number, photo_id in enumerate(order):
+        db.execute(update(PetPhoto).where(PetPhoto.id == photo_id).values(position=-(number + 1)))
+    for number, photo_id in enumerate(order):
+        db.execute(update(PetPhoto).where(PetPhoto.id == photo_id).values(position=(number + 1) * PHOTO_POSITION_GAP))
+
+
+def move_photo(db: Session, pet_id: int, photo_id: int, index: int) -> bool:
+    """
+    Mover a foto para a posição `index` (0 = capa); False se ela não é do pet (sem commit)
+
+    Normalmente só a linha movida muda de posição.
+    """
+    order = db.execute(
+        select(PetPhoto.id, PetPhoto.position).where(PetPhoto.pet_id == pet_id).order_by(PetPhoto.position)
+    ).all()
+    ids = [row.id for row in order]
+    if photo_id not in ids:
+        return False
+
+    others = [row for row in order if row.id != photo_id]
+    index = max(0, min(index, len(others)))
+    before = others[index - 1].position if index > 0 else 0
+    after = others[index].position if index < len(others) else before + 2 * PHOTO_POSITION_GAP
+    if after - before > 1:
+        db.execute(update(PetPhoto).where(PetPhoto.id == photo_id).values(position=(before + after) // 2))
+    else:
+        # Sem espaço entre as vizinhas: renumerar as fotos deste pet
+        ids.remove(photo_id)
+        ids.insert(index, photo_id)
+        renumber(db, pet_id, ids)
+    return True
+
+
+def delete_photo(db: Session, pet_id: int, photo_id: int) -> Optional[dict]:
+    """Apagar a foto; retorna a linha apagada ou None se ela não é do pet (sem commit)"""
+    row = db.execute(
+        delete(PetPhoto)
+        .where(PetPhoto.id == photo_id, PetPhoto.pet_id == pet_id)
+        .returning(PetPhoto.blob_key, PetPhoto.derivatives)
+    ).first()
+    return None if row is None else {"blob_key": row.blob_key, "derivatives": row.derivatives or {}}
+
+
+def remove_files(photo: dict) -> None:
+    """Apagar do disco os arquivos enviados (URLs externas são ignoradas)"""
+    for key in [photo["blob_key"], *photo["derivatives"].values()]:
+        if "/" in key:
+            continue
+        path = os.path.join(UPLOAD_DIR, key)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def backfill_pet_photos(db: Session, batch_size: int = 1000) -> int:
+    """
+    Migrar pets.photos (JSON) para pet_photos
+
+    Cada pet migrado tem a coluna antiga esvaziada na mesma transação,
+    então rodar de novo não duplica nem ressuscita fotos apagadas.
+    """
+    migrated = 0
+    while True:
+        pets = db.execute(
+            select(Pet.id, Pet.legacy_photos).where(Pet.legacy_photos.isnot(None)).limit(batch_size)
+        ).all()
+        if not pets:
+            return migrated
+        rows = [
+            {"pet_id": pet_id, "position": (number + 1) * PHOTO_POSITION_GAP, "blob_key": key}
+            for pet_id, keys in pets
+            for number, key in enumerate(keys or [])
+        ]
+        if rows:
+            db.execute(insert(PetPhoto), rows)
+        db.execute(
+            update(Pet)
+            .where(Pet.id.in_([pet_id for pet_id, _ in pets]))
+            .values(legacy_photos=null())  # NULL do SQL; None viraria o JSON 'null'
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        migrated += len(pets)
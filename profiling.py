@@ -0,0 +1,204 @@
+"""
+On-demand request profiling for Pet Adoption API
+
+Profiler por amostragem: enquanto uma requisição marcada para profiling
+roda, uma thread lê a pilha do thread do event loop a cada
+PROFILE_INTERVAL_SECONDS. Como os handlers são async e chamam o ORM de
+forma síncrona, é ali que aparecem o código de main.py, a validação do
+Pydantic e as chamadas do SQLAlchemy. Trabalho enviado ao threadpool não
+entra nas amostras, e outras requisições atendidas ao mesmo tempo pelo
+mesmo worker entram.
+
+Uma requisição é perfilada quando:
+
+- traz o header X-Profile-Token (ou ?profile=) igual a PROFILE_TOKEN
+- ou é a N-ésima do worker, com PROFILE_SAMPLE_EVERY=N
+
+Cada perfil é gravado em PROFILE_DIR no formato "folded" (uma pilha por
+linha com a contagem de amostras), aceito pelo flamegraph.pl e pelo
+speedscope. Só os PROFILE_MAX_FILES mais recentes são mantidos. Sem
+PROFILE_TOKEN nem PROFILE_SAMPLE_EVERY o middleware nem é registrado.
+"""
+
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app_types.constants import (
+    PROFILE_TOKEN, PROFILE_SAMPLE_EVERY, PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_INTERVAL_SECONDS
+)
+
+PROFILE_NAME = re.compile(r"^[\w.-]+\.folded$")
+
+
+def enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_EVERY > 0
+
+
+def token_matches(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def frame_label(code) -> str:
+    # co_qualname (Classe.método) só existe no Python 3.11+
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def stack_key(frame) -> str:
+    """Pilha da raiz até o frame, no formato folded ("a;b;c")"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Sampler:
+    """Uma thread por processo, ativa só enquanto há requisições sendo perfiladas"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._profiles = {}  # id -> (thread alvo, Counter de pilhas)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, thread_id: int) -> int:
+        with self._lock:
+            profile_id = next(self._ids)
+            self._profiles[profile_id] = (thread_id, Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        return profile_id
+
+    def end(self, profile_id: int) -> Counter:
+        with self._lock:
+            return self._profiles.pop(profile_id)[1]
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for thread_id, samples in self._profiles.values():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != me:
+                        samples[stack_key(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def reset(self) -> None:
+        # O thread de amostragem não sobrevive ao fork
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+
+sampler = Sampler()
+os.register_at_fork(after_in_child=sampler.reset)
+
+
+def save(samples: Counter, method: str, path: str, status: int, elapsed_ms: float,
+         directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES) -> str:
+    """Gravar o perfil e apagar os mais antigos além de max_files; retorna o nome do arquivo"""
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^\w-]+", "-", path.strip("/")) or "root"
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    name = f"{stamp}_{os.getpid()}_{method}_{slug[:60]}_{status}_{elapsed_ms:.0f}ms.folded"
+    with open(os.path.join(directory, name), "w") as file:
+        for stack, count in samples.most_common():
+            file.write(f"{stack} {count}\n")
+
+    names = sorted(entry for entry in os.listdir(directory) if PROFILE_NAME.match(entry))
+    for old in names[:-max_files]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            pass  # outro worker apagou antes
+    return name
+
+
+def list_profiles(directory: str = PROFILE_DIR) -> List[dict]:
+    """Perfis gravados, do mais recente ao mais antigo"""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if PROFILE_NAME.match(name):
+            stat = os.stat(os.path.join(directory, name))
+            profiles.append({"name": name, "size_bytes": stat.st_size, "created_at": datetime.utcfromtimestamp(stat.st_mtime)})
+    return profiles
+
+
+def profile_path(name: str, directory: str = PROFILE_DIR) -> Optional[str]:
+    """Caminho do perfil, ou None se o nome é inválido ou não existe"""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(directory, name)
+    return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    """
+    Perfilar as requisições pedidas (token) ou sorteadas (1 a cada N)
+    """
+
+    def __init__(self, app, sample_every: int = PROFILE_SAMPLE_EVERY):
+        self.app = app
+        self.sample_every = sample_every
+        self._counter = itertools.count(1)
+
+    def wanted(self, scope) -> bool:
+        if self.sample_every and next(self._counter) % self.sample_every == 0:
+            return True
+        if not PROFILE_TOKEN:
+            return False
+        token = Headers(scope=scope).get("x-profile-token")
+        if token is None and b"profile=" in scope["query_string"]:
+            token = parse_qs(scope["query_string"].decode()).get("profile", [None])[0]
+        return token_matches(token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        profile_id = sampler.begin(threading.get_ident())
+        status = 500
+        name = None
+
+        async def send_with_profile_id(message):
+            nonlocal status, name
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # O nome é decidido antes do corpo para ir no header X-Profile-Id
+                samples = sampler.end(profile_id)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                name = save(samples, scope["method"], scope["path"], status, elapsed_ms)
+                headers = MutableHeaders(scope=message)
+                headers["X-Profile-Id"] = name
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            if name is None:
+                # Terminou sem resposta (exceção): o perfil ainda é útil
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                save(sampler.end(profile_id), scope["method"], scope["path"], status, elapsed_ms)
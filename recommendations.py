@@ -0,0 +1,268 @@
+"""
+Pet recommendations for Pet Adoption API
+
+Ranqueia os pets disponíveis para um adotante a partir de:
+- distância até a cidade do usuário (coordenadas do gazetteer, ver geo.py)
+- espécies e idades dos pets que ele já pediu (adoption_requests)
+- popularidade: pedidos recebidos por cada pet nos últimos dias
+
+A pontuação é uma única conta vetorizada (NumPy) sobre um snapshot de
+todos os pets disponíveis, recarregado em segundo plano a cada
+RECOMMENDATION_SNAPSHOT_SECONDS. O ranking de cada usuário fica em cache
+até ele criar um novo pedido de adoção ou o cache expirar.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import String, func, select, type_coerce
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import AdoptionRequest, Pet, User
+from serialization import PET_CARD_FIELDS, select_pet_rows
+from geo import KM_PER_DEGREE, city_coordinates
+from app_types import SpeciesEnum, StatusEnum
+from app_types.constants import (
+    RECOMMENDATION_SNAPSHOT_SECONDS, RECOMMENDATION_CACHE_SECONDS, RECOMMENDATION_CACHE_SIZE,
+    RECOMMENDATION_CACHE_DEPTH, RECOMMENDATION_POPULARITY_DAYS, RECOMMENDATION_WEIGHTS,
+    RECOMMENDATION_DISTANCE_SCALE_KM, RECOMMENDATION_AGE_SCALE_MONTHS
+)
+
+try:
+    import numpy as np
+    NUMPY_INSTALLED = True
+except ImportError:
+    NUMPY_INSTALLED = False
+    np = None
+
+SPECIES_CODES = {member.name: code for code, member in enumerate(SpeciesEnum)}
+
+
+class PetFeatures:
+    """Colunas dos pets disponíveis usadas na pontuação"""
+
+    def __init__(self, rows: List[tuple], popularity: dict):
+        size = len(rows)
+        self.ids = np.zeros(size, dtype=np.int64)
+        self.species = np.zeros(size, dtype=np.int8)
+        self.age = np.full(size, np.nan)
+        self.latitude = np.full(size, np.nan)
+        self.longitude = np.full(size, np.nan)
+        self.city = np.full(size, -1, dtype=np.int32)
+        self.city_codes = {}
+        if size:
+            ids, species, age, latitude, longitude, city = zip(*rows)
+            self.ids[:] = ids
+            self.species[:] = [SPECIES_CODES[value] for value in species]
+            self.age[:] = [np.nan if value is None else value for value in age]
+            self.latitude[:] = [np.nan if value is None else value for value in latitude]
+            self.longitude[:] = [np.nan if value is None else value for value in longitude]
+            self.city[:] = [-1 if value is None else self.city_codes.setdefault(value, len(self.city_codes)) for value in city]
+
+        requests = np.array([popularity.get(pet_id, 0) for pet_id in ids], dtype=np.float64) if size else np.zeros(0)
+        top = requests.max() if size else 0
+        # log1p achata os pets virais; normalizado em [0, 1]
+        self.popularity = np.log1p(requests) / np.log1p(top) if top else np.zeros(size)
+        # Termo de proximidade por cidade do usuário: só há algumas dezenas
+        # de cidades no gazetteer, então cada uma é calculada uma vez por snapshot
+        self._proximity = {}
+        self._proximity_lock = threading.Lock()
+
+    def proximity(self, coordinates: tuple):
+        """exp(-distância / escala) de todos os pets até as coordenadas (0 sem coordenadas)"""
+        cached = self._proximity.get(coordinates)
+        if cached is None:
+            latitude, longitude = coordinates
+            north_km = (self.latitude - latitude) * KM_PER_DEGREE
+            east_km = (self.longitude - longitude) * KM_PER_DEGREE * np.cos(np.radians(latitude))
+            distance_km = np.sqrt(north_km * north_km + east_km * east_km)
+            cached = np.nan_to_num(np.exp(-distance_km / RECOMMENDATION_DISTANCE_SCALE_KM))
+            with self._proximity_lock:
+                self._proximity[coordinates] = cached
+        return cached
+
+
+class UserProfile:
+    """Preferências de um adotante extraídas do cadastro e dos pedidos anteriores"""
+
+    def __init__(self, city: Optional[str], requested: List[tuple]):
+        self.coordinates = city_coordinates(city)
+        self.city = city
+        self.requested_ids = [pet_id for pet_id, _, _ in requested]
+
+        counts = np.zeros(len(SPECIES_CODES))
+        for _, species, _ in requested:
+            counts[SPECIES_CODES[species]] += 1
+        # Sem histórico, todas as espécies valem o mesmo
+        self.species_preference = counts / counts.sum() if counts.sum() else np.full(len(counts), 1 / len(counts))
+
+        ages = [age for _, _, age in requested if age is not None]
+        self.preferred_age = float(np.mean(ages)) if ages else None
+
+
+def load_features(db: Session) -> PetFeatures:
+    rows = db.execute(
+        select(
+            Pet.id, type_coerce(Pet.species, String), Pet.age, Pet.latitude, Pet.longitude, Pet.city
+        ).where(Pet.status == StatusEnum.AVAILABLE).order_by(Pet.id)
+    ).all()
+    since = datetime.utcnow() - timedelta(days=RECOMMENDATION_POPULARITY_DAYS)
+    popularity = dict(db.execute(
+        select(AdoptionRequest.pet_id, func.count())
+        .where(AdoptionRequest.created_at >= since)
+        .group_by(AdoptionRequest.pet_id)
+    ).all())
+    return PetFeatures(rows, popularity)
+
+
+def load_profile(db: Session, user_id: int) -> Optional[UserProfile]:
+    user = db.query(User.city).filter(User.id == user_id).first()
+    if user is None:
+        return None
+    requested = db.execute(
+        select(Pet.id, type_coerce(Pet.species, String), Pet.age)
+        .join(AdoptionRequest, AdoptionRequest.pet_id == Pet.id)
+        .where(AdoptionRequest.user_id == user_id)
+    ).all()
+    return UserProfile(user.city, requested)
+
+
+def score(features: PetFeatures, profile: UserProfile):
+    """Pontuação de todos os pets de uma vez; pets já pedidos recebem -inf"""
+    weights = RECOMMENDATION_WEIGHTS
+    scores = weights["species"] * profile.species_preference[features.species]
+    scores += weights["popularity"] * features.popularity
+
+    if profile.preferred_age is not None:
+        age_gap = (features.age - profile.preferred_age) / RECOMMENDATION_AGE_SCALE_MONTHS
+        scores += weights["age"] * np.nan_to_num(np.exp(-age_gap * age_gap))
+
+    if profile.coordinates is not None:
+        scores += weights["distance"] * features.proximity(profile.coordinates)
+    elif profile.city:
+        # Cidade fora do gazetteer: vale só a cidade igual
+        scores += weights["distance"] * (features.city == features.city_codes.get(profile.city, -2))
+
+    if profile.requested_ids and len(features.ids):
+        # ids estão ordenados: busca binária em vez de comparar com todos
+        requested = np.asarray(profile.requested_ids, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(features.ids, requested), len(features.ids) - 1)
+        positions = positions[features.ids[positions] == requested]
+        scores[positions] = -np.inf
+    return scores
+
+
+def top_pets(features: PetFeatures, profile: UserProfile, k: int) -> List[tuple]:
+    """(pet_id, score) dos k melhores, do maior para o menor"""
+    scores = score(features, profile)
+    k = min(k, len(scores))
+    if k == 0:
+        return []
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    # Desempate por id, para um ranking estável
+    order = np.lexsort((features.ids[candidates], -scores[candidates]))
+    best = candidates[order]
+    return [
+        (int(pet_id), round(float(value), 4))
+        for pet_id, value in zip(features.ids[best], scores[best]) if value != -np.inf
+    ]
+
+
+class Recommender:
+    """Snapshot de features com recarga em segundo plano e cache LRU de rankings por usuário"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._features: Optional[PetFeatures] = None
+        self._loaded_at = 0.0
+        self._reloading = False
+        self._cache = OrderedDict()
+
+    def _reload_in_background(self) -> None:
+        db = SessionLocal()
+        try:
+            features = load_features(db)
+            with self._lock:
+                self._features, self._loaded_at = features, time.monotonic()
+        except Exception as e:
+            print(f"❌ Erro ao recarregar features de recomendação: {e}")
+        finally:
+            db.close()
+            self._reloading = False
+
+    def features(self, db: Session) -> PetFeatures:
+        if self._features is None:
+            features = load_features(db)
+            with self._lock:
+                self._features, self._loaded_at = features, time.monotonic()
+        elif time.monotonic() - self._loaded_at > RECOMMENDATION_SNAPSHOT_SECONDS and not self._reloading:
+            self._reloading = True
+            threading.Thread(target=self._reload_in_background, daemon=True).start()
+        return self._features
+
+    def ranking(self, db: Session, user_id: int) -> Optional[List[tuple]]:
+        """Ranking em cache do usuário (até RECOMMENDATION_CACHE_DEPTH pets); None se o usuário não existe"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and now - cached[0] < RECOMMENDATION_CACHE_SECONDS:
+                self._cache.move_to_end(user_id)
+                return cached[1]
+
+        profile = load_profile(db, user_id)
+        if profile is None:
+            return None
+        ranking = top_pets(self.features(db), profile, RECOMMENDATION_CACHE_DEPTH)
+
+        with self._lock:
+            self._cache[user_id] = (now, ranking)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > RECOMMENDATION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return ranking
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._features = None
+        self._loaded_at = 0.0
+        self._reloading = False
+        self._cache = OrderedDict()
+
+
+recommender = Recommender()
+
+
+def recommended_pets(db: Session, user_id: int, limit: int) -> Optional[List[dict]]:
+    """
+    Pets recomendados (projeção card + score); None se o usuário não existe
+
+    O ranking pode vir de um snapshot antigo, então a busca das linhas
+    confere o status e, se algum pet já foi adotado, avança no ranking.
+    """
+    ranking = recommender.ranking(db, user_id)
+    if ranking is None:
+        return None
+
+    pets = []
+    for start in range(0, len(ranking), limit * 2):
+        scores = dict(ranking[start:start + limit * 2])
+        rows = select_pet_rows(
+            db, [Pet.id.in_(scores), Pet.status == StatusEnum.AVAILABLE], fields=PET_CARD_FIELDS
+        )
+        rows.sort(key=lambda row: (-scores[row["id"]], row["id"]))
+        pets.extend({**row, "score": scores[row["id"]]} for row in rows)
+        if len(pets) >= limit:
+            break
+    return pets[:limit]
+
+# Cada worker monta o próprio snapshot depois do fork
+os.register_at_fork(after_in_child=recommender.reset)
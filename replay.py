@@ -0,0 +1,256 @@
+"""
+Replay de tráfego capturado (capture.py) contra uma instância local
+
+Reenvia as requisições dos arquivos JSONL e compara com a captura:
+latência por rota (original e no replay) e respostas diferentes (status
+e corpo). Rode contra uma cópia do banco de produção, nunca contra
+produção: POST/PUT/DELETE são reenviados.
+
+    python replay.py captures/*.jsonl                      # no ritmo original
+    python replay.py captures/*.jsonl --speed 10           # 10x mais rápido
+    python replay.py captures/*.jsonl --max --concurrency 32
+    python replay.py captures/*.jsonl --token <JWT> --report replay.json
+
+Valores removidos na captura ("[scrubbed]") são enviados como
+--scrubbed-value; requisições que tinham Authorization usam --token. Sem
+isso, login e rotas autenticadas respondem 401/422 e aparecem como
+diferença. Uploads multipart e corpos grandes demais não foram gravados e
+são pulados. O controle de admissão limita por IP: para medir latência
+com volume alto, rode a instância local com ADMISSION_CONTROL=off.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import List, Optional
+from urllib.parse import parse_qsl
+
+import httpx
+
+from capture import SCRUBBED
+
+# Campos que mudam a cada execução e não contam como diferença
+DEFAULT_IGNORE = ("timestamp", "created_at", "updated_at", "approved_at", "access_token", "expires_at")
+MAX_DIFF_PATHS = 5
+
+
+def load(paths: List[str], limit: Optional[int] = None) -> List[dict]:
+    entries = []
+    for path in paths:
+        with open(path, "rb") as file:
+            entries.extend(json.loads(line) for line in file if line.strip())
+    entries.sort(key=lambda entry: entry["t"])
+    return entries[:limit] if limit else entries
+
+
+def percentile(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def unscrub(value, replacement: str):
+    if value == SCRUBBED:
+        return replacement
+    if isinstance(value, dict):
+        return {key: unscrub(item, replacement) for key, item in value.items()}
+    if isinstance(value, list):
+        return [unscrub(item, replacement) for item in value]
+    return value
+
+
+def diff_paths(original, replayed, ignore: frozenset, path: str = "") -> List[str]:
+    """Caminhos (ex: "items[3].status") em que as duas respostas JSON diferem"""
+    if original == SCRUBBED:
+        return []
+    if isinstance(original, dict) and isinstance(replayed, dict):
+        differences = []
+        for key in original.keys() | replayed.keys():
+            if key in ignore:
+                continue
+            if key not in original or key not in replayed:
+                differences.append(f"{path}.{key}".lstrip("."))
+            else:
+                differences.extend(diff_paths(original[key], replayed[key], ignore, f"{path}.{key}"))
+        return differences
+    if isinstance(original, list) and isinstance(replayed, list):
+        if len(original) != len(replayed):
+            return [f"{path}[len {len(original)} != {len(replayed)}]".lstrip(".")]
+        differences = []
+        for index, (left, right) in enumerate(zip(original, replayed)):
+            differences.extend(diff_paths(left, right, ignore, f"{path}[{index}]"))
+        return differences
+    return [] if original == replayed else [path.lstrip(".") or "(corpo)"]
+
+
+class Replayer:
+    def __init__(self, base_url: str, token: Optional[str], scrubbed_value: str,
+                 ignore: frozenset, concurrency: int):
+        self.base_url = base_url
+        self.token = token
+        self.scrubbed_value = scrubbed_value
+        self.ignore = ignore
+        self.concurrency = concurrency
+        self.results: List[dict] = []
+        self.skipped = Counter()
+
+    def build(self, entry: dict) -> Optional[dict]:
+        if "body_omitted" in entry:
+            self.skipped[entry["body_omitted"]] += 1
+            return None
+        headers = dict(entry.get("headers", {}))
+        if entry.get("authenticated") and self.token:
+            headers["authorization"] = f"Bearer {self.token}"
+        params = [(key, self.scrubbed_value if value == SCRUBBED else value)
+                  for key, value in parse_qsl(entry.get("query", ""), keep_blank_values=True)]
+        request = {"method": entry["method"], "url": entry["path"], "params": params, "headers": headers}
+        if "json" in entry:
+            request["json"] = unscrub(entry["json"], self.scrubbed_value)
+            request["headers"].pop("content-type", None)
+        elif "form" in entry:
+            request["data"] = unscrub(entry["form"], self.scrubbed_value)
+            request["headers"].pop("content-type", None)
+        return request
+
+    async def send(self, client: httpx.AsyncClient, entry: dict) -> None:
+        request = self.build(entry)
+        if request is None:
+            return
+        started = time.perf_counter()
+        try:
+            response = await client.request(**request)
+        except httpx.HTTPError as e:
+            self.results.append({"entry": entry, "error": f"{type(e).__name__}: {e}", "duration_ms": None})
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        differences = []
+        if response.status_code != entry["status"]:
+            differences.append(f"status {entry['status']} -> {response.status_code}")
+        elif "response_json" in entry:
+            try:
+                differences.extend(diff_paths(entry["response_json"], response.json(), self.ignore))
+            except ValueError:
+                differences.append("(corpo não é JSON)")
+        elif hashlib.sha1(response.content).hexdigest() != entry["response_sha1"]:
+            # Resposta grande ou não JSON: só o hash foi gravado
+            differences.append("(corpo, hash)")
+        self.results.append({"entry": entry, "status": response.status_code,
+                             "duration_ms": duration_ms, "differences": differences})
+
+    async def run(self, entries: List[dict], speed: Optional[float]) -> float:
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=60) as client:
+            started = time.perf_counter()
+            if speed is None:
+                # Vazão máxima: `concurrency` clientes tirando da mesma fila
+                pending = iter(entries)
+
+                async def worker():
+                    for entry in pending:
+                        await self.send(client, entry)
+
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            else:
+                # Ritmo original (dividido por speed): cada requisição sai no seu instante
+                first = entries[0]["t"] if entries else 0.0
+                tasks = []
+                for entry in entries:
+                    delay = (entry["t"] - first) / speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    tasks.append(asyncio.create_task(self.send(client, entry)))
+                await asyncio.gather(*tasks)
+            return time.perf_counter() - started
+
+    def report(self, elapsed: float) -> dict:
+        routes = defaultdict(list)
+        for result in self.results:
+            entry = result["entry"]
+            routes[f"{entry['method']} {entry.get('route') or entry['path']}"].append(result)
+
+        summary = {}
+        for route, results in sorted(routes.items(), key=lambda item: -len(item[1])):
+            replayed = [result["duration_ms"] for result in results if result["duration_ms"] is not None]
+            original = [result["entry"]["duration_ms"] for result in results]
+            differing = [result for result in results if result.get("differences") or result.get("error")]
+            summary[route] = {
+                "count": len(results),
+                "original_p50_ms": round(percentile(original, 0.5), 2),
+                "original_p99_ms": round(percentile(original, 0.99), 2),
+                "replay_p50_ms": round(percentile(replayed, 0.5), 2) if replayed else None,
+                "replay_p90_ms": round(percentile(replayed, 0.9), 2) if replayed else None,
+                "replay_p99_ms": round(percentile(replayed, 0.99), 2) if replayed else None,
+                "replay_max_ms": round(max(replayed), 2) if replayed else None,
+                "differences": len(differing),
+                "examples": [
+                    {"path": result["entry"]["path"], "query": result["entry"].get("query", ""),
+                     "differences": result.get("differences", [])[:MAX_DIFF_PATHS] or [result.get("error")]}
+                    for result in differing[:3]
+                ],
+            }
+        latencies = [result["duration_ms"] for result in self.results if result["duration_ms"] is not None]
+        return {
+            "requests": len(self.results),
+            "skipped": dict(self.skipped),
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(len(self.results) / elapsed, 1) if elapsed else None,
+            "replay_p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+            "replay_p99_ms": round(percentile(latencies, 0.99), 2) if latencies else None,
+            "routes": summary,
+        }
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['requests']} requisições em {report['elapsed_s']}s ({report['throughput_rps']} req/s), "
+          f"p50={report['replay_p50_ms']}ms p99={report['replay_p99_ms']}ms, puladas: {report['skipped'] or 0}")
+    print(f"{'rota':<44} {'n':>6} {'orig p50':>9} {'orig p99':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'dif':>5}")
+    for route, stats in report["routes"].items():
+        print(f"{route[:44]:<44} {stats['count']:>6} {stats['original_p50_ms']:>9} {stats['original_p99_ms']:>9} "
+              f"{stats['replay_p50_ms']:>9} {stats['replay_p90_ms']:>9} {stats['replay_p99_ms']:>9} {stats['differences']:>5}")
+    for route, stats in report["routes"].items():
+        for example in stats["examples"]:
+            query = f"?{example['query']}" if example["query"] else ""
+            print(f"  ≠ {route}: {example['path']}{query} -> {', '.join(map(str, example['differences']))}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reproduzir tráfego capturado contra uma instância local")
+    parser.add_argument("files", nargs="+", help="arquivos capture-*.jsonl")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--speed", type=float, default=1.0, help="multiplicador do ritmo original (padrão 1)")
+    mode.add_argument("--max", action="store_true", help="vazão máxima, ignorando o ritmo original")
+    parser.add_argument("--concurrency", type=int, default=16, help="conexões simultâneas")
+    parser.add_argument("--limit", type=int, help="reproduzir só as N primeiras requisições")
+    parser.add_argument("--token", help="Bearer token para as requisições que eram autenticadas")
+    parser.add_argument("--scrubbed-value", default=SCRUBBED, help="valor enviado no lugar dos campos removidos")
+    parser.add_argument("--ignore", action="append", default=list(DEFAULT_IGNORE),
+                        help="campo JSON que não conta como diferença (repetível)")
+    parser.add_argument("--report", help="gravar o relatório completo em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    if not args.max and args.speed <= 0:
+        parser.error("--speed deve ser maior que zero (use --max para vazão máxima)")
+
+    entries = load(args.files, args.limit)
+    if not entries:
+        print("Nenhuma requisição nos arquivos")
+        return 1
+
+    replayer = Replayer(args.base_url, args.token, args.scrubbed_value, frozenset(args.ignore), args.concurrency)
+    elapsed = asyncio.run(replayer.run(entries, None if args.max else args.speed))
+    report = replayer.report(elapsed)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,12 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
-from app_types import GenderEnum, SpeciesEnum, StatusEnum, AdoptionStatusEnum
+from app_types import GenderEnum, SpeciesEnum, StatusEnum, AdoptionStatusEnum, PetViewEnum
 from app_types.constants import (
     MAX_NAME_LENGTH, MAX_BREED_LENGTH, MAX_CITY_LENGTH, 
     MAX_DESCRIPTION_LENGTH, MAX_EMAIL_LENGTH, MAX_WHATSAPP_LENGTH, 
-    MAX_FULL_NAME_LENGTH, MIN_AGE_MONTHS, MAX_AGE_MONTHS
+    MAX_FULL_NAME_LENGTH, MIN_AGE_MONTHS, MAX_AGE_MONTHS, BULK_UPDATE_MAX_IDS, PET_BATCH_MAX_IDS
 )
 
 class PetBase(BaseModel):
@@ -16,6 +16,8 @@ class PetBase(BaseModel):
     age: Optional[float] = Field(None, ge=MIN_AGE_MONTHS, le=MAX_AGE_MONTHS)  # idade em meses
     gender: GenderEnum
     city: Optional[str] = Field(None, max_length=MAX_CITY_LENGTH)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)  # sem coordenadas, usa a cidade
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     description: Optional[str] = Field(None, max_length=MAX_DESCRIPTION_LENGTH)
     photos: Optional[List[str]] = []
 
@@ -29,9 +31,12 @@ class PetUpdate(BaseModel):
     age: Optional[float] = Field(None, ge=MIN_AGE_MONTHS, le=MAX_AGE_MONTHS)
     gender: Optional[GenderEnum] = None
     city: Optional[str] = Field(None, max_length=MAX_CITY_LENGTH)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     description: Optional[str] = Field(None, max_length=MAX_DESCRIPTION_LENGTH)
     photos: Optional[List[str]] = None
     status: Optional[StatusEnum] = None
+    version: Optional[int] = Field(None, description="Versão lida pelo cliente; se diferente da atual, retorna 409")
 
 class PetResponse(PetBase):
     id: int
@@ -40,10 +45,62 @@ class PetResponse(PetBase):
     updated_at: Optional[datetime] = None
     adopted_at: Optional[datetime] = None
     adopted_by: Optional[int] = None
+    version: int = 1
 
     class Config:
         from_attributes = True
 
+class PetNearbyResponse(PetResponse):
+    """Pet de uma busca por raio (lat/lon), com a distância até o ponto"""
+    distance_km: float
+
+class PetCardResponse(BaseModel):
+    """Projeção compacta para cards de listagem (view=card)"""
+    id: int
+    name: str
+    species: SpeciesEnum
+    gender: GenderEnum
+    age: Optional[float] = None
+    city: Optional[str] = None
+    photo: Optional[str] = None  # primeira foto
+
+    class Config:
+        from_attributes = True
+
+class PetBatchRequest(BaseModel):
+    """Corpo de POST /pets/batch, para listas longas demais para a URL"""
+    ids: List[int] = Field(..., min_length=1, max_length=PET_BATCH_MAX_IDS)
+    fields: Optional[str] = Field(None, description="Campos separados por vírgula (ex: id,name,city)")
+    view: Optional[PetViewEnum] = None
+
+class PetRecommendationResponse(PetCardResponse):
+    """Pet recomendado, com a pontuação usada no ranking"""
+    score: float
+
+class PetSimilarResponse(PetCardResponse):
+    """Pet parecido, com a similaridade (0 a 1) em relação ao pet consultado"""
+    score: float
+
+class PetFacetsResponse(BaseModel):
+    """Contagens por valor de cada filtro (GET /pets/facets); "unknown" agrupa os nulos"""
+    total: int
+    species: Dict[str, int]
+    gender: Dict[str, int]
+    status: Dict[str, int]
+    city: Dict[str, int]
+    age: Dict[str, int]  # faixas em meses: "0-12", "12-36", "36-96", "96+"
+
+class PetPhotoResponse(BaseModel):
+    """Uma foto de pet_photos; `blob_key` é o nome em /uploads ou uma URL externa"""
+    id: int
+    position: int
+    blob_key: str
+    derivatives: Optional[Dict[str, str]] = None
+    size_bytes: Optional[int] = None
+
+class PetPhotoMove(BaseModel):
+    index: int = Field(..., ge=0, description="Nova posição da foto na ordem de exibição (0 = capa)")
+
 class PetFilter(BaseModel):
     species: Optional[SpeciesEnum] = None
     gender: Optional[GenderEnum] = None
@@ -155,6 +212,35 @@ class AdoptionRequestListResponse(BaseModel):
     total: int
     page: int
     limit: int
+    counts: Dict[str, int] = {}  # pedidos por status, sem o filtro de status
+
+class AdoptionApprovalResponse(BaseModel):
+    adoption_request: AdoptionRequestResponse
+    pet: PetResponse
+    rejected_request_ids: List[int]
+
+class AdoptionRequestBulkFilter(BaseModel):
+    status: Optional[AdoptionStatusEnum] = None
+    pet_id: Optional[int] = None
+    user_id: Optional[int] = None
+    created_before: Optional[datetime] = None
+
+class AdoptionRequestBulkUpdate(BaseModel):
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=BULK_UPDATE_MAX_IDS)
+    filter: Optional[AdoptionRequestBulkFilter] = None
+    status: AdoptionStatusEnum
+
+class AdoptionRequestBulkOutcome(BaseModel):
+    id: int
+    outcome: str  # updated, unchanged, conflict, not_found
+
+class AdoptionRequestBulkResult(BaseModel):
+    status: AdoptionStatusEnum
+    updated: int
+    unchanged: int
+    conflict: int
+    not_found: int
+    results: List[AdoptionRequestBulkOutcome]
 
 class PetListResponse(BaseModel):
     pets: List[PetResponse]
@@ -0,0 +1,151 @@
+"""
+Fast serialization path for Pet Adoption API
+
+Listagens de pets selecionam tuplas com SQLAlchemy Core (sem instanciar
+objetos ORM), montam os dicionários na ordem dos campos de PetResponse e
+codificam com orjson. A saída é idêntica à do caminho response_model.
+
+Projeções (fields=... ou view=card) são levadas até o SELECT, então
+colunas não pedidas nem saem do banco.
+"""
+
+import json
+import math
+from typing import Any, Iterable, List, Optional, Sequence
+
+from fastapi.responses import Response
+from pydantic_core import to_jsonable_python
+from sqlalchemy import null, select
+from sqlalchemy.orm import Session
+
+from models import Pet, PetPhoto
+from schemas import PetResponse, PetCardResponse
+from app_types import PetViewEnum
+
+try:
+    import orjson
+    ORJSON_INSTALLED = True
+except ImportError:
+    ORJSON_INSTALLED = False
+    orjson = None
+
+# Mesma ordem de campos que o FastAPI usa ao serializar PetResponse
+PET_RESPONSE_FIELDS = tuple(PetResponse.model_fields)
+PET_CARD_FIELDS = tuple(PetCardResponse.model_fields)
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Codificar conteúdo em JSON compacto
+
+    orjson com OPT_UTC_Z formata datas como o Pydantic ("Z" para UTC);
+    o fallback reproduz o JSONResponse do Starlette.
+    """
+    if ORJSON_INSTALLED:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(
+        to_jsonable_python(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """Resposta JSON para conteúdo já validado (não passa pelo response_model)"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def resolve_pet_fields(fields: Optional[str] = None, view: Optional[PetViewEnum] = None) -> tuple:
+    """
+    Resolver a projeção pedida em uma tupla de campos
+
+    `fields` é uma lista separada por vírgulas de campos de PetResponse;
+    `id` é sempre incluído. Levanta ValueError para campos desconhecidos.
+    """
+    if view == PetViewEnum.CARD:
+        return PET_CARD_FIELDS
+    if not fields:
+        return PET_RESPONSE_FIELDS
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(PET_RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos inválidos: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(field for field in PET_RESPONSE_FIELDS if field in requested)
+
+
+def pet_column(field: str):
+    """Expressão SQL de um campo de resposta"""
+    if field == "photo":
+        # Capa: a foto de menor posição, uma busca no índice (pet_id, position)
+        return (
+            select(PetPhoto.blob_key)
+            .where(PetPhoto.pet_id == Pet.id)
+            .order_by(PetPhoto.position)
+            .limit(1)
+            .scalar_subquery()
+            .label("photo")
+        )
+    if field == "photos":
+        # Preenchido depois por attach_photos, numa consulta só para a página
+        return null().label("photos")
+    return Pet.__table__.c[field]
+
+
+def pet_columns(fields: Sequence[str] = PET_RESPONSE_FIELDS) -> list:
+    """Colunas da tabela pets correspondentes aos campos pedidos"""
+    return [pet_column(field) for field in fields]
+
+
+def attach_photos(db: Session, pets: List[dict]) -> List[dict]:
+    """Preencher `photos` dos pets com uma única consulta em pet_photos"""
+    if not pets or "photos" not in pets[0]:
+        return pets
+    photos = {pet["id"]: [] for pet in pets}
+    rows = db.execute(
+        select(PetPhoto.pet_id, PetPhoto.blob_key)
+        .where(PetPhoto.pet_id.in_(photos))
+        .order_by(PetPhoto.pet_id, PetPhoto.position)
+    )
+    for pet_id, blob_key in rows:
+        photos[pet_id].append(blob_key)
+    for pet in pets:
+        pet["photos"] = photos[pet["id"]]
+    return pets
+
+
+def select_pet_rows(
+    db: Session,
+    conditions: Iterable = (),
+    skip: int = 0,
+    limit: Optional[int] = None,
+    fields: Sequence[str] = PET_RESPONSE_FIELDS,
+    distance_sq=None,
+) -> List[dict]:
+    """
+    Buscar pets como dicionários simples, sem objetos ORM
+
+    Com `distance_sq` (ver geo.nearby) os pets vêm do mais próximo ao mais
+    distante e cada um ganha `distance_km`.
+    """
+    if distance_sq is None:
+        stmt = select(*pet_columns(fields)).order_by(Pet.id)
+    else:
+        stmt = select(*pet_columns(fields), distance_sq).order_by(distance_sq, Pet.id)
+    stmt = stmt.where(*conditions).offset(skip)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    rows = db.execute(stmt)
+    if distance_sq is None:
+        return attach_photos(db, [dict(zip(fields, row)) for row in rows])
+    return attach_photos(db, [
+        {**dict(zip(fields, row)), "distance_km": round(math.sqrt(row[-1]), 2)}
+        for row in rows
+    ])
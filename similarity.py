@@ -0,0 +1,407 @@
+"""
+Similar pets index for Pet Adoption API
+
+Cada pet vira um vetor esparso com feature hashing: palavras da descrição
+(TF-IDF), raça e faixa de idade, normalizado para que o produto escalar
+seja a similaridade de cosseno. Os SIMILARITY_TOP_K vizinhos mais
+parecidos da mesma espécie ficam gravados em pet_similarities, e
+GET /pets/{id}/similar é uma única leitura pela chave primária.
+
+Candidatos vêm de um índice invertido das palavras (as mais raras
+primeiro) e de pets com a mesma raça ou faixa de idade, limitados a
+SIMILARITY_MAX_CANDIDATES por consulta.
+
+Reconstrução completa: feita por init_db quando a tabela está vazia (banco
+novo ou anterior ao índice) e, depois, periodicamente (ex: cron):
+
+    python similarity.py
+
+Atualização incremental: os endpoints de escrita enfileiram o pet e uma
+thread recalcula a lista dele e a dos pets afetados. Cada worker tem o
+próprio índice em memória; antes de cada atualização ele aplica os pets
+criados, editados ou apagados por qualquer worker desde a anterior, lidos
+de change_events (ver events.py). O IDF usado é o do momento da
+atualização; a reconstrução completa recalcula tudo.
+"""
+
+import heapq
+import math
+import os
+import queue
+import re
+import threading
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, delete, func, insert, or_, select, type_coerce
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import ChangeEvent, Pet, PetSimilarity
+from serialization import PET_CARD_FIELDS, pet_columns
+from app_types import StatusEnum
+from app_types.constants import (
+    SIMILARITY_UPDATES, SIMILARITY_TOP_K, SIMILARITY_HASH_DIM, SIMILARITY_MAX_CANDIDATES, SIMILARITY_WEIGHTS
+)
+
+WORD = re.compile(r"[a-z]{3,}")
+STOPWORDS = {
+    "que", "com", "para", "por", "uma", "um", "dos", "das", "nos", "nas", "muito", "muita", "mais",
+    "bem", "esta", "ela", "ele", "seu", "sua", "tem", "sao", "como", "mas", "foi", "ser", "estar",
+}
+
+FEATURE_COLUMNS = (Pet.id, type_coerce(Pet.species, String), Pet.breed, Pet.age, Pet.description)
+# Eventos que mudam o vetor de um pet (adoção só muda o status, filtrado na leitura)
+FEATURE_EVENTS = ("pet.created", "pet.updated", "pet.deleted")
+
+
+def strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def words(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [word for word in WORD.findall(strip_accents(text)) if word not in STOPWORDS]
+
+
+def feature_dim(key: str) -> int:
+    """Dimensão do feature hashing (crc32 é estável entre processos, hash() não)"""
+    return zlib.crc32(key.encode("utf-8")) % SIMILARITY_HASH_DIM
+
+
+def age_bucket(age: Optional[float]) -> Optional[int]:
+    return None if age is None else int(age // 12)  # anos
+
+
+def normalize(vector: Dict[int, float], norm: float = 1.0) -> Dict[int, float]:
+    length = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {dim: weight * norm / length for dim, weight in vector.items()} if length else {}
+
+
+def dot(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(dim, 0.0) for dim, weight in a.items())
+
+
+class SimilarityIndex:
+    """Vetores esparsos dos pets, índice invertido das palavras e grupos por raça/idade"""
+
+    def __init__(self):
+        self.vectors: Dict[int, Dict[int, float]] = {}
+        self.species: Dict[int, str] = {}
+        self.text_dims: Dict[int, List[int]] = {}
+        self.groups: Dict[int, List[tuple]] = {}
+        self.postings: Dict[int, set] = defaultdict(set)
+        self.members: Dict[tuple, set] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def idf(self, dim: int) -> float:
+        return math.log((1 + len(self.vectors)) / (1 + len(self.postings.get(dim, ())))) + 1
+
+    def _vectorize(self, breed: Optional[str], age: Optional[float], text_counts: Counter) -> Dict[int, float]:
+        text = normalize({dim: count * self.idf(dim) for dim, count in text_counts.items()}, SIMILARITY_WEIGHTS["text"])
+        vector = dict(text)
+        if breed:
+            dim = feature_dim(f"breed:{strip_accents(breed).strip()}")
+            vector[dim] = vector.get(dim, 0.0) + SIMILARITY_WEIGHTS["breed"]
+        bucket = age_bucket(age)
+        if bucket is not None:
+            # Faixas vizinhas com meio peso: 2 e 3 anos ainda são parecidos
+            for offset, weight in ((0, 1.0), (-1, 0.5), (1, 0.5)):
+                dim = feature_dim(f"age:{bucket + offset}")
+                vector[dim] = vector.get(dim, 0.0) + SIMILARITY_WEIGHTS["age"] * weight
+        return normalize(vector)
+
+    def remove(self, pet_id: int) -> None:
+        if pet_id not in self.vectors:
+            return
+        for dim in self.text_dims.pop(pet_id):
+            self.postings[dim].discard(pet_id)
+        for group in self.groups.pop(pet_id):
+            self.members[group].discard(pet_id)
+        del self.vectors[pet_id]
+        del self.species[pet_id]
+
+    def add(
+        self, pet_id: int, species: str, breed: Optional[str], age: Optional[float], description: Optional[str],
+        vectorize: bool = True,
+    ) -> None:
+        self.remove(pet_id)
+        text_counts = Counter(feature_dim(f"word:{word}") for word in words(description))
+        breed_key = strip_accents(breed).strip() if breed else None
+        groups = [(species, "age", age_bucket(age))]
+        if breed_key:
+            groups.append((species, "breed", breed_key))
+
+        self.species[pet_id] = species
+        self.text_dims[pet_id] = list(text_counts)
+        self.groups[pet_id] = groups
+        for dim in text_counts:
+            self.postings[dim].add(pet_id)
+        for group in groups:
+            self.members[group].add(pet_id)
+        # Na carga completa os vetores são calculados depois, com o IDF final
+        self.vectors[pet_id] = self._vectorize(breed, age, text_counts) if vectorize else {}
+
+    def candidates(self, pet_id: int) -> set:
+        """Pets da mesma espécie que compartilham palavras raras, raça ou faixa de idade"""
+        species = self.species[pet_id]
+        text = (
+            (other for other in self.postings[dim] if self.species[other] == species)
+            for dim in sorted(self.text_dims[pet_id], key=lambda dim: len(self.postings[dim]))
+        )
+        groups = (self.members[group] for group in self.groups[pet_id])
+        found = set()
+        # Palavras comuns a quase todos os pets teriam milhares de candidatos:
+        # parar no limite em vez de juntar a lista inteira
+        for others in (*text, *groups):
+            for other in others:
+                if other != pet_id:
+                    found.add(other)
+                    if len(found) >= SIMILARITY_MAX_CANDIDATES:
+                        return found
+        return found
+
+    def neighbors(self, pet_id: int, k: int = SIMILARITY_TOP_K) -> List[Tuple[int, float]]:
+        """(pet_id, score) dos k mais parecidos, do maior para o menor score"""
+        if pet_id not in self.vectors:
+            return []
+        vector = self.vectors[pet_id]
+        scored = ((dot(vector, self.vectors[other]), -other) for other in self.candidates(pet_id))
+        return [(-negative_id, round(score, 4)) for score, negative_id in heapq.nlargest(k, scored) if score > 0]
+
+
+def load_index(db: Session) -> SimilarityIndex:
+    index = SimilarityIndex()
+    rows = db.execute(select(*FEATURE_COLUMNS).order_by(Pet.id)).all()
+    # Primeiro as palavras de todos (para o IDF), depois os vetores
+    for pet_id, species, breed, age, description in rows:
+        index.add(pet_id, species, breed, age, description, vectorize=False)
+    for pet_id, species, breed, age, description in rows:
+        text_counts = Counter(feature_dim(f"word:{word}") for word in words(description))
+        index.vectors[pet_id] = index._vectorize(breed, age, text_counts)
+    return index
+
+
+def write_neighbors(db: Session, lists: Dict[int, List[Tuple[int, float]]]) -> None:
+    """Substituir as listas de vizinhos dos pets informados (sem commit)"""
+    if not lists:
+        return
+    db.execute(delete(PetSimilarity).where(PetSimilarity.pet_id.in_(list(lists))))
+    rows = [
+        {"pet_id": pet_id, "rank": rank, "similar_pet_id": other, "score": score}
+        for pet_id, neighbors in lists.items()
+        for rank, (other, score) in enumerate(neighbors)
+    ]
+    if rows:
+        db.execute(insert(PetSimilarity), rows)
+
+
+def rebuild_all(db: Session, batch_size: int = 1000) -> int:
+    """Reconstrução completa do índice e da tabela; retorna quantos pets foram processados"""
+    index = load_index(db)
+    db.execute(delete(PetSimilarity))
+    batch = {}
+    for pet_id in index.vectors:
+        batch[pet_id] = index.neighbors(pet_id)
+        if len(batch) >= batch_size:
+            write_neighbors(db, batch)
+            batch = {}
+    write_neighbors(db, batch)
+    db.commit()
+    return len(index)
+
+
+def build_if_empty(db: Session) -> Optional[int]:
+    """Reconstruir tudo se há pets e nenhuma lista gravada (chamado por init_db)"""
+    if db.execute(select(PetSimilarity.pet_id).limit(1)).first() is not None:
+        return None
+    if db.execute(select(Pet.id).limit(1)).first() is None:
+        return None
+    return rebuild_all(db)
+
+
+def remove_pet_rows(db: Session, pet_id: int) -> List[int]:
+    """
+    Apagar as linhas que citam o pet (chamado antes de apagá-lo, sem commit)
+
+    Retorna os pets que o tinham como vizinho, para recalcular depois.
+    """
+    affected = db.execute(
+        delete(PetSimilarity)
+        .where(or_(PetSimilarity.pet_id == pet_id, PetSimilarity.similar_pet_id == pet_id))
+        .returning(PetSimilarity.pet_id)
+    ).scalars().all()
+    return sorted(set(affected) - {pet_id})
+
+
+def similar_pets(db: Session, pet_id: int, limit: int) -> List[dict]:
+    """Vizinhos disponíveis do pet (projeção card + score), do mais para o menos parecido"""
+    rows = db.execute(
+        select(*pet_columns(PET_CARD_FIELDS), PetSimilarity.score)
+        .join(PetSimilarity, PetSimilarity.similar_pet_id == Pet.id)
+        .where(PetSimilarity.pet_id == pet_id, Pet.status == StatusEnum.AVAILABLE)
+        .order_by(PetSimilarity.rank)
+        .limit(limit)
+    )
+    return [{**dict(zip(PET_CARD_FIELDS, row)), "score": row[-1]} for row in rows]
+
+
+class SimilarityUpdater:
+    """
+    Thread que aplica as mudanças de pets ao índice em memória e à tabela
+
+    Um pet alterado tem a própria lista recalculada, e também a dos pets
+    que o listavam e a dos seus novos vizinhos (que podem passar a listá-lo).
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[int, bool]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.index: Optional[SimilarityIndex] = None
+        self.cursor = 0  # último change_events.id aplicado ao índice
+
+    def changed(self, pet_id: int) -> None:
+        """Pet criado, editado ou apagado"""
+        self._submit(pet_id, True)
+
+    def recompute(self, pet_ids: Iterable[int]) -> None:
+        """Só recalcular as listas (ex: um vizinho foi apagado)"""
+        for pet_id in pet_ids:
+            self._submit(pet_id, False)
+
+    def _submit(self, pet_id: int, changed: bool) -> None:
+        if SIMILARITY_UPDATES != "inprocess":
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put((pet_id, changed))
+
+    def _drain(self) -> List[Tuple[int, bool]]:
+        jobs = [self._queue.get()]
+        while True:
+            try:
+                jobs.append(self._queue.get_nowait())
+            except queue.Empty:
+                return jobs
+
+    def _run(self) -> None:
+        while True:
+            jobs = self._drain()
+            db = SessionLocal()
+            try:
+                self.apply(db, jobs)
+            except Exception as e:
+                db.rollback()
+                print(f"❌ Erro ao atualizar pets parecidos: {e}")
+            finally:
+                db.close()
+
+    def sync(self, db: Session) -> None:
+        """
+        Levar ao índice os pets mudados por qualquer worker desde a última vez
+
+        Se o evento do cursor já saiu da retenção, eventos posteriores também
+        podem ter saído: o índice é carregado de novo.
+        """
+        if self.index is not None and self.cursor and db.execute(
+            select(ChangeEvent.id).where(ChangeEvent.id == self.cursor)
+        ).first() is None:
+            self.index = None
+        if self.index is None:
+            # Cursor antes da carga: o que mudar durante ela é aplicado de novo na próxima
+            self.cursor = db.execute(select(func.max(ChangeEvent.id))).scalar() or 0
+            self.index = load_index(db)
+            return
+
+        rows = db.execute(
+            select(ChangeEvent.id, ChangeEvent.type, ChangeEvent.pet_id)
+            .where(ChangeEvent.id > self.cursor)
+            .order_by(ChangeEvent.id)
+        ).all()
+        if not rows:
+            return
+        self.cursor = rows[-1].id
+        pet_ids = {row.pet_id for row in rows if row.type in FEATURE_EVENTS and row.pet_id is not None}
+        if pet_ids:
+            found = {row[0]: row for row in db.execute(select(*FEATURE_COLUMNS).where(Pet.id.in_(pet_ids))).all()}
+            for pet_id in pet_ids:
+                if pet_id in found:
+                    self.index.add(*found[pet_id])
+                else:
+                    self.index.remove(pet_id)
+
+    def apply(self, db: Session, jobs: List[Tuple[int, bool]]) -> None:
+        self.sync(db)
+        index = self.index
+
+        changed = {pet_id for pet_id, is_changed in jobs if is_changed}
+        to_recompute = {pet_id for pet_id, is_changed in jobs if not is_changed}
+        if changed:
+            rows = {row[0]: row for row in db.execute(select(*FEATURE_COLUMNS).where(Pet.id.in_(changed))).all()}
+            for pet_id in changed:
+                if pet_id in rows:
+                    index.add(*rows[pet_id])
+                else:
+                    index.remove(pet_id)
+            listed_by = db.execute(
+                select(PetSimilarity.pet_id).where(PetSimilarity.similar_pet_id.in_(changed))
+            ).scalars().all()
+            to_recompute.update(listed_by)
+            to_recompute.update(pet_id for pet_id in changed if pet_id in rows)
+
+        lists = {pet_id: index.neighbors(pet_id) for pet_id in to_recompute if pet_id in index.vectors}
+        # Novos vizinhos de um pet alterado podem passar a listá-lo
+        for pet_id in changed & set(lists):
+            for other, _ in lists[pet_id]:
+                if other not in lists:
+                    lists[other] = index.neighbors(other)
+
+        # Pets que saíram sem evento (arquivados, ver archive.py) deixam o
+        # índice, e as listas que os citavam são recalculadas sem eles
+        mentioned = {other for neighbors in lists.values() for other, _ in neighbors} | set(lists)
+        existing = set(db.execute(select(Pet.id).where(Pet.id.in_(mentioned))).scalars().all())
+        gone = mentioned - existing
+        for pet_id in gone:
+            index.remove(pet_id)
+        lists = {
+            pet_id: index.neighbors(pet_id) if any(other in gone for other, _ in neighbors) else neighbors
+            for pet_id, neighbors in lists.items() if pet_id in existing
+        }
+        write_neighbors(db, lists)
+        db.commit()
+
+    def reset(self) -> None:
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.index = None
+        self.cursor = 0
+
+
+updater = SimilarityUpdater()
+
+# Cada worker monta o próprio índice depois do fork
+os.register_at_fork(after_in_child=updater.reset)
+
+
+if __name__ == "__main__":
+    from database import init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        total = rebuild_all(db)
+        print(f"✅ Pets parecidos recalculados para {total} pets")
+    finally:
+        db.close()
@@ -14,7 +14,7 @@ source venv/bin/activate
 
 # Instalar dependências se necessário
 echo "📚 Verificando dependências..."
-pip install -q fastapi "uvicorn[standard]" sqlalchemy "pydantic[email]" python-multipart python-dotenv
+pip install -q -r requirements.txt
 
 # Inicializar banco de dados
 echo "🗄️ Inicializando banco de dados..."
@@ -30,4 +30,9 @@ echo ""
 echo "Pressione Ctrl+C para parar o servidor"
 echo ""
 
-uvicorn main:app --reload --host 0.0.0.0 --port 8000
+# ./start.sh prod -> vários workers com gunicorn (sem --reload)
+if [ "$1" = "prod" ]; then
+    gunicorn -c gunicorn.conf.py main:app
+else
+    uvicorn main:app --reload --host 0.0.0.0 --port 8000
+fi
@@ -0,0 +1,50 @@
+"""
+Fixtures dos testes: o app inteiro contra um banco SQLite temporário
+
+O app lê a configuração no import, então o ambiente é montado antes de
+importar main. Rodar a partir da raiz do repositório:
+
+    python -m pytest -q
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+DB_DIR = tempfile.mkdtemp(prefix="tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(DB_DIR, 'tests.db')}",
+    ADMISSION_CONTROL="off",
+    LOOP_WATCHDOG="off",
+    TRAFFIC_CAPTURE_SAMPLE_RATE="0",
+    OUTBOX_WORKER="off",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from budgets import measured
+from database import SessionLocal
+
+
+@pytest.fixture(scope="session")
+def client():
+    # measured: o QueryRecorder de test_budgets.py só conta o SQL das requisições
+    with TestClient(measured(main.app)) as client:
+        yield client
+    shutil.rmtree(DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
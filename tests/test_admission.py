@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+import admission
+
+
+@pytest.fixture
+def middleware(client, monkeypatch):
+    """O AdmissionMiddleware do app (desligado no conftest), ligado só neste teste"""
+    middleware = admission.stats.middleware
+    monkeypatch.setattr(middleware, "enabled", True)
+    monkeypatch.setattr(middleware, "rate_limits", {})
+    monkeypatch.setattr(middleware, "rejected", middleware.rejected.copy())
+    return middleware
+
+
+def test_exhausted_bucket_returns_429_with_retry_after(client, middleware, monkeypatch):
+    # Balde de 2 tokens que enche um token a cada 10 s
+    monkeypatch.setattr(middleware, "rate_limits", {"/pets/search": (0.1, 2)})
+    monkeypatch.setattr(middleware, "backend", admission.MemoryBackend())
+
+    statuses = [client.get("/pets/search", params={"q": "Luna"}).status_code for _ in range(2)]
+    response = client.get("/pets/search", params={"q": "Luna"})
+
+    assert statuses == [200, 200]
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 10
+    assert middleware.rejected[("search", "rate_limited")] == 1
+
+
+def test_full_queue_returns_503(client, middleware, monkeypatch):
+    limiter = admission.ConcurrencyLimiter(concurrency=1, queue=0)
+    monkeypatch.setattr(middleware, "limiters", {**middleware.limiters, "search": limiter})
+    # Outra requisição de busca ocupa a única vaga
+    assert asyncio.run(limiter.acquire(timeout=0)) is None
+
+    response = client.get("/pets/search", params={"q": "Luna"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(admission.ADMISSION_RETRY_AFTER_SECONDS)
+    assert middleware.rejected[("search", "queue_full")] == 1
+
+    limiter.release()
+    assert client.get("/pets/search", params={"q": "Luna"}).status_code == 200
@@ -0,0 +1,8 @@
+def test_adopt_response_matches_get_pet(client):
+    pet_id = client.post("/pets", json={"name": "Bytes", "species": "dog", "gender": "male", "age": 36}).json()["id"]
+
+    adopted = client.post(f"/pets/{pet_id}/adopt", json={"user_id": 1})
+
+    assert adopted.status_code == 200
+    assert adopted.json()["age"] == 36.0
+    assert adopted.content == client.get(f"/pets/{pet_id}").content
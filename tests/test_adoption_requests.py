@@ -0,0 +1,41 @@
+import main
+
+
+def create_requests(client, count):
+    pet = client.post("/pets", json={"name": "Lote", "species": "cat", "gender": "female"}).json()
+    ids = [
+        client.post("/adoption-requests", json={
+            "pet_id": pet["id"], "user_id": 1, "full_name": "Pedido", "email": "pedido@example.com"
+        }).json()["id"]
+        for _ in range(count)
+    ]
+    return pet["id"], ids
+
+
+def test_bulk_rejects_empty_filter(client):
+    response = client.patch("/adoption-requests/bulk", json={"filter": {}, "status": "rejected"})
+
+    assert response.status_code == 400
+
+
+def test_bulk_filter_is_limited_like_ids(client, monkeypatch):
+    monkeypatch.setattr(main, "BULK_UPDATE_MAX_IDS", 1)
+    pet_id, _ = create_requests(client, 2)
+
+    response = client.patch("/adoption-requests/bulk", json={"filter": {"pet_id": pet_id}, "status": "rejected"})
+
+    assert response.status_code == 400
+
+
+def test_bulk_does_not_touch_approved_requests(client):
+    pet_id, (approved, rejected) = create_requests(client, 2)
+    assert client.post(f"/adoption-requests/{approved}/approve").status_code == 200
+
+    response = client.patch("/adoption-requests/bulk", json={"filter": {"pet_id": pet_id}, "status": "pending"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["updated"], body["conflict"]) == (1, 1)
+    assert {result["id"]: result["outcome"] for result in body["results"]} == {approved: "conflict", rejected: "updated"}
+    assert client.get(f"/adoption-requests/{approved}").json()["status"] == "approved"
+    assert client.get(f"/pets/{pet_id}").json()["status"] == "adopted"
@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import archive
+from models import AdoptionRequest, ArchivedAdoptionRequest, Pet
+
+
+def archive_adopted_pet(client, db):
+    """Pet adotado (com um pedido) que já foi para o arquivo"""
+    pet_id = client.post("/pets", json={
+        "name": "Antiga", "species": "dog", "gender": "female", "photos": ["a.jpg", "b.jpg"],
+    }).json()["id"]
+    request_id = client.post("/adoption-requests", json={
+        "pet_id": pet_id, "user_id": 1, "full_name": "Adotante", "email": "adotante@example.com",
+    }).json()["id"]
+    assert client.post(f"/pets/{pet_id}/adopt", json={"user_id": 1}).status_code == 200
+    db.query(Pet).filter(Pet.id == pet_id).update({Pet.adopted_at: datetime(2000, 1, 1)})
+    db.commit()
+    assert archive.archive_pets_batch(db, cutoff=datetime(2000, 1, 2)) == 1
+    return pet_id, request_id
+
+
+def test_archived_rows_stay_readable(client, db):
+    stats = client.get("/pets/stats", params={"include_archived": True}).json()
+    pet_id, request_id = archive_adopted_pet(client, db)
+    assert db.get(Pet, pet_id) is None and db.get(AdoptionRequest, request_id) is None
+
+    pet = client.get(f"/pets/{pet_id}")
+    assert pet.status_code == 200
+    assert pet.json()["name"] == "Antiga"
+    assert pet.json()["photos"] == ["a.jpg", "b.jpg"]
+
+    adoption = client.get(f"/adoption-requests/{request_id}")
+    assert adoption.status_code == 200
+    assert adoption.json()["pet"]["name"] == "Antiga"
+
+    # A lista com include_archived junta as duas tabelas por id
+    skip = (
+        db.query(AdoptionRequest).filter(AdoptionRequest.id < request_id).count()
+        + db.query(ArchivedAdoptionRequest).filter(ArchivedAdoptionRequest.id < request_id).count()
+    )
+    page = client.get("/adoption-requests", params={"include_archived": True, "skip": skip, "limit": 1}).json()
+    assert [row["id"] for row in page] == [request_id]
+
+    after = client.get("/pets/stats", params={"include_archived": True}).json()
+    assert after["total_pets"] == stats["total_pets"] + 1
+    assert after["adopted_pets"] == stats["adopted_pets"] + 1
+
+    counts = client.get("/adoption-requests/count").json()
+    with_archive = client.get("/adoption-requests/count", params={"include_archived": True}).json()
+    assert with_archive["total"] - counts["total"] == db.query(ArchivedAdoptionRequest).count()
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import archive
+import main
+from models import Pet
+
+
+def create_pet(client, name="Lote"):
+    response = client.post("/pets", json={"name": name, "species": "cat", "gender": "female", "photos": ["a.jpg"]})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_if_none_match_returns_304(client):
+    ids = f"{create_pet(client)},{create_pet(client)}"
+    first = client.get("/pets/batch", params={"ids": ids})
+
+    again = client.get("/pets/batch", params={"ids": ids}, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert again.content == b""
+
+
+def test_etag_changes_after_put(client):
+    pet_id = create_pet(client)
+    before = client.get("/pets/batch", params={"ids": pet_id}).headers["ETag"]
+
+    client.put(f"/pets/{pet_id}", json={"description": "Agora com descrição"})
+
+    after = client.get("/pets/batch", params={"ids": pet_id}, headers={"If-None-Match": before})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before
+    assert after.json()["pets"][0]["description"] == "Agora com descrição"
+
+
+def test_etag_changes_after_photo_upload(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+    pet_id = create_pet(client)
+    before = client.get("/pets/batch", params={"ids": pet_id, "view": "card"}).headers["ETag"]
+    full = client.get("/pets/batch", params={"ids": pet_id}).headers["ETag"]
+
+    client.post(f"/pets/{pet_id}/photos", files=[("files", ("x.png", b"\x89PNG", "image/png"))])
+
+    # A capa (view=card) não muda com uma foto no fim; a lista completa muda
+    assert client.get("/pets/batch", params={"ids": pet_id, "view": "card"}).headers["ETag"] == before
+    after = client.get("/pets/batch", params={"ids": pet_id}, headers={"If-None-Match": full})
+    assert after.status_code == 200
+    assert len(after.json()["pets"][0]["photos"]) == 2
+
+
+def test_missing_lists_archived_and_unknown_ids(client, db):
+    kept, archived = create_pet(client), create_pet(client, "Arquivada")
+    assert client.post(f"/pets/{archived}/adopt", json={"user_id": 1}).status_code == 200
+    db.query(Pet).filter(Pet.id == archived).update({Pet.adopted_at: datetime(2000, 1, 1)})
+    db.commit()
+    assert archive.archive_pets_batch(db, cutoff=datetime(2000, 1, 2)) == 1
+    unknown = 10 ** 9
+
+    response = client.post("/pets/batch", json={"ids": [unknown, kept, archived, kept]})
+
+    assert response.status_code == 200
+    assert [pet["id"] for pet in response.json()["pets"]] == [kept]
+    assert response.json()["missing"] == [unknown, archived]
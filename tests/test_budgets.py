@@ -0,0 +1,172 @@
+"""
+Orçamentos de desempenho das rotas (budgets.py), um teste por @budget
+
+Semeia o banco dos testes (pets, fotos, usuários, pedidos de adoção e pets
+parecidos) e, para cada orçamento declarado em main.py, confere:
+
+- quantidade de comandos SQL da requisição <= queries
+- mediana da latência <= latency_ms x (calibração local / BUDGET_REFERENCE_CALIBRATION_MS)
+- nenhuma consulta varre inteira uma tabela de `indexed` (EXPLAIN)
+
+A calibração é a mediana de GET /health/live, que passa pela mesma pilha
+(middlewares, roteamento, serialização) sem tocar no banco. Rotas de
+escrita recebem dados novos a cada chamada (FRESH), fora da medição.
+"""
+
+import statistics
+import time
+
+import pytest
+from sqlalchemy import func, insert, select
+
+import main
+import similarity
+from benchmarks._support import seed_pets
+from budgets import QueryRecorder, full_scans, route_budgets
+from database import SessionLocal, engine
+from models import AdoptionRequest, Pet, User
+from app_types import AdoptionStatusEnum, GenderEnum, SpeciesEnum, StatusEnum
+from app_types.constants import BUDGET_REFERENCE_CALIBRATION_MS
+
+PETS = 2000
+USERS = 200
+REQUESTS_PER_USER = 10
+RUNS = 20
+
+BUDGETS = route_budgets(main.app)
+
+
+def new_pet(db) -> int:
+    pet_id = db.execute(insert(Pet).returning(Pet.id), {
+        "name": "Orçamento", "species": SpeciesEnum.DOG, "gender": GenderEnum.MALE, "status": StatusEnum.AVAILABLE,
+    }).scalar_one()
+    db.commit()
+    return pet_id
+
+
+def new_requests(db, pet_id: int, count: int) -> list:
+    ids = db.execute(insert(AdoptionRequest).returning(AdoptionRequest.id), [
+        {"user_id": 1, "pet_id": pet_id, "full_name": "Pedido", "email": "pedido@example.com",
+         "status": AdoptionStatusEnum.PENDING}
+        for _ in range(count)
+    ]).scalars().all()
+    db.commit()
+    return ids
+
+
+# Rotas de escrita: parâmetros de caminho e corpo novos para cada chamada
+FRESH = {
+    ("POST", "/pets/{pet_id}/adopt"): lambda db, ids: {"path": {"pet_id": new_pet(db)}},
+    ("DELETE", "/pets/{pet_id}"): lambda db, ids: {"path": {"pet_id": new_pet(db)}},
+    ("POST", "/adoption-requests/{adoption_id}/approve"): lambda db, ids: {
+        "path": {"adoption_id": new_requests(db, new_pet(db), 3)[0]}
+    },
+    ("PATCH", "/adoption-requests/bulk"): lambda db, ids: {
+        "json": {"ids": new_requests(db, new_pet(db), 100), "status": "rejected"}
+    },
+    ("POST", "/adoption-requests"): lambda db, ids: {
+        "json": {"pet_id": ids["pet_id"], "user_id": ids["user_id"], "full_name": "Pedido", "email": "pedido@example.com"}
+    },
+    ("POST", "/pets/{pet_id}/photos"): lambda db, ids: {
+        "files": [("files", ("foto.png", b"\x89PNG\r\n", "image/png"))]
+    },
+}
+
+
+def seed(db) -> dict:
+    """Semear o banco e retornar os valores dos parâmetros de caminho"""
+    seed_pets(engine, PETS)
+    password = db.execute(select(User.password).limit(1)).scalar()
+    first_user = db.execute(insert(User).returning(User.id), [
+        {"full_name": f"Usuário {number}", "email": f"budget{number}@example.com",
+         "password": password, "whatsapp": "11999999999", "city": "Recife"}
+        for number in range(USERS)
+    ]).scalars().first()
+    pet_ids = db.execute(select(Pet.id).order_by(Pet.id)).scalars().all()
+    statuses = list(AdoptionStatusEnum)
+    db.execute(insert(AdoptionRequest), [
+        {"user_id": first_user + number % USERS, "pet_id": pet_ids[(number * 7) % len(pet_ids)],
+         "full_name": "Pedido", "email": "pedido@example.com", "whatsapp": "11999999999",
+         "status": statuses[number % len(statuses)]}
+        for number in range(USERS * REQUESTS_PER_USER)
+    ])
+    db.commit()
+    similarity.rebuild_all(db)
+
+    # Um pet e um usuário com pedidos, para as rotas não caírem no caminho do 404
+    pet_id, user_id, adoption_id = db.execute(
+        select(AdoptionRequest.pet_id, AdoptionRequest.user_id, func.min(AdoptionRequest.id))
+        .group_by(AdoptionRequest.pet_id, AdoptionRequest.user_id).limit(1)
+    ).one()
+    return {"pet_id": pet_id, "user_id": user_id, "adoption_id": adoption_id}
+
+
+def median_ms(client, method: str, request, runs: int) -> float:
+    """Mediana da latência; `request()` monta (url, kwargs) de cada chamada, fora da medição"""
+    samples = []
+    for _ in range(runs):
+        url, kwargs = request()
+        started = time.perf_counter()
+        client.request(method, url, **kwargs)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+@pytest.fixture(scope="module")
+def budget_env(client):
+    db = SessionLocal()
+    try:
+        ids = seed(db)
+    finally:
+        db.close()
+    scale = median_ms(client, "GET", lambda: ("/health/live", {}), RUNS * 10) / BUDGET_REFERENCE_CALIBRATION_MS
+    return {"ids": ids, "scale": scale, "recorder": QueryRecorder(engine)}
+
+
+def budget_id(item) -> str:
+    route, declared = item
+    return f"{sorted(route.methods)[0]} {route.path}" + (f" [{declared.name}]" if declared.name else "")
+
+
+@pytest.mark.parametrize("route, declared", BUDGETS, ids=[budget_id(item) for item in BUDGETS])
+def test_route_within_budget(client, db, budget_env, monkeypatch, tmp_path, route, declared):
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+    method = sorted(route.methods)[0]
+    fresh = FRESH.get((method, route.path))
+
+    def request() -> tuple:
+        extra = fresh(db, budget_env["ids"]) if fresh else {}
+        kwargs = {"params": declared.params}
+        if declared.json is not None:
+            kwargs["json"] = declared.json
+        kwargs.update({key: value for key, value in extra.items() if key != "path"})
+        return route.path.format(**{**budget_env["ids"], **extra.get("path", {})}), kwargs
+
+    for _ in range(3):
+        url, kwargs = request()
+        client.request(method, url, **kwargs)
+    url, kwargs = request()
+    recorder = budget_env["recorder"]
+    recorder.start()
+    response = client.request(method, url, **kwargs)
+    statements = recorder.stop()
+
+    latency = median_ms(client, method, request, RUNS)
+    ceiling = declared.latency_ms * budget_env["scale"]
+
+    scans = {}
+    for statement, parameters in statements:
+        scans.update({
+            table: plan for table, plan in full_scans(engine, statement, parameters).items()
+            if table in declared.indexed
+        })
+
+    problems = []
+    if response.status_code >= 400:
+        problems.append(f"status {response.status_code}: {response.text[:200]}")
+    if len(statements) > declared.queries:
+        problems.append(f"{len(statements)} comandos SQL > {declared.queries}")
+    if latency > ceiling:
+        problems.append(f"mediana {latency:.1f}ms > {ceiling:.1f}ms")
+    problems.extend(f"sem índice: {plan}" for plan in scans.values())
+    assert not problems, "; ".join(problems)
@@ -0,0 +1,37 @@
+import pytest
+
+import catalog
+
+FILTERS = [
+    {},
+    {"species": "dog", "status": "available"},
+    {"gender": "female", "city": "rec"},
+    {"min_age": 12, "max_age": 36, "skip": 5, "limit": 20},
+    {"species": "cat", "city": "%o_", "limit": 100},
+]
+
+
+def use_memory_catalog(monkeypatch):
+    """PET_CATALOG=memory só durante o teste, com um snapshot novo"""
+    monkeypatch.setattr(catalog, "CATALOG_ENABLED", True)
+    monkeypatch.setattr(catalog, "catalog", catalog.PetCatalog())
+
+
+@pytest.mark.parametrize("params", FILTERS)
+def test_catalog_matches_the_sql_path(client, monkeypatch, params):
+    expected = client.get("/pets", params=params).json()
+
+    use_memory_catalog(monkeypatch)
+    assert client.get("/pets", params=params).json() == expected
+
+
+def test_catalog_sees_writes_after_loading(client, monkeypatch):
+    use_memory_catalog(monkeypatch)
+    params = {"city": "Snapshotópolis"}
+    assert client.get("/pets", params=params).json() == []
+
+    pet_id = client.post("/pets", json={"name": "Nova", "species": "cat", "gender": "female", "city": "Snapshotópolis"}).json()["id"]
+    assert [pet["id"] for pet in client.get("/pets", params=params).json()] == [pet_id]
+
+    client.delete(f"/pets/{pet_id}")
+    assert client.get("/pets", params=params).json() == []
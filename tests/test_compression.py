@@ -0,0 +1,94 @@
+import asyncio
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+import compression
+from compression import CompressionMiddleware, negotiate_encoding
+
+ALL = ["br", "zstd", "gzip"]
+BODY = b'{"name": "Luna", "species": "dog"}' * 100
+
+
+def app_with(body=BODY, headers=(), chunks=None):
+    chunks = chunks or [body]
+
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start", "status": 200,
+            "headers": [(b"content-type", b"application/json"), *headers],
+        })
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return CompressionMiddleware(app)
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, zstd, br", "br"),
+    ("gzip, zstd", "zstd"),
+    ("br;q=0.5, zstd;q=0.8, gzip", "gzip"),
+    ("br;q=0, gzip;q=0.1", "gzip"),
+    ("*;q=0.2, zstd;q=0.1", "br"),
+    ("identity", None),
+    ("gzip;q=0", None),
+])
+def test_negotiation_follows_q_values_then_server_preference(accept, expected):
+    assert negotiate_encoding(accept, ALL) == expected
+
+
+def test_small_responses_are_not_compressed():
+    response = TestClient(app_with(body=b"{}")).get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == b"{}"
+
+
+def test_already_encoded_responses_pass_through():
+    encoded = zlib.compress(BODY)
+    app = app_with(body=encoded, headers=[(b"content-encoding", b"deflate")])
+
+    response = TestClient(app).get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "deflate"
+    assert response.content == BODY
+
+
+@pytest.mark.parametrize("encoding", compression.available_encodings())
+def test_streaming_response_decodes_to_the_original_body(encoding):
+    chunks = [BODY[:1000], BODY[1000:2000], BODY[2000:]]
+
+    response = TestClient(app_with(chunks=chunks)).get("/", headers={"Accept-Encoding": encoding})
+
+    assert response.headers["content-encoding"] == encoding
+    assert "content-length" not in response.headers
+    assert response.content == BODY
+
+
+def test_each_streamed_chunk_is_flushed():
+    chunks = [BODY[:1000], BODY[1000:]]
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(app_with(chunks=chunks)(scope, receive, send))
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    bodies = [message["body"] for message in sent if message["type"] == "http.response.body"]
+    # O primeiro pedaço sozinho já decodifica inteiro: o cliente não espera o fim do stream
+    assert decoder.decompress(bodies[0]) == chunks[0]
+    assert decoder.decompress(bodies[1]) == chunks[1]
+    assert decoder.eof
+
+
+def test_app_responses_are_compressed(client):
+    response = client.get("/pets", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert isinstance(response.json(), list)
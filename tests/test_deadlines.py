@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import deadlines
+from database import engine
+
+# Segundos de trabalho na VM do SQLite, sem tocar em tabela nenhuma
+LONG_QUERY = text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 100000000) SELECT count(*) FROM n")
+
+
+def deadline_client(monkeypatch, app, seconds):
+    monkeypatch.setattr(deadlines.stats, "middleware", deadlines.stats.middleware)
+    monkeypatch.setattr(deadlines, "route_deadline", lambda path: ("teste", seconds))
+    return TestClient(deadlines.DeadlineMiddleware(app))
+
+
+async def respond(send, body=b"ok"):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def test_expired_deadline_returns_504(monkeypatch):
+    async def slow(scope, receive, send):
+        await asyncio.sleep(5)
+        await respond(send)
+
+    started = time.monotonic()
+    response = deadline_client(monkeypatch, slow, 0.05).get("/")
+
+    assert response.status_code == 504
+    assert time.monotonic() - started < 2
+    assert deadlines.stats.middleware.timed_out["teste"] == 1
+
+
+def test_request_within_deadline_is_untouched(monkeypatch):
+    async def quick(scope, receive, send):
+        await asyncio.sleep(0.01)
+        await respond(send)
+
+    client = deadline_client(monkeypatch, quick, 1)
+
+    assert client.get("/").text == "ok"
+
+
+def test_progress_handler_aborts_long_query():
+    token = deadlines._current.set(deadlines.Deadline(0.05))
+    try:
+        started = time.monotonic()
+        with engine.connect() as conn, pytest.raises(OperationalError, match="interrupted"):
+            conn.execute(LONG_QUERY).scalar()
+        assert time.monotonic() - started < 2
+    finally:
+        deadlines._current.reset(token)
@@ -0,0 +1,16 @@
+import events
+from models import ChangeEvent
+
+
+def test_ids_keep_growing_after_pruning_every_event(client, db):
+    events.record(db, "pet.created", pet_id=1)
+    events.record(db, "pet.updated", pet_id=1)
+    db.commit()
+    cursor = events._last_id(db)
+
+    events.prune(db, hours=-1)
+    assert db.query(ChangeEvent.id).all() == [(cursor,)]
+
+    events.record(db, "pet.deleted", pet_id=1)
+    db.commit()
+    assert [event["type"] for event in events.select_events_after(db, cursor)] == ["pet.deleted"]
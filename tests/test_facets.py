@@ -0,0 +1,29 @@
+import pytest
+from sqlalchemy import func
+
+from app_types import SpeciesEnum, StatusEnum
+from main import pet_filter_conditions
+from models import Pet
+
+
+def count(db, **filters):
+    return db.query(func.count(Pet.id)).filter(*pet_filter_conditions(**filters)).scalar()
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"species": SpeciesEnum.DOG},
+    {"city": "re", "min_age": 12, "max_age": 96},
+])
+def test_facet_counts_match_count_with_the_same_filters(client, db, filters):
+    params = {name: getattr(value, "value", value) for name, value in filters.items()}
+
+    facets = client.get("/pets/facets", params=params).json()
+
+    assert facets["total"] == count(db, **filters)
+    for status in StatusEnum:
+        assert facets["status"].get(status.value, 0) == count(db, **{**filters, "status": status})
+    if "species" not in filters:
+        for species in SpeciesEnum:
+            assert facets["species"].get(species.value, 0) == count(db, **{**filters, "species": species})
+    assert sum(facets["age"].values()) == facets["total"]
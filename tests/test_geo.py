@@ -0,0 +1,24 @@
+from geo import KM_PER_DEGREE
+
+# No meio do Atlântico: nenhum outro pet dos testes fica perto
+LAT, LON = -20.0, -20.0
+
+
+def create_pet_north_of_center(client, km):
+    response = client.post("/pets", json={
+        "name": f"A {km} km", "species": "dog", "gender": "female",
+        "latitude": LAT + km / KM_PER_DEGREE, "longitude": LON,
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_radius_search_returns_pets_inside_sorted_by_distance(client):
+    ids = {km: create_pet_north_of_center(client, km) for km in (12, 1, 50, 5)}
+
+    response = client.get("/pets", params={"lat": LAT, "lon": LON, "radius_km": 20})
+
+    assert response.status_code == 200
+    pets = response.json()
+    assert [pet["id"] for pet in pets] == [ids[1], ids[5], ids[12]]
+    assert [round(pet["distance_km"]) for pet in pets] == [1, 5, 12]
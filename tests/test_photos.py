@@ -0,0 +1,43 @@
+import main
+from models import PetPhoto
+
+
+def create_pet(client, photos):
+    response = client.post("/pets", json={"name": "Foto", "species": "dog", "gender": "male", "photos": photos})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_put_replaces_photos_of_pet_that_already_has_photos(client, db):
+    pet_id = create_pet(client, ["old.jpg", "b.jpg"])
+
+    response = client.put(f"/pets/{pet_id}", json={"photos": ["a.jpg", "b.jpg"]})
+
+    assert response.status_code == 200
+    assert response.json()["photos"] == ["a.jpg", "b.jpg"]
+    rows = db.query(PetPhoto.blob_key).filter(PetPhoto.pet_id == pet_id).order_by(PetPhoto.position).all()
+    assert [row.blob_key for row in rows] == ["a.jpg", "b.jpg"]
+
+
+def test_put_keeps_rows_of_photos_that_stay(client, db):
+    pet_id = create_pet(client, ["a.jpg", "b.jpg", "c.jpg"])
+    kept = db.query(PetPhoto.id).filter(PetPhoto.pet_id == pet_id, PetPhoto.blob_key == "c.jpg").scalar()
+
+    response = client.put(f"/pets/{pet_id}", json={"photos": ["c.jpg", "d.jpg", "a.jpg"]})
+
+    assert response.status_code == 200
+    assert response.json()["photos"] == ["c.jpg", "d.jpg", "a.jpg"]
+    assert db.query(PetPhoto.blob_key).filter(PetPhoto.id == kept).scalar() == "c.jpg"
+
+
+def test_uploads_go_after_the_last_photo(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+    pet_id = create_pet(client, ["a.jpg"])
+    files = [("files", (f"{name}.png", b"\x89PNG", "image/png")) for name in ("x", "y")]
+
+    first = client.post(f"/pets/{pet_id}/photos", files=files[:1]).json()
+    second = client.post(f"/pets/{pet_id}/photos", files=files[1:]).json()
+
+    photos = client.get(f"/pets/{pet_id}/photos").json()
+    assert [photo["id"] for photo in photos[1:]] == first["photo_ids"] + second["photo_ids"]
+    assert len({photo["position"] for photo in photos}) == 3
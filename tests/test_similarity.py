@@ -0,0 +1,31 @@
+import similarity
+from models import PetSimilarity
+
+
+def test_startup_builds_the_index(client, db):
+    assert db.query(PetSimilarity).count() > 0
+
+
+def test_updater_sees_pets_written_by_other_workers(client, db):
+    # Uma palavra só dos dois garante que o gêmeo é candidato mesmo com o catálogo cheio
+    description = "Xodózinho da vizinhança, muito carinhoso."
+    original = client.post("/pets", json={
+        "name": "Original", "species": "dog", "gender": "male", "breed": "Vira-lata", "age": 12,
+        "description": description,
+    }).json()
+    updater = similarity.SimilarityUpdater()
+    updater.sync(db)
+
+    # Outro worker: só o evento em change_events chega a este processo
+    pet = client.post("/pets", json={
+        "name": "Gêmeo", "species": "dog", "gender": "male", "breed": "Vira-lata", "age": 12,
+        "description": description,
+    }).json()
+    assert pet["id"] not in updater.index.vectors
+
+    updater.apply(db, [(original["id"], False)])
+
+    assert pet["id"] in updater.index.vectors
+    assert pet["id"] in [
+        row.similar_pet_id for row in db.query(PetSimilarity).filter(PetSimilarity.pet_id == original["id"])
+    ]